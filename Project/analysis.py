@@ -7,14 +7,20 @@
 import numpy as np
 from scipy.stats import *
 import matplotlib.pyplot as plt
-import uproot
 import os
 import sys
 import configparser
 from tqdm import tqdm
 
 from analysis_helpers import *
+from analysis_binning import *
 from analysis_plotters import *
+from analysis_store import *
+from analysis_io import *
+from analysis_results import *
+from analysis_core import *
+from analysis_decays import *
+from analysis_output import *
 
 # Read configuration file
 #=====================================================
@@ -30,6 +36,8 @@ config.read(config_file)
 #=====================================================
 EVENTS=int(config['Setup']['EVENTS'])           # Will return error if this does not agree with number of events in data files
 CUT=int(config['Setup']['EVENTS_CUT'])
+COMPACT_DTYPES = config.getboolean('Setup', 'COMPACT_DTYPES', fallback=False)   # Load kinematics as float32 and pack AllEvents flags into a uint8 bitfield
+STREAMING_STATISTICS = config.getboolean('Setup', 'STREAMING_STATISTICS', fallback=False)   # Summary statistics from mergeable moment accumulators and sketches (one pass)
 #=====================================================
 
 
@@ -53,6 +61,12 @@ TRANSMITTED_PARTICLES = config.getboolean('PlotSelection', 'TRANSMITTED_PARTICLE
 CUTOFF_THETA_SCATTER_PLOT = config.getboolean('PlotSelection', 'CUTOFF_THETA_SCATTER_PLOT')
 HISTOGRAM_MOMENTA_INCIDENT_ANGLE = config.getboolean('PlotSelection','HISTOGRAM_MOMENTA_INCIDENT_ANGLE')
 ALPHA_PLOTS = config.getboolean('PlotSelection','ALPHA_PLOTS')
+DECAY_PRODUCTS_PLOT = config.getboolean('PlotSelection', 'DECAY_PRODUCTS_PLOT', fallback=False)
+
+# Histogram Store Options
+#=====================================================
+# Precompute fixed-binning histograms of every configuration and save them to a compressed tensor store
+HISTOGRAM_STORE = config.getboolean('HistogramStore', 'HISTOGRAM_STORE', fallback=False)
 
 # Plotting Configuration
 # Note: data for any permutations must be in the DATA directory
@@ -94,12 +108,31 @@ if not os.path.exists('./plots/'):
 if not os.path.exists(f'./plots/{DATA_FOLDER}'):
     os.mkdir(f'./plots/{DATA_FOLDER}')
 
+# Figures are saved as loose PNG files, or rendered in parallel into plots/DATA_FOLDER/plots.zip (see analysis_output.py)
+plot_output = open_plot_output(f"plots/{DATA_FOLDER}", read_plot_backend(config), f"plots{transmit}.zip")
+
+
+# Initialize histogram store (fixed binning for every configuration)
+#=====================================================
+if HISTOGRAM_STORE:
+    histogram_store = init_histogram_store(read_histogram_binning(config), PARTICLES, MATERIALS, MOMENTA, ANGLES, THICKNESS, EVENTS, refl_trans_string)
+
+
+# Initialize summary (one typed record of counts and statistics per configuration)
+#=====================================================
+summary = make_summary((len(PARTICLES), len(MATERIALS), len(MOMENTA), len(ANGLES)))
+
+
+# Initialize decay-product table (in/during/out counts of each decayed PDG code, per configuration)
+#=====================================================
+decay_table = make_decay_table(summary.shape)
+
 
 # Main Code
 #=====================================================
 # Iterate over permutations of particles, surfaces (materials), momenta, and angles of incident particles
-for particle in tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=True):
-    for material in tqdm(MATERIALS, leave=False, desc='MATERIALS', dynamic_ncols=True):
+for particle_index, particle in enumerate(tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=True)):
+    for material_index, material in enumerate(tqdm(MATERIALS, leave=False, desc='MATERIALS', dynamic_ncols=True)):
         # Create the figure and axis objects for selected scatterplots and histogram arrays
         if THETAS_SCATTER_PLOT:
             fig_mean, ax_mean = plt.subplots()
@@ -127,7 +160,7 @@ for particle in tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=Tru
         material_name = return_surface_name(material)
         
         # Initialize cutoff angle array
-        cutoff_angles = []
+        cutoff_angles = np.zeros(len(MOMENTA))
 
         for momentum_index, momentum in enumerate(tqdm(MOMENTA, leave=False, desc='MOMENTA', dynamic_ncols=True)):
             # Create reflected, transmitted, decayed scatterplot
@@ -137,176 +170,47 @@ for particle in tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=Tru
             if HISTOGRAM_MOMENTA_INCIDENT_ANGLE:
                 fig_mom_inc, ax_mom_inc = plt.subplots(figsize=(8,6))
             
-            # Initiate arrays for statistical parameters for theta
-            theta_means = []
-            theta_modes = []
-            theta_std_devs = []
-            theta_mean_errors = []
-            theta_mode_hwhm_left = []
-            theta_mode_hwhm_right = []
-            #theta_mode_errors = []
-            
-            # Initiate arrays for statistical parameters for phi
-            phi_means = []
-            phi_modes = []
-            phi_std_devs = []
-            phi_mean_errors = []
-            phi_mode_hwhm_left = []
-            phi_mode_hwhm_right = []
-            #phi_mode_errors = []
-            
-            # Initiate arrays for statistical parameters for momentum
-            momentum_means = []
-            momentum_modes = []
-            momentum_std_devs = []
-            momentum_mean_errors = []
-            momentum_mode_hwhm_left = []
-            momentum_mode_hwhm_right = []
-            #momentum_mode_errors = []
-            momentum_distributions = []
-            
-            # Initiate arrays for statistical parameters for alpha
-            alpha_means = []
-            alpha_modes = []
-            alpha_std_devs = []
-            alpha_mode_hwhm_left = []
-            alpha_mode_hwhm_right = []
+            # Typed view of the summary for this momentum (one record per incident angle)
+            results = summary[particle_index, material_index, momentum_index]
             
-            # Record array of incident angles where there are reflected (or transmitted if TRANSMITTED_PARTICLES=True) particles
-            incident_angles = []
+            # Initiate (angle x momentum bins) histogram of outgoing momenta vs incident angle
+            if HISTOGRAM_MOMENTA_INCIDENT_ANGLE:
+                momentum_angle_hist = init_momentum_angle_histogram(len(ANGLES))
             
-            # Record number of non-decayed reflected and transmitted particles, and number of decayed particles
-            n_reflected = []
-            n_transmitted = []
-            n_decayed = []
-            n_decayed_in = []
-            n_decayed_out_r = []
-            n_decayed_out_t = []
-            a_decay_pdgid = []
-            n_absorbed = []
-
             # Set initial cutoff angle
             cutoff_angle = 0
             
             for theta_index, theta_incident in enumerate(tqdm(ANGLES, leave=False, desc='THETAS', dynamic_ncols=True)):
-                # Initialize arrays of angles and momenta of reflected (or transmitted if TRANSMITTED_PARTICLES=True) particles for each configuration
-                thetas = []
-                phis = []
-                momenta = []
-                alphas = []
-                
-                # Initialize counts
-                reflected = 0
-                transmitted = 0
-                absorbed = 0
-                decayed = 0
-                decayed_in = 0
-                decayed_out_r = 0
-                decayed_out_t = 0
-                decay_pdgid = 0
-                events = 0
-                
                 # Record path to specific data files
-                path1 = DATA + "output_" +str(material)+'_'+str(particle)+'_'+str(momentum)+'_'+str(theta_incident)+'.root'
-                path2 = DATA + "output_" +str(material)+'_'+str(particle)+'_'+str(momentum)+'_'+str(theta_incident)+'_'+str(THICKNESS)+'.root'
-                path3 = DATA + "output_" +str(material)+'_'+str(particle)+'_'+str(momentum)+'_'+str(round(theta_incident))+'.root'
-                path4 = DATA + "output_" +str(material)+'_'+str(particle)+'_'+str(momentum)+'_'+str(round(theta_incident))+'_'+str(THICKNESS)+'.root'
-                if os.path.exists(path1):
-                    path = path1
-                elif os.path.exists(path2):
-                    path=path2
-                elif os.path.exists(path3):
-                    path=path3
-                elif os.path.exists(path4):
-                    path=path4
-                else:
+                path = find_data_file(DATA, material, particle, momentum, theta_incident, THICKNESS)
+                if path is None:
                     print(" ********** NO FILE FOUND ********** ")
-                    print(path1)
-                    print(path2)
-                    print(path3)
-                    print(path4)
+                    for candidate in data_file_candidates(DATA, material, particle, momentum, theta_incident, THICKNESS):
+                        print(candidate)
                     sys.exit(1)
 
-                # Iterate through all .root files for the specified configuration
-                #for file_path in os.listdir(path):
-                #    if not file_path.endswith(".root"): continue
-                with uproot.open(path) as file: # + file_path
-                    theta_i = file["PrimaryEvents"]["fTheta"]            # Store thetas from root ntuples
-                    theta_i = np.asarray(theta_i)
-                    theta = theta_i[theta_i > 90] if TRANSMITTED_PARTICLES else theta_i[theta_i <= 90] # Cut out transmitted/reflected events
-                    thetas = np.append(thetas, theta)                   # Add ntuple of thetas to thetas array
-                    
-                    phi = file["PrimaryEvents"]["fPhi"]                 # Store phis from root ntuples
-                    phi = np.asarray(phi)
-                    phi = phi[theta_i > 90] if TRANSMITTED_PARTICLES else phi[theta_i <= 90] # Cut out transmitted/reflected events
-                    phis = np.append(phis, phi)                         # Add ntuple of phis to phis array
-                    
-                    # (if statement an attempt to reduce the computational load)
-                    if ALPHA_PLOTS or MOMENTUM_HISTOGRAMS or CORRELATION_HISTOGRAM_THETA_MOMENTUM or MOMENTUM_HISTOGRAM_ARRAY or CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY or MOMENTUM_SCATTER_PLOT:
-                        p_x = np.asarray(file["PrimaryEvents"]["fP_x"])     # Store x-momentum fro root ntuples
-                        p_y = np.asarray(file["PrimaryEvents"]["fP_y"])     # Store y-momentum fro root ntuples
-                        p_z = np.asarray(file["PrimaryEvents"]["fP_z"])     # Store z-momentum fro root ntuples
-                        p_x = p_x[p_y < 0] if TRANSMITTED_PARTICLES else p_x[p_y >= 0] # Cut out transmitted/reflected events
-                        p_z = p_z[p_y < 0] if TRANSMITTED_PARTICLES else p_z[p_y >= 0]
-                        p_y = p_y[p_y < 0] if TRANSMITTED_PARTICLES else p_y[p_y >= 0]
-                        p = np.sqrt(np.add(np.add(np.square(p_x),np.square(p_y)),np.square(p_z)))
-                        momenta = np.append(momenta, p)                     # Add ntuple of |P| to momenta array
-                        
-                        print(p_y - momentum*math.cos(math.radians(theta_incident)))
-                        print(np.sqrt(np.add(np.square(p_x),np.square(p_z))) - momentum*math.sin(math.radians(theta_incident)))
-                    
-                    # Compute reflected, absorbed, transmitted, and decayed and add to current tally
-                    reflected_add = len(np.asarray(file["PrimaryEvents"]["fEvent"])[np.asarray(file["PrimaryEvents"]["fTheta"]) < 90])
-                    transmitted_add = len(np.asarray(file["PrimaryEvents"]["fEvent"])[np.asarray(file["PrimaryEvents"]["fTheta"]) > 90])
-                    decayed_add = sum(np.logical_and(np.asarray(file["AllEvents"]["fIsDecayed"]), np.logical_not(np.asarray(file["AllEvents"]["fIsAbsorbed"]))))
-                    absorbed_add = sum(np.asarray(file["AllEvents"]["fIsAbsorbed"]))
-                    decayed_in_add = sum(np.asarray(file["AllEvents"]["fIsDecayedIn"]))
-                    
-                    decayed_out_events = np.asarray(file["AllEvents"]["fEvent"])
-                    primary_events = np.asarray(file["PrimaryEvents"]["fEvent"])
-                    decayed_out = np.asarray(file["AllEvents"]["fIsDecayedOut"])
-                    decayed_out_event_nums = decayed_out_events[decayed_out > 0]
-                    theta_decay = np.asarray(file["PrimaryEvents"]["fTheta"])[np.isin(primary_events,decayed_out_event_nums) > 0]
-                    
-                    decayed_out_r_add = len(theta_decay[theta_decay < 90])
-                    decayed_out_t_add = len(theta_decay[theta_decay > 90])
-                    
-                    decay_pdgid = np.asarray(file["AllEvents"]["fDecayPDG"])
-                    
-                    reflected+=reflected_add
-                    transmitted+=transmitted_add
-                    decayed+= decayed_add
-                    decayed_in+=decayed_in_add
-                    decayed_out_r+=decayed_out_r_add
-                    decayed_out_t+=decayed_out_t_add
-                    absorbed+= absorbed_add
-                    
-                    events += len(np.asarray(file["AllEvents"]["fEvent"]))
-                    
-                alphas = compute_alphas(momentum, momenta, theta_incident)
+                # Read and select the configuration (kinematics as float32 and AllEvents flags packed in a bitfield if COMPACT_DTYPES)
+                # (momentum columns only read if needed, an attempt to reduce the computational load)
+                read_momenta = ALPHA_PLOTS or MOMENTUM_HISTOGRAMS or CORRELATION_HISTOGRAM_THETA_MOMENTUM or MOMENTUM_HISTOGRAM_ARRAY or CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY or MOMENTUM_SCATTER_PLOT or HISTOGRAM_MOMENTA_INCIDENT_ANGLE or HISTOGRAM_STORE
+                selection = select_configuration_events(path, momentum, theta_incident, TRANSMITTED_PARTICLES, read_momenta, compact=COMPACT_DTYPES)
+                thetas = selection['thetas']                        # Thetas of the configuration (transmitted thetas folded to 180-theta, keeps the loaded dtype)
+                phis = selection['phis']                            # Phis of the configuration
+                momenta = selection['momenta']                      # |P| of the configuration (empty if the momenta are not read)
+                alphas = selection['alphas']
+                counts = selection['counts']                        # reflected, absorbed, transmitted, decayed, ... tallies
                 
-                # Append tallys to arrays
-                n_reflected.append(reflected)
-                n_transmitted.append(transmitted)
-                n_decayed.append(decayed)
-                n_absorbed.append(absorbed)
-                n_decayed_in.append(decayed_in)
-                n_decayed_out_r.append(decayed_out_r)
-                n_decayed_out_t.append(decayed_out_t)
-                a_decay_pdgid.append(decay_pdgid)
+                # Record tallys in the summary
+                record_counts(results, theta_index, **counts)
+                update_decay_table(decay_table, (particle_index, material_index, momentum_index, theta_index), *selection['decay_products'])
                 
-                # Append momentum distributions
-                if (len(thetas) < CUT): 
-                    momentum_distributions.append([])
-                else:
-                    momentum_distributions.append(momenta)
+                # Bin the momentum distribution of this incident angle (the raw momenta are not kept)
+                if HISTOGRAM_MOMENTA_INCIDENT_ANGLE and len(thetas) >= CUT:
+                    fill_momentum_angle_histogram(momentum_angle_hist, theta_index, momenta, momentum)
                 
                 # Checks to make sure data file is valid
-                if events != EVENTS: 
-                    print("******ERROR*****\nEVENTS does not match number in file")
-                    sys.exit(1)
-                if (reflected+transmitted+decayed+absorbed-decayed_out_r-decayed_out_t) != events: 
-                    print("*****ERROR2*****")
+                error = counts_error(counts, EVENTS)
+                if error is not None:
+                    print(error)
                     sys.exit(1)
                 
                 # Cut on configurations where there are less than CUT reflected (or transmitted if TRANSMITTED_PARTICLES=True) events (for statistical purposes)
@@ -315,177 +219,160 @@ for particle in tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=Tru
                     continue
                 #print(len(thetas))
                 
-                # Transform transmitted thetas
-                thetas = [180-theta for theta in thetas] if TRANSMITTED_PARTICLES else thetas
+                # Record theta_incident as an incident theta where there are >= CUT reflected (or transmitted if TRANSMITTED_PARTICLES=True) events
+                results['valid'][theta_index] = True
                 
-                # Record theta_incident in as an incident theta where there are >= 5 (or transmitted if TRANSMITTED_PARTICLES=True) events
-                incident_angles.append(theta_incident)
+                # Add configuration to the histogram store
+                if HISTOGRAM_STORE:
+                    fill_histogram_store(histogram_store, (particle_index, material_index, momentum_index, theta_index), momentum, thetas, phis, momenta, alphas)
+                
+                # Record the statistics of the configuration in the summary (whatever the plot selection, as analysis_distributed.py);
+                # the plots below read the recorded values
+                record_configuration_statistics(results, theta_index, momentum, selection, streaming=STREAMING_STATISTICS)
                 
                 if THETA_HISTOGRAMS or CORRELATION_HISTOGRAM_THETA_MOMENTUM or CORRELATION_HISTOGRAM_THETA_PHI or THETA_HISTOGRAM_ARRAY or CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY or CORRELATION_HISTOGRAM_THETA_PHI_ARRAY or THETAS_SCATTER_PLOT:
-                    # Compute the mean and std deviation from raw theta data; compute mode from histogram binning (take central value of max bin(s))
-                    range_th = (90,180) if TRANSMITTED_PARTICLES else (0,90)
-                    theta_hist, theta_bin_edges = np.histogram(thetas, range=range_th, bins='auto')
+                    # Histogram of the thetas for the plots (transmitted thetas are already folded to 180-theta)
+                    range_th = (0,90)
+                    theta_hist, theta_bin_edges = auto_histogram(thetas, range=range_th)
                     theta_max_frequency = np.max(theta_hist)
-                    theta_mode, theta_mode_hwhm_l, theta_mode_hwhm_r = mode_helper(np.asarray(thetas))
-                    theta_mean = np.nanmean(thetas)
-                    theta_std_dev = np.nanstd(thetas)
-                    theta_mean_error = root_mean_squared_error(thetas, theta_mean)
-                    #theta_mode, theta_mode_error = shifted_mode_rmse(thetas, theta_mean_error, theta_mean)
-
-                    # Append mean, mode, std dev, and errors to their respective arrays
-                    theta_modes.append(theta_mode)
-                    theta_means.append(theta_mean)
-                    theta_std_devs.append(theta_std_dev)
-                    theta_mean_errors.append(theta_mean_error)
-                    theta_mode_hwhm_left.append(theta_mode_hwhm_l)
-                    theta_mode_hwhm_right.append(theta_mode_hwhm_r)
-                    #theta_mode_errors.append(theta_mode_error)
+                    theta_mode, theta_mean, theta_std_dev = recorded_statistics(results, theta_index, 'theta', 'mode', 'mean', 'std_dev')
                 
                 if PHI_HISTOGRAMS or CORRELATION_HISTOGRAM_THETA_PHI or PHI_HISTOGRAM_ARRAY or CORRELATION_HISTOGRAM_THETA_PHI_ARRAY:
-                    # Compute the mean and std deviation from raw phi data; compute mode from histogram binning (take central value of max bin(s))
+                    # Histogram of the phis for the plots
                     range_phis = (0,360)
-                    phi_hist, phi_bin_edges = np.histogram(phis, range=range_phis, bins='auto')
+                    phi_hist, phi_bin_edges = auto_histogram(phis, range=range_phis)
                     phi_max_frequency = np.max(phi_hist)
-                    phi_mode, phi_mode_hwhm_l, phi_mode_hwhm_r = mode_helper(np.asarray(phis))
-                    phi_mean = np.nanmean(phis)
-                    phi_std_dev = np.nanstd(phis)
-                    phi_mean_error = root_mean_squared_error(phis, phi_mean)
-                    #phi_mode, phi_mode_error = shifted_mode_rmse(phis, phi_mean_error, phi_mean)
-
-                    # Append mean, mode, std dev, and errors to their respective arrays
-                    phi_modes.append(phi_mode)
-                    phi_means.append(phi_mean)
-                    phi_std_devs.append(phi_std_dev)
-                    phi_mean_errors.append(phi_mean_error)
-                    phi_mode_hwhm_left.append(phi_mode_hwhm_l)
-                    phi_mode_hwhm_right.append(phi_mode_hwhm_r)
-                    #phi_mode_errors.append(phi_mode_error)
+                    phi_mode, phi_mean, phi_std_dev = recorded_statistics(results, theta_index, 'phi', 'mode', 'mean', 'std_dev')
 
                 
                 if MOMENTUM_HISTOGRAMS or CORRELATION_HISTOGRAM_THETA_MOMENTUM or MOMENTUM_HISTOGRAM_ARRAY or CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY or MOMENTUM_SCATTER_PLOT:
-                    # Compute the mean and std deviation from raw momentum data; compute mode from histogram binning (take central value of max bin(s))
+                    # Histogram of the momenta for the plots
                     range_momenta= (0,momentum)
-                    momentum_hist, momentum_bin_edges = np.histogram(momenta, range=range_momenta, bins='auto')
+                    momentum_hist, momentum_bin_edges = auto_histogram(momenta, range=range_momenta)
                     momentum_max_frequency = np.max(momentum_hist)
-                    momentum_mode, momentum_mode_hwhm_l, momentum_mode_hwhm_r = mode_helper(np.asarray(momenta))
-                    momentum_mean = np.nanmean(momenta)
-                    momentum_std_dev = np.nanstd(momenta)
-                    momentum_mean_error = root_mean_squared_error(momenta, momentum_mean)
-                    momentum_mode, momentum_mode_error = shifted_mode_rmse(momenta, momentum_mean_error, momentum_mean)
-
-                    # Append mean, mode, std dev, and errors to their respective arrays
-                    momentum_modes.append(momentum_mode)
-                    momentum_means.append(momentum_mean)
-                    momentum_std_devs.append(momentum_std_dev)
-                    momentum_mean_errors.append(momentum_mean_error)
-                    momentum_mode_hwhm_left.append(momentum_mode_hwhm_l)
-                    momentum_mode_hwhm_right.append(momentum_mode_hwhm_r)
-                    #momentum_mode_errors.append(momentum_mode_error)
+                    momentum_mode, momentum_mean, momentum_std_dev = recorded_statistics(results, theta_index, 'momentum', 'mode', 'mean', 'std_dev')
                     
                 if ALPHA_PLOTS:
-                    alpha_hist, alpha_bin_edges = np.histogram(alphas, bins='auto')
+                    alpha_hist, alpha_bin_edges = auto_histogram(alphas)
                     alpha_max_frequency = np.max(alpha_hist)
-                    alpha_mode, alpha_mode_hwhm_l, alpha_mode_hwhm_r = mode_helper(np.asarray(alphas))
-                    alpha_mean = np.nanmean(alphas)
-                    alpha_std_dev = np.nanstd(alphas)
-                    alpha_mean_error = root_mean_squared_error(alphas, alpha_mean)
+                    alpha_mode, alpha_mean, alpha_std_dev = recorded_statistics(results, theta_index, 'alpha', 'mode', 'mean', 'std_dev')
+
+                # Bin the correlations once on the theta, momentum and phi binnings (the plots are drawn from the counts)
+                if CORRELATION_HISTOGRAM_THETA_MOMENTUM or CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY:
+                    t_m_counts, _, _ = np.histogram2d(thetas, momenta, bins=[theta_bin_edges, momentum_bin_edges])
+                    t_m_correlation = np.corrcoef(thetas, momenta)[0][1]
+                    
+                if CORRELATION_HISTOGRAM_THETA_PHI or CORRELATION_HISTOGRAM_THETA_PHI_ARRAY:
+                    t_p_counts, _, _ = np.histogram2d(thetas, phis, bins=[theta_bin_edges, phi_bin_edges])
+                    t_p_correlation = np.corrcoef(thetas, phis)[0][1]
 
                 # Make individual histograms (depending on those selected at top of script)
                 if THETA_HISTOGRAMS:
                     print("making theta histogram")
                     fig_h_theta, ax_h_theta = plt.subplots()
-                    make_theta_histogram(fig_h_theta, ax_h_theta, thetas, theta_mode, theta_mean, theta_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
-                    fig_h_theta.savefig(f"plots/{DATA_FOLDER}/histogram_theta_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    make_theta_histogram_counts(fig_h_theta, ax_h_theta, theta_hist, theta_bin_edges, theta_mode, theta_mean, theta_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_theta, f"plots/{DATA_FOLDER}/histogram_theta_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
                     plt.close(fig_h_theta)  # Close the histogram figure after saving
                 
                 if PHI_HISTOGRAMS:
                     print("making phi histogram")
                     fig_h_phi, ax_h_phi = plt.subplots()
-                    make_phi_histogram(fig_h_phi, ax_h_phi, phis, phi_mode, phi_mean, phi_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
-                    fig_h_phi.savefig(f"plots/{DATA_FOLDER}/histogram_phi_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    make_phi_histogram_counts(fig_h_phi, ax_h_phi, phi_hist, phi_bin_edges, phi_mode, phi_mean, phi_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_phi, f"plots/{DATA_FOLDER}/histogram_phi_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
                     plt.close(fig_h_phi)  # Close the histogram figure after saving
                 
                 if MOMENTUM_HISTOGRAMS:
                     print("making momentum histogram")
                     fig_h_momentum, ax_h_momentum = plt.subplots()
-                    make_momentum_histogram(fig_h_momentum, ax_h_momentum, momenta, momentum_mode, momentum_mean, momentum_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
-                    fig_h_momentum.savefig(f"plots/{DATA_FOLDER}/histogram_momentum_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    make_momentum_histogram_counts(fig_h_momentum, ax_h_momentum, momentum_hist, momentum_bin_edges, momentum_mode, momentum_mean, momentum_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_momentum, f"plots/{DATA_FOLDER}/histogram_momentum_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
                     plt.close(fig_h_momentum)  # Close the histogram figure after saving
                     
                 if ALPHA_PLOTS:
                     print("making alpha histogram")
                     fig_h_alpha, ax_h_alpha = plt.subplots()
-                    make_alpha_histogram(fig_h_alpha, ax_h_alpha, alphas, alpha_mode, alpha_mean, alpha_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(alphas), THICKNESS)
-                    fig_h_alpha.savefig(f"plots/{DATA_FOLDER}/histogram_alpha_{particle}_{material_name}_{momentum}_{theta_incident}.png")
+                    make_alpha_histogram_counts(fig_h_alpha, ax_h_alpha, alpha_hist, alpha_bin_edges, alpha_mode, alpha_mean, alpha_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(alphas), THICKNESS)
+                    save_figure(plot_output, fig_h_alpha, f"plots/{DATA_FOLDER}/histogram_alpha_{particle}_{material_name}_{momentum}_{theta_incident}.png")
                     plt.close(fig_h_alpha)
                     
                 if CORRELATION_HISTOGRAM_THETA_MOMENTUM:
                     print("making 2d histogram of theta vs momentum")
                     fig_h_cor, ax_h_cor = plt.subplots()
-                    make_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momenta, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
-                    fig_h_cor.savefig(f"plots/{DATA_FOLDER}/histogram_correlation_theta_momentum_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    make_correlation_theta_momentum_histogram_counts(fig_h_cor, ax_h_cor, t_m_counts, theta_bin_edges, momentum_bin_edges, t_m_correlation, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_cor, f"plots/{DATA_FOLDER}/histogram_correlation_theta_momentum_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
                     plt.close(fig_h_cor)  # Close the histogram figure after saving
                     
                 if CORRELATION_HISTOGRAM_THETA_PHI:
                     print("making 2d histogram of theta vs phi")
                     fig_h_cor, ax_h_cor = plt.subplots()
-                    make_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
-                    fig_h_cor.savefig(f"plots/{DATA_FOLDER}/histogram_correlation_theta_phi_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    make_correlation_theta_phi_histogram_counts(fig_h_cor, ax_h_cor, t_p_counts, theta_bin_edges, phi_bin_edges, t_p_correlation, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_cor, f"plots/{DATA_FOLDER}/histogram_correlation_theta_phi_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
                     plt.close(fig_h_cor)  # Close the histogram figure after saving
                     
                 # Add histograms to arrays of histograms (depending on those selected at top of script)
                 if THETA_HISTOGRAM_ARRAY:
                     print("making theta histogram array")
-                    make_theta_histogram_a(fig_theta_array, axes_theta_array[momentum_index][theta_index], thetas, theta_mode, theta_mean, theta_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    make_theta_histogram_counts_a(fig_theta_array, axes_theta_array[momentum_index][theta_index], theta_hist, theta_bin_edges, theta_mode, theta_mean, theta_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
                 
                 if PHI_HISTOGRAM_ARRAY:
                     print("making phi histogram array")
-                    make_phi_histogram_a(fig_phi_array, axes_phi_array[momentum_index][theta_index], phis, phi_mode, phi_mean, phi_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    make_phi_histogram_counts_a(fig_phi_array, axes_phi_array[momentum_index][theta_index], phi_hist, phi_bin_edges, phi_mode, phi_mean, phi_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
                 
                 if MOMENTUM_HISTOGRAM_ARRAY:
                     print("making momentum histogram array")
-                    make_momentum_histogram_a(fig_momentum_array, axes_momentum_array[momentum_index][theta_index], momenta, momentum_mode, momentum_mean, momentum_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    make_momentum_histogram_counts_a(fig_momentum_array, axes_momentum_array[momentum_index][theta_index], momentum_hist, momentum_bin_edges, momentum_mode, momentum_mean, momentum_std_dev, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
 
                 if CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY:
                     print("making theta momentum correlation histogram array")
-                    hist_t_m = make_correlation_theta_momentum_histogram_a(fig_cor_array_t_m, axes_cor_array_t_m[momentum_index][theta_index], thetas, momenta, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    hist_t_m = make_correlation_theta_momentum_histogram_counts_a(fig_cor_array_t_m, axes_cor_array_t_m[momentum_index][theta_index], t_m_counts, theta_bin_edges, momentum_bin_edges, t_m_correlation, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
                 
                 if CORRELATION_HISTOGRAM_THETA_PHI_ARRAY:
                     print("making theta phi correlation histogram array")
-                    hist_t_p = make_correlation_theta_phi_histogram_a(fig_cor_array_t_p, axes_cor_array_t_p[momentum_index][theta_index], thetas, phis, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
+                    hist_t_p = make_correlation_theta_phi_histogram_counts_a(fig_cor_array_t_p, axes_cor_array_t_p[momentum_index][theta_index], t_p_counts, theta_bin_edges, phi_bin_edges, t_p_correlation, particle, material_name, momentum, theta_incident, EVENTS, len(thetas), refl_trans_string, THICKNESS)
                   
                   
-            cutoff_angles.append(cutoff_angle)
+            cutoff_angles[momentum_index] = cutoff_angle
+            
+            # Incident angles where there are >= CUT reflected (or transmitted if TRANSMITTED_PARTICLES=True) events
+            valid = results['valid']
+            incident_angles = ANGLES[valid]
             
             # Scatter plot with error bars for this momentum   
             if THETAS_SCATTER_PLOT:         
-                ax_mean.errorbar(incident_angles, theta_means, yerr=theta_mean_errors, fmt='o',markersize=5, markeredgecolor='black', capsize=3, elinewidth=1, markeredgewidth=0.5, ecolor='black', label=f"P = {momentum} MeV/c")
-                ax_mode.errorbar(incident_angles, theta_modes, yerr=(theta_mode_hwhm_left, theta_mode_hwhm_right), fmt='o',markersize=5, markeredgecolor='black', capsize=3, elinewidth=1, markeredgewidth=0.5, ecolor='black', label=f"P = {momentum} MeV/c")
+                ax_mean.errorbar(incident_angles, results['theta_mean'][valid], yerr=results['theta_mean_error'][valid], fmt='o',markersize=5, markeredgecolor='black', capsize=3, elinewidth=1, markeredgewidth=0.5, ecolor='black', label=f"P = {momentum} MeV/c")
+                ax_mode.errorbar(incident_angles, results['theta_mode'][valid], yerr=(results['theta_mode_hwhm_left'][valid], results['theta_mode_hwhm_right'][valid]), fmt='o',markersize=5, markeredgecolor='black', capsize=3, elinewidth=1, markeredgewidth=0.5, ecolor='black', label=f"P = {momentum} MeV/c")
                 
             if MOMENTUM_SCATTER_PLOT: pass
             
             # Scatterplot of N reflected, transmitted, absorbed
             if REFLECTED_TRANSMITTED_DECAYED_SCATTER_PLOT:
-                make_rtd_scatter_plot(fig_rtd, ax_rtd, ANGLES, n_reflected, n_transmitted, n_decayed, n_decayed_in, n_decayed_out_r, n_decayed_out_t, n_absorbed, particle, material_name, momentum, EVENTS, THICKNESS, angles_range)
-                fig_rtd.savefig(f'plots/{DATA_FOLDER}/scatter_plot_rtd_{particle}_{material_name}_{momentum}.png')
+                make_rtd_scatter_plot(fig_rtd, ax_rtd, ANGLES, results['reflected'], results['transmitted'], results['decayed'], results['decayed_in'], results['decayed_out_r'], results['decayed_out_t'], results['absorbed'], particle, material_name, momentum, EVENTS, THICKNESS, angles_range)
+                save_figure(plot_output, fig_rtd, f'plots/{DATA_FOLDER}/scatter_plot_rtd_{particle}_{material_name}_{momentum}.png')
                 plt.close(fig_rtd)
                 
             # 2D histogram of outgoing momentum vs incident angle
             if HISTOGRAM_MOMENTA_INCIDENT_ANGLE:
-                make_2dhist_momenta_inc_angle(fig_mom_inc, ax_mom_inc, momentum_distributions, ANGLES, particle, material_name, momentum, EVENTS, THICKNESS, refl_trans_string)
-                fig_mom_inc.savefig(f'plots/{DATA_FOLDER}/hist2d_momenta_vs_incident_angle_{particle}_{material_name}_{momentum}.png')
+                make_2dhist_momenta_inc_angle_counts(fig_mom_inc, ax_mom_inc, momentum_angle_hist, ANGLES, particle, material_name, momentum, EVENTS, THICKNESS, refl_trans_string)
+                save_figure(plot_output, fig_mom_inc, f'plots/{DATA_FOLDER}/hist2d_momenta_vs_incident_angle_{particle}_{material_name}_{momentum}.png')
                 plt.close(fig_mom_inc)
 
+            # Bar chart of the decayed particles (summed over the incident angles)
+            if DECAY_PRODUCTS_PLOT:
+                fig_dec, ax_dec = plt.subplots(figsize=(8,5))
+                make_decay_products_plot(fig_dec, ax_dec, decay_table['codes'], decay_table['counts'][particle_index, material_index, momentum_index].sum(axis=0), particle, material_name, momentum, EVENTS, THICKNESS)
+                save_figure(plot_output, fig_dec, f'plots/{DATA_FOLDER}/decay_products_{particle}_{material_name}_{momentum}.png')
+                plt.close(fig_dec)
+
         # Make Scatter Plots (depending on selection at top of script)
         if THETAS_SCATTER_PLOT:
             print("making thetas scatter plot of mean")
             make_thetas_scatter_plot_mean(fig_mean, ax_mean, particle, material_name, refl_trans_string, THICKNESS, angles_range)
-            fig_mean.savefig(f"plots/{DATA_FOLDER}/scatter_plot_theta_mean_{particle}_{material_name}.png")
+            save_figure(plot_output, fig_mean, f"plots/{DATA_FOLDER}/scatter_plot_theta_mean_{particle}_{material_name}.png")
             plt.close(fig_mode)
             
             print("making thetas scatter plot of mode")
             make_thetas_scatter_plot_mode(fig_mode, ax_mode, particle, material_name, refl_trans_string, THICKNESS, angles_range)
-            fig_mode.savefig(f"plots/{DATA_FOLDER}/scatter_plot_theta_mode_{particle}_{material_name}.png")
+            save_figure(plot_output, fig_mode, f"plots/{DATA_FOLDER}/scatter_plot_theta_mode_{particle}_{material_name}.png")
             plt.close(fig_mode)
             
         if MOMENTUM_SCATTER_PLOT: pass
@@ -494,19 +381,19 @@ for particle in tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=Tru
         if THETA_HISTOGRAM_ARRAY:
             fig_theta_array.suptitle(f"{refl_trans_string} Theta Histograms - Theta versus Momentum - Particle: {particle}, Material: {material_name}\nN Events: {EVENTS}, Thickness: {THICKNESS}mm", fontsize=14, fontweight='bold')
             fig_theta_array.tight_layout(pad=2)
-            fig_theta_array.savefig(f"plots/{DATA_FOLDER}/histogram_theta_array_{particle}_{material_name}{transmit}.png")
+            save_figure(plot_output, fig_theta_array, f"plots/{DATA_FOLDER}/histogram_theta_array_{particle}_{material_name}{transmit}.png")
             plt.close(fig_theta_array)  # Close the histogram figure after saving
         
         if PHI_HISTOGRAM_ARRAY:
             fig_phi_array.suptitle(f"{refl_trans_string} Phi Histograms - Theta versus Momentum - Particle: {particle}, Material: {material_name}\nN Events: {EVENTS}, Thickness: {THICKNESS}mm", fontsize=14, fontweight='bold')
             fig_phi_array.tight_layout(pad=2)
-            fig_phi_array.savefig(f"plots/{DATA_FOLDER}/histogram_phi_array_{particle}_{material_name}{transmit}.png")
+            save_figure(plot_output, fig_phi_array, f"plots/{DATA_FOLDER}/histogram_phi_array_{particle}_{material_name}{transmit}.png")
             plt.close(fig_phi_array)  # Close the histogram figure after saving
             
         if MOMENTUM_HISTOGRAM_ARRAY:
             fig_momentum_array.suptitle(f"{refl_trans_string} Momentum Histograms - Theta versus Momentum - Particle: {particle}, Material: {material_name}\nN Events: {EVENTS}, Thickness: {THICKNESS}mm", fontsize=14, fontweight='bold')
             fig_momentum_array.tight_layout(pad=2)
-            fig_momentum_array.savefig(f"plots/{DATA_FOLDER}/histogram_momentum_array_{particle}_{material_name}{transmit}.png")
+            save_figure(plot_output, fig_momentum_array, f"plots/{DATA_FOLDER}/histogram_momentum_array_{particle}_{material_name}{transmit}.png")
             plt.close(fig_momentum_array)  # Close the histogram figure after saving
             
         if CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY:
@@ -515,7 +402,7 @@ for particle in tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=Tru
             cbar = fig_cor_array_t_m.colorbar(hist_t_m[3], cax=cbar_ax)
             cbar.set_label('Rate')
             fig_cor_array_t_m.tight_layout(pad=2, rect=[0,0,0.92,1])
-            fig_cor_array_t_m.savefig(f"plots/{DATA_FOLDER}/histogram_correlation_array_theta_momentum_{particle}_{material_name}{transmit}.png")
+            save_figure(plot_output, fig_cor_array_t_m, f"plots/{DATA_FOLDER}/histogram_correlation_array_theta_momentum_{particle}_{material_name}{transmit}.png")
             plt.close(fig_cor_array_t_m)  # Close the histogram figure after saving
             
         if CORRELATION_HISTOGRAM_THETA_PHI_ARRAY:
@@ -524,11 +411,21 @@ for particle in tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=Tru
             cbar = fig_cor_array_t_p.colorbar(hist_t_p[3], cax=cbar_ax)
             cbar.set_label('Rate')
             fig_cor_array_t_p.tight_layout(pad=2, rect=[0,0,0.92,1])
-            fig_cor_array_t_p.savefig(f"plots/{DATA_FOLDER}/histogram_correlation_array_theta_phi_{particle}_{material_name}{transmit}.png")
+            save_figure(plot_output, fig_cor_array_t_p, f"plots/{DATA_FOLDER}/histogram_correlation_array_theta_phi_{particle}_{material_name}{transmit}.png")
             plt.close(fig_cor_array_t_p)  # Close the histogram figure after saving
         
         
         if CUTOFF_THETA_SCATTER_PLOT:
             make_cutoff_angle_scatterplot(fig_cutoff, ax_cutoff, MOMENTA, cutoff_angles, CUT, material_name, particle, EVENTS, refl_trans_string, THICKNESS)
-            fig_cutoff.savefig(f"plots/{DATA_FOLDER}/scatter_plot_cutoff_theta_{particle}_{material_name}{transmit}")
-            plt.close(fig_cutoff)
\ No newline at end of file
+            save_figure(plot_output, fig_cutoff, f"plots/{DATA_FOLDER}/scatter_plot_cutoff_theta_{particle}_{material_name}{transmit}")
+            plt.close(fig_cutoff)
+
+
+# Save plot archive, summary, decay-product table and histogram store
+#=====================================================
+close_plot_output(plot_output)
+save_summary(f"plots/{DATA_FOLDER}/summary{transmit}.npz", summary, PARTICLES, MATERIALS, MOMENTA, ANGLES, THICKNESS, EVENTS, refl_trans_string)
+save_decay_table(f"plots/{DATA_FOLDER}/decay_products.npz", decay_table, PARTICLES, MATERIALS, MOMENTA, ANGLES)
+
+if HISTOGRAM_STORE:
+    save_histogram_store(histogram_store, f"plots/{DATA_FOLDER}/histogram_store{transmit}.npz")
@@ -0,0 +1,179 @@
+# File: analysis_binning.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import math
+
+
+# Functions for 'auto' binning and uniform-bin histograms
+# Info: same edges and counts as np.histogram(data, bins='auto'); the quartiles are found with np.partition
+#       (O(n), no sort), the counts with a single np.bincount, and NaN/inf entries are ignored
+#=====================================================
+def finite_data(data):
+    '''
+        Parameters:
+            data (float array):         data set
+
+        Returns:
+            data (float array):         data set without NaN/inf entries (the input itself if all entries are finite)
+    '''
+    data = np.asarray(data).ravel()
+    finite = np.isfinite(data)
+    return data if finite.all() else data[finite]
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def partition_quantiles(data, quantiles):
+    '''
+        Parameters:
+            data (float array):         data set (not empty)
+            quantiles (float array):    quantiles to compute (between 0 and 1)
+
+        Returns:
+            values (float array):       quantiles of data, with the linear interpolation of np.percentile
+
+        Info:
+            Only the order statistics around each quantile are placed with np.partition (O(n)),
+            the data is never sorted
+    '''
+    n = len(data)
+    positions = np.asarray(quantiles, dtype=np.float64)*(n - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, n - 1)
+    partitioned = np.partition(data, np.unique(np.concatenate([lower, upper])))
+    low_values = partitioned[lower].astype(np.float64)
+    high_values = partitioned[upper].astype(np.float64)
+    return low_values + (high_values - low_values)*(positions - lower)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def auto_width_rule(n, data_range, iqr):
+    '''
+        Parameters:
+            n (int):                    number of entries (> 0)
+            data_range (float):         max - min of the data
+            iqr (float):                interquartile range of the data
+
+        Returns:
+            width (float):              bin width of numpy's 'auto' estimator (0 if the data has no spread)
+
+        Info:
+            width = min(max(Freedman-Diaconis, sqrt/2), Sturges), as in np.histogram_bin_edges(bins='auto')
+                Freedman-Diaconis:  2*IQR*n^(-1/3)
+                sqrt:               range/sqrt(n)
+                Sturges:            range/(log2(n) + 1)
+    '''
+    fd_width = 2.0*iqr*n**(-1.0/3.0)
+    sqrt_width = data_range/math.sqrt(n)
+    sturges_width = data_range/(math.log2(n) + 1.0)
+    return min(max(fd_width, sqrt_width/2), sturges_width)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def auto_bin_width(data):
+    '''
+        Parameters:
+            data (float array):         data set (not empty, finite)
+
+        Returns:
+            width (float):              bin width of numpy's 'auto' estimator (see auto_width_rule)
+    '''
+    data_range = float(np.max(data)) - float(np.min(data))
+    q75, q25 = partition_quantiles(data, (0.75, 0.25))
+    return auto_width_rule(data.size, data_range, q75 - q25)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def auto_bin_edges(data, range=None):
+    '''
+        Parameters:
+            data (float array):         data set (NaN/inf entries are ignored)
+            range ((float, float)):     lower and upper edge of the histogram, None for the data range
+
+        Returns:
+            edges (float array):        uniform bin edges chosen by the 'auto' rule (as np.histogram_bin_edges(bins='auto'))
+    '''
+    data = finite_data(data)
+    if range is not None:
+        first_edge, last_edge = range
+        data = data[(data >= first_edge) & (data <= last_edge)]
+    elif data.size == 0:
+        first_edge, last_edge = 0, 1
+    else:
+        first_edge, last_edge = data.min(), data.max()
+    if first_edge == last_edge:
+        first_edge = first_edge - 0.5
+        last_edge = last_edge + 0.5
+
+    n_bins = 1
+    if data.size > 0:
+        width = auto_bin_width(data)
+        if width:
+            n_bins = int(np.ceil((float(last_edge) - float(first_edge))/width))
+
+    edges_dtype = np.result_type(first_edge, last_edge, data)
+    if np.issubdtype(edges_dtype, np.integer):
+        edges_dtype = np.result_type(edges_dtype, float)
+    return np.linspace(first_edge, last_edge, n_bins + 1, endpoint=True, dtype=edges_dtype)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def uniform_histogram(data, edges):
+    '''
+        Parameters:
+            data (float array):         data set (NaN/inf entries are ignored)
+            edges (float array):        uniform bin edges (e.g. from auto_bin_edges or np.linspace)
+
+        Returns:
+            counts (int array):         number of entries of each bin (last bin closed on the right, as np.histogram)
+
+        Info:
+            The bin index of every entry is computed directly from the uniform spacing (with the same edge
+            corrections as numpy), and the counts are made with a single np.bincount
+    '''
+    data = finite_data(data)
+    edges = np.asarray(edges)
+    n_bins = len(edges) - 1
+    first_edge, last_edge = float(edges[0]), float(edges[-1])
+    if data.size > 0 and (data.min() < first_edge or data.max() > last_edge):
+        data = data[(data >= edges[0]) & (data <= edges[-1])]
+
+    # Bin index from the uniform spacing (in units of bins)
+    positions = np.subtract(data, first_edge, dtype=np.float64)
+    positions *= n_bins/(last_edge - first_edge)
+    indices = positions.astype(np.intp)
+    np.clip(indices, 0, n_bins - 1, out=indices)
+
+    # Entries within rounding distance of an edge are checked against the edges themselves (as numpy does)
+    tolerance = 4*np.finfo(edges.dtype if np.issubdtype(edges.dtype, np.floating) else np.float64).eps*max(abs(first_edge), abs(last_edge))*n_bins/(last_edge - first_edge) + 1e-9
+    fractions = positions - indices
+    near = np.flatnonzero((fractions < tolerance) | (fractions > 1 - tolerance))
+    if near.size > 0:
+        near_data = data[near]
+        near_indices = indices[near]
+        near_indices[near_data < edges[near_indices]] -= 1
+        near_indices[(near_data >= edges[near_indices + 1]) & (near_indices != n_bins - 1)] += 1
+        indices[near] = near_indices
+
+    return np.bincount(indices, minlength=n_bins)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def auto_histogram(data, range=None):
+    '''
+        Parameters:
+            data (float array):         data set (NaN/inf entries are ignored)
+            range ((float, float)):     lower and upper edge of the histogram, None for the data range
+
+        Returns:
+            counts (int array):         number of entries of each bin
+            edges (float array):        bin edges
+
+        Info:
+            Drop-in replacement of np.histogram(data, bins='auto', range=range)
+    '''
+    edges = auto_bin_edges(data, range)
+    return uniform_histogram(data, edges), edges
@@ -0,0 +1,515 @@
+# File: analysis_capillary.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tqdm import tqdm
+import uproot
+
+from analysis_binning import *
+from analysis_plotters import *
+from analysis_phase_space import *
+from analysis_prefilled import *
+from analysis_io import STEP_SIZE
+
+
+# Constants
+#=====================================================
+CAPILLARY_FOLDER = 'capillary'                  # outputs go to plots/capillary/<name>/
+INPUT_COLUMNS = ('fEvent', 'fX_in', 'fY_in', 'fPx_in', 'fPy_in', 'fPz_in', 'fTheta_in', 'fP_in') # columns read from InputEvents (one row per event)
+OUTPUT_COLUMNS = ('fEvent', 'fX_out', 'fY_out', 'fPx_out', 'fPy_out', 'fPz_out', 'fTheta_out', 'fP_out') # columns read from OutputEvents (events reaching the exit)
+FLAG_COLUMNS = ('fEvent', 'fIsDecayed', 'fIsTransmitted')                   # columns read from AllEvents
+COUNT_NAMES = ('events', 'transmitted', 'decayed', 'lost')                  # tallies of a capillary data file
+PHASE_SPACE_STAGES = ('in', 'in_transmitted', 'out')      # phase spaces of all the events at the input, and of the transmitted events at the input and output
+MAP_VARIABLES = {'position_in': ('position', 'position'), 'position_out': ('position', 'position'), 'theta_map': ('theta', 'theta'),
+                 'momentum_map': ('momentum', 'momentum')}      # binning variables of the axes of each 2d map
+CAPILLARY_BINNING = {'position': (101, -50, 50), 'momentum': (201, 20, 50), 'theta': (91, 150, 180)}    # (bins, low, high) of the maps, as the H2s of RunAction.cc (mm, MeV/c, deg)
+
+
+# Capillary transmission analysis (outputs of the Project_v2 tapered capillary simulation)
+# Info: every event of a capillary data file has a row in InputEvents and AllEvents; OutputEvents only has the events whose
+#       primary reached the exit of the capillary. An event is transmitted if it reached the exit, decayed if fIsDecayed,
+#       and lost (stopped or left through the capillary wall) otherwise; note that the fIsTransmitted flag of AllEvents
+#       is set when the output momentum is zero, i.e. for events that did NOT reach the exit. The three ntuples are read
+#       in chunks of STEP_SIZE entries. The 2d maps are taken from the H2 histograms the simulation filled while it ran
+#       (see analysis_prefilled.py) when they have the binning of the result, and only re-binned from the ntuples
+#       otherwise; InputEvents fills the input histograms and a lookup table of the input angle and
+#       momentum by fEvent, and OutputEvents is joined to it through that table to fill the input vs output maps.
+#       Results of different files (or shards of one configuration) are merged by adding their counts and maps. The
+#       same chunks fill the phase-space accumulators (see analysis_phase_space.py) of the beam at the input and of the
+#       transmitted particles at the input and output, from which the emittance, Twiss parameters and spot sizes of
+#       every data file are computed; merged accumulators are weighted by the number of particles of each file, so the
+#       output spot sizes of a sweep are weighted by the transmission of its configurations.
+#
+#       As the distributed plate analysis, each data file is a task on a local process pool, and its result is saved to
+#       plots/capillary/<name>/partials/ with the size and modification time of the data file, so that running the same
+#       sweep again only reads the new or changed data files.
+#
+#       Usage:
+#           python3 analysis_capillary.py <name> <data file or directory> [<data file or directory> ...] [--workers N] [--particle mu-]
+#=====================================================
+def capillary_edges(binning=CAPILLARY_BINNING):
+    '''
+        Parameters:
+            binning (dict):             (bins, low, high) of 'position', 'momentum' and 'theta'
+
+        Returns:
+            edges (dict):               bin edges of each variable
+    '''
+    return {name: np.linspace(low, high, bins + 1) for name, (bins, low, high) in binning.items()}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_capillary_result(binning=CAPILLARY_BINNING):
+    '''
+        Parameters:
+            binning (dict):             (bins, low, high) of 'position', 'momentum' and 'theta'
+
+        Returns:
+            result (dict):              empty result: 'counts' (see COUNT_NAMES), 1d histograms of all the events at the
+                                        input ('theta_in', 'momentum_in'), of the transmitted events at the input
+                                        ('theta_in_transmitted', 'momentum_in_transmitted') and at the output
+                                        ('theta_out', 'momentum_out'), 2d maps 'position_in', 'position_out',
+                                        'theta_map' (theta_in x theta_out) and 'momentum_map' (p_in x p_out), the
+                                        'phase_space' accumulators of each of PHASE_SPACE_STAGES, and 'edges'
+    '''
+    edges = capillary_edges(binning)
+    n_position, n_momentum, n_theta = len(edges['position']) - 1, len(edges['momentum']) - 1, len(edges['theta']) - 1
+    return {
+        'counts': np.zeros(len(COUNT_NAMES), dtype=np.int64),
+        'theta_in': np.zeros(n_theta, dtype=np.int64),
+        'momentum_in': np.zeros(n_momentum, dtype=np.int64),
+        'theta_in_transmitted': np.zeros(n_theta, dtype=np.int64),
+        'momentum_in_transmitted': np.zeros(n_momentum, dtype=np.int64),
+        'theta_out': np.zeros(n_theta, dtype=np.int64),
+        'momentum_out': np.zeros(n_momentum, dtype=np.int64),
+        'position_in': np.zeros((n_position, n_position), dtype=np.int64),
+        'position_out': np.zeros((n_position, n_position), dtype=np.int64),
+        'theta_map': np.zeros((n_theta, n_theta), dtype=np.int64),
+        'momentum_map': np.zeros((n_momentum, n_momentum), dtype=np.int64),
+        'phase_space': {stage: make_phase_space() for stage in PHASE_SPACE_STAGES},
+        'edges': edges,
+    }
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _histogram2d(x, y, x_edges, y_edges):
+    '''
+        Parameters:
+            x (float array):            first coordinate of the entries
+            y (float array):            second coordinate of the entries
+            x_edges (float array):      bin edges along x
+            y_edges (float array):      bin edges along y
+
+        Returns:
+            counts (int 2d array):      (x bins x y bins) number of entries (entries outside the edges are ignored)
+    '''
+    return np.histogram2d(x, y, bins=[x_edges, y_edges])[0].astype(np.int64)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def map_edges(edges, name):
+    '''
+        Parameters:
+            edges (dict):               bin edges of each variable (see capillary_edges)
+            name (string):              2d map (key of MAP_VARIABLES)
+
+        Returns:
+            edges (tuple):              bin edges along each axis of the map
+    '''
+    return tuple(edges[variable] for variable in MAP_VARIABLES[name])
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def fill_capillary_result(result, path, step_size=STEP_SIZE, prefilled=True):
+    '''
+        Parameters:
+            result (dict):              result to add the events of the data file to (see make_capillary_result)
+            path (string):              path of a capillary data file
+            step_size (int):            number of entries read per chunk
+            prefilled (bool):           take the 2d maps from the H2 histograms of the file when their binning matches
+
+        Returns:
+            result (dict):              the updated result
+
+        Info:
+            Raises ValueError if the ntuples of the file do not match (an output event without its input event, or a
+            different number of events in InputEvents and AllEvents)
+    '''
+    edges = result['edges']
+    rebinned = set(MAP_VARIABLES)
+    if prefilled:
+        for name, histogram in read_prefilled_histograms(path).items():
+            if same_edges(histogram['edges'], map_edges(edges, name)):
+                result[name] += np.rint(histogram['counts']).astype(np.int64)
+                rebinned.discard(name)
+
+    with uproot.open(path) as file:
+        all_events, input_events, output_events = file["AllEvents"], file["InputEvents"], file["OutputEvents"]
+        if all_events.num_entries != input_events.num_entries:
+            raise ValueError(f"{path}: {input_events.num_entries} input events but {all_events.num_entries} events in AllEvents")
+
+        # Fractions (AllEvents)
+        counts = np.zeros(len(COUNT_NAMES), dtype=np.int64)
+        for chunk in all_events.iterate(list(FLAG_COLUMNS), step_size=step_size, library="np"):
+            decayed = chunk["fIsDecayed"] != 0
+            stopped = chunk["fIsTransmitted"] != 0
+            counts += [len(decayed), np.count_nonzero(~decayed & ~stopped), np.count_nonzero(decayed), np.count_nonzero(~decayed & stopped)]
+
+        # Events reaching the exit, by fEvent
+        reached = np.zeros(input_events.num_entries, dtype=bool)
+        for chunk in output_events.iterate(["fEvent"], step_size=step_size, library="np"):
+            event = chunk["fEvent"][chunk["fEvent"] < len(reached)]
+            reached[event] = True
+
+        # Input histograms and phase spaces, and the input angle and momentum of each event by fEvent
+        theta_in = np.full(input_events.num_entries, np.nan)
+        momentum_in = np.full(input_events.num_entries, np.nan)
+        for chunk in input_events.iterate(list(INPUT_COLUMNS), step_size=step_size, library="np"):
+            event = chunk["fEvent"]
+            if event.size > 0 and event.max() >= len(theta_in):
+                grown = int(event.max()) + 1
+                theta_in = np.concatenate([theta_in, np.full(grown - len(theta_in), np.nan)])
+                momentum_in = np.concatenate([momentum_in, np.full(grown - len(momentum_in), np.nan)])
+            theta_in[event] = chunk["fTheta_in"]
+            momentum_in[event] = chunk["fP_in"]
+            result['theta_in'] += uniform_histogram(chunk["fTheta_in"], edges['theta'])
+            result['momentum_in'] += uniform_histogram(chunk["fP_in"], edges['momentum'])
+            if 'position_in' in rebinned:
+                result['position_in'] += _histogram2d(chunk["fX_in"], chunk["fY_in"], edges['position'], edges['position'])
+            update_phase_space(result['phase_space']['in'], chunk["fX_in"], chunk["fY_in"], chunk["fPx_in"], chunk["fPy_in"], chunk["fPz_in"])
+            transmitted = np.zeros(len(event), dtype=bool)
+            known = event < len(reached)
+            transmitted[known] = reached[event[known]]
+            update_phase_space(result['phase_space']['in_transmitted'], *(chunk[column][transmitted] for column in ("fX_in", "fY_in", "fPx_in", "fPy_in", "fPz_in")))
+
+        # Output histograms and input vs output maps (OutputEvents joined to InputEvents by fEvent)
+        for chunk in output_events.iterate(list(OUTPUT_COLUMNS), step_size=step_size, library="np"):
+            event = chunk["fEvent"]
+            matched = event < len(theta_in)
+            matched[matched] = ~np.isnan(theta_in[event[matched]])
+            if not matched.all():
+                raise ValueError(f"{path}: {np.count_nonzero(~matched)} output events have no input event")
+            result['theta_in_transmitted'] += uniform_histogram(theta_in[event], edges['theta'])
+            result['momentum_in_transmitted'] += uniform_histogram(momentum_in[event], edges['momentum'])
+            result['theta_out'] += uniform_histogram(chunk["fTheta_out"], edges['theta'])
+            result['momentum_out'] += uniform_histogram(chunk["fP_out"], edges['momentum'])
+            if 'position_out' in rebinned:
+                result['position_out'] += _histogram2d(chunk["fX_out"], chunk["fY_out"], edges['position'], edges['position'])
+            update_phase_space(result['phase_space']['out'], chunk["fX_out"], chunk["fY_out"], chunk["fPx_out"], chunk["fPy_out"], chunk["fPz_out"])
+            if 'theta_map' in rebinned:
+                result['theta_map'] += _histogram2d(theta_in[event], chunk["fTheta_out"], edges['theta'], edges['theta'])
+            if 'momentum_map' in rebinned:
+                result['momentum_map'] += _histogram2d(momentum_in[event], chunk["fP_out"], edges['momentum'], edges['momentum'])
+
+    result['counts'] += counts
+    return result
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_capillary_results(result, other):
+    '''
+        Parameters:
+            result (dict):              result (updated in place)
+            other (dict):               result with the same binning (e.g. of another file or shard)
+
+        Returns:
+            result (dict):              the merged result
+    '''
+    for name, edges in result['edges'].items():
+        if not np.array_equal(edges, other['edges'][name]):
+            raise ValueError(f"Capillary results have different {name} binnings")
+    for key in result:
+        if key == 'phase_space':
+            for stage in PHASE_SPACE_STAGES:
+                merge_phase_space(result[key][stage], other[key][stage])
+        elif key != 'edges':
+            result[key] += other[key]
+    return result
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def capillary_fractions(result):
+    '''
+        Parameters:
+            result (dict):              capillary result
+
+        Returns:
+            fractions (dict):           ('fraction', 'error') of 'transmitted', 'decayed' and 'lost' events (binomial
+                                        errors; NaN if the result has no events)
+    '''
+    events = result['counts'][0]
+    fractions = {}
+    for name, count in zip(COUNT_NAMES[1:], result['counts'][1:]):
+        fraction = count/events if events > 0 else np.nan
+        fractions[name] = (fraction, np.sqrt(fraction*(1 - fraction)/events) if events > 0 else np.nan)
+    return fractions
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def transmission_curve(result, variable):
+    '''
+        Parameters:
+            result (dict):              capillary result
+            variable (string):          'theta' or 'momentum' (input variable)
+
+        Returns:
+            edges (float array):        bin edges of the input variable
+            transmission (float array): fraction of the events of each input bin that reach the exit (NaN if the bin is empty)
+            error (float array):        binomial error of the transmission
+    '''
+    total = result[f'{variable}_in'].astype(float)
+    transmitted = result[f'{variable}_in_transmitted'].astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        transmission = np.where(total > 0, transmitted/total, np.nan)
+        error = np.where(total > 0, np.sqrt(transmission*(1 - transmission)/total), np.nan)
+    return result['edges'][variable], transmission, error
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_capillary_result(result, path, source=None):
+    '''
+        Parameters:
+            result (dict):              capillary result
+            path (string):              path of the output .npz file
+            source (tuple):             (size, modification time in ns) of the data file the result was made from
+
+        Returns:
+
+        Info:
+            The result is written to a temporary file first, so an interrupted run leaves no result behind
+    '''
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary_path = path[:-len('.npz')] + '.tmp.npz'
+    np.savez_compressed(temporary_path, source=np.asarray(source if source is not None else (-1, -1), dtype=np.int64),
+                        **{key: value for key, value in result.items() if key not in ('edges', 'phase_space')},
+                        **{f'phase_space_{stage}_{field}': value for stage in PHASE_SPACE_STAGES for field, value in result['phase_space'][stage].items()},
+                        **{'edges_' + name: edges for name, edges in result['edges'].items()})
+    os.replace(temporary_path, path)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_capillary_result(path):
+    '''
+        Parameters:
+            path (string):              path of a result written by save_capillary_result
+
+        Returns:
+            result (dict):              capillary result (see make_capillary_result)
+            source (tuple):             (size, modification time in ns) of its data file ((-1, -1) if not recorded)
+    '''
+    with np.load(path) as archive:
+        result = {key: archive[key] for key in archive.files if key != 'source' and not key.startswith(('edges_', 'phase_space_'))}
+        if all(f'phase_space_{stage}_count' in archive.files for stage in PHASE_SPACE_STAGES):
+            result['phase_space'] = {stage: {field: archive[f'phase_space_{stage}_{field}'] for field in make_phase_space()} for stage in PHASE_SPACE_STAGES}
+        result['edges'] = {key[len('edges_'):]: archive[key] for key in archive.files if key.startswith('edges_')}
+        source = tuple(int(value) for value in archive['source'])
+    return result, source
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def cached_capillary_result(path, cache_dir, binning=CAPILLARY_BINNING):
+    '''
+        Parameters:
+            path (string):              path of a capillary data file
+            cache_dir (string):         directory of the saved results
+            binning (dict):             binning of the result
+
+        Returns:
+            result (dict):              result of the data file (read from the cache if the data file is unchanged)
+            cached (bool):              whether the result came from the cache
+    '''
+    stat = os.stat(path)
+    source = (stat.st_size, stat.st_mtime_ns)
+    cache_path = os.path.join(cache_dir, os.path.basename(path)[:-len('.root')] + '.npz')
+    if os.path.exists(cache_path):
+        result, cached_source = load_capillary_result(cache_path)
+        reference = capillary_edges(binning)
+        if cached_source == source and set(result) == set(make_capillary_result(binning)) and all(np.array_equal(result['edges'][name], reference[name]) for name in reference):
+            return result, True
+    result = fill_capillary_result(make_capillary_result(binning), path)
+    save_capillary_result(result, cache_path, source)
+    return result, False
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_capillary_maps(paths, names=None, binning=CAPILLARY_BINNING, step_size=STEP_SIZE):
+    '''
+        Parameters:
+            paths (string list):        capillary data files (e.g. the shards of a configuration, or several configurations)
+            names (string list):        2d maps to load (keys of MAP_VARIABLES, default: all)
+            binning (dict):             (bins, low, high) of the variables (default: the binning of the simulation)
+            step_size (int):            number of entries read per chunk when re-binning
+
+        Returns:
+            maps (dict):                sum over the files of each map (see read_histogram)
+
+        Info:
+            The prefilled histograms of a file are used when they have the requested binning; the maps that are missing from a file or have another binning are re-binned from its ntuples
+    '''
+    names = list(MAP_VARIABLES) if names is None else names
+    requested = capillary_edges(binning)
+    maps = {}
+    for path in paths:
+        histograms = {name: histogram for name, histogram in read_prefilled_histograms(path, names).items() if same_edges(histogram['edges'], map_edges(requested, name))}
+        missing = [name for name in names if name not in histograms]
+        if missing:
+            rebinned = fill_capillary_result(make_capillary_result(binning), path, step_size, prefilled=False)
+            histograms.update({name: {'counts': rebinned[name].astype(np.float64), 'edges': map_edges(rebinned['edges'], name)} for name in missing})
+        for name in names:
+            maps[name] = sum_histograms([maps[name], histograms[name]]) if name in maps else histograms[name]
+    return maps
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def capillary_data_files(paths):
+    '''
+        Parameters:
+            paths (string list):        data files and directories of data files
+
+        Returns:
+            files (string list):        sorted .root files (directories are searched, not recursively)
+    '''
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.root'))
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            raise FileNotFoundError(f"No data file or directory {path}")
+    return sorted(files)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def analyse_capillary_files(paths, cache_dir, n_workers=None, binning=CAPILLARY_BINNING):
+    '''
+        Parameters:
+            paths (string list):        capillary data files
+            cache_dir (string):         directory of the saved results of the data files
+            n_workers (int):            number of worker processes (default: number of CPUs)
+            binning (dict):             binning of the results
+
+        Returns:
+            results (dict):             result of each data file that could be read, keyed by path
+            merged (dict):              sum of the results
+            failed (dict):              error message of each data file that could not be read, keyed by path
+    '''
+    results, failed = {}, {}
+    n_workers = n_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {executor.submit(cached_capillary_result, path, cache_dir, binning): path for path in paths}
+        for future in tqdm(as_completed(futures), total=len(futures), leave=False, desc='CAPILLARY FILES', dynamic_ncols=True):
+            try:
+                results[futures[future]] = future.result()[0]
+            except Exception as error:
+                failed[futures[future]] = str(error)
+
+    merged = make_capillary_result(binning)
+    for path in sorted(results):
+        merge_capillary_results(merged, results[path])
+    return results, merged, failed
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def plot_capillary_maps(result, plot_dir, label):
+    '''
+        Parameters:
+            result (dict):              capillary result
+            plot_dir (string):          directory of the figures
+            label (string):             label of the figures (e.g. the name of the sweep)
+
+        Returns:
+    '''
+    edges = result['edges']
+    figures = (('position_in', 'position', 'position', r'$x_{in}$ [mm]', r'$y_{in}$ [mm]', 'Beam position at the capillary input'),
+               ('position_out', 'position', 'position', r'$x_{out}$ [mm]', r'$y_{out}$ [mm]', 'Beam position at the capillary output'),
+               ('theta_map', 'theta', 'theta', r'$\theta_{in}$ [deg]', r'$\theta_{out}$ [deg]', r'$\theta_{out}$ vs $\theta_{in}$ of the transmitted particles'),
+               ('momentum_map', 'momentum', 'momentum', r'$P_{in}$ [MeV/c]', r'$P_{out}$ [MeV/c]', r'$P_{out}$ vs $P_{in}$ of the transmitted particles'))
+    for key, x_name, y_name, x_label, y_label, title in figures:
+        fig, ax = plt.subplots()
+        _, _, _, mesh = pcolormesh_histogram2d(ax, result[key], edges[x_name], edges[y_name], density=False, cmap='viridis')
+        fig.colorbar(mesh, ax=ax, label='Events')
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.set_title(f"{title} ({label})")
+        fig.savefig(f"{plot_dir}/{key}.png")
+        plt.close(fig)
+
+    fig, (ax_theta, ax_momentum) = plt.subplots(1, 2, figsize=(12, 5))
+    for ax, variable, x_label in ((ax_theta, 'theta', r'$\theta_{in}$ [deg]'), (ax_momentum, 'momentum', r'$P_{in}$ [MeV/c]')):
+        variable_edges, transmission, error = transmission_curve(result, variable)
+        centers = 0.5*(variable_edges[1:] + variable_edges[:-1])
+        ax.errorbar(centers, transmission, yerr=error, fmt='.', markersize=3)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel('Transmission')
+        ax.set_ylim(0, 1.05)
+    fig.suptitle(f"Capillary transmission ({label})")
+    fig.savefig(f"{plot_dir}/transmission.png")
+    plt.close(fig)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def run_capillary_analysis(name, paths, n_workers=None, particle=None):
+    '''
+        Parameters:
+            name (string):              name of the sweep (outputs in plots/capillary/<name>/)
+            paths (string list):        data files and directories of data files
+            n_workers (int):            number of worker processes (default: number of CPUs)
+            particle (string):          beam particle (key of PARTICLE_MASSES, for the normalized emittances; None: not computed)
+
+        Returns:
+            merged (dict):              sum of the results of the data files
+
+        Info:
+            Saves the merged result (capillary.npz), the counts and beam parameters (see beam_parameters) of every data
+            file (capillary_files.npz) and the figures, and prints the fractions, emittances and spot sizes of every data file
+    '''
+    plot_dir = f"plots/{CAPILLARY_FOLDER}/{name}"
+    os.makedirs(plot_dir, exist_ok=True)
+    files = capillary_data_files(paths)
+    results, merged, failed = analyse_capillary_files(files, f"{plot_dir}/partials", n_workers)
+
+    if particle is not None and particle not in PARTICLE_MASSES:
+        raise ValueError(f"No mass for particle {particle} (known: {', '.join(PARTICLE_MASSES)})")
+    mass = PARTICLE_MASSES.get(particle)
+
+    save_capillary_result(merged, f"{plot_dir}/capillary.npz")
+    read_files = sorted(results)
+    beams = {stage: [beam_parameters(results[path]['phase_space'][stage], mass) for path in read_files] for stage in PHASE_SPACE_STAGES}
+    np.savez_compressed(f"{plot_dir}/capillary_files.npz", files=np.asarray([os.path.basename(path) for path in read_files], dtype=str),
+                        counts=np.asarray([results[path]['counts'] for path in read_files], dtype=np.int64).reshape(-1, len(COUNT_NAMES)),
+                        count_names=np.asarray(COUNT_NAMES, dtype=str), beam_parameter_names=np.asarray(BEAM_PARAMETER_NAMES, dtype=str),
+                        **{f'beam_{stage}': np.asarray([[beam[name] for name in BEAM_PARAMETER_NAMES] for beam in beams[stage]], dtype=float).reshape(-1, len(BEAM_PARAMETER_NAMES))
+                           for stage in PHASE_SPACE_STAGES})
+    plot_capillary_maps(merged, plot_dir, name)
+
+    for path in read_files + [None]:
+        fractions = capillary_fractions(results[path] if path is not None else merged)
+        print(f"{os.path.basename(path) if path is not None else 'TOTAL':<50}" + "".join(f"  {key} {fraction:.4f} +- {error:.4f}" for key, (fraction, error) in fractions.items()))
+        for stage in ('in', 'out'):
+            beam = beam_parameters((results[path] if path is not None else merged)['phase_space'][stage], mass)
+            print(f"{'':<50}  {stage:<3} emittance x/y {beam['emittance_x']:.4g}/{beam['emittance_y']:.4g} mm mrad, spot size x/y {beam['sigma_x']:.4g}/{beam['sigma_y']:.4g} mm")
+    for path, error in failed.items():
+        print(f" ********** SKIPPED ********** {path}: {error}")
+    return merged
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Transmission, decay and loss fractions and input vs output maps of capillary data files")
+    parser.add_argument('name', help=f"name of the sweep (outputs in plots/{CAPILLARY_FOLDER}/<name>/)")
+    parser.add_argument('paths', nargs='+', help="capillary data files or directories of data files")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--particle', default=None, help="beam particle, for the normalized emittances (e.g. mu-)")
+    arguments = parser.parse_args()
+    run_capillary_analysis(arguments.name, arguments.paths, arguments.workers, arguments.particle)
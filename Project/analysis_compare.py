@@ -0,0 +1,247 @@
+# File: analysis_compare.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import os
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from scipy import stats, special
+
+from analysis_helpers import *
+from analysis_store import *
+
+
+# Constants
+#=====================================================
+COMPARED_VARIABLES = ('theta', 'phi', 'momentum')     # 1D histograms of the store that are compared
+RANKING_METRICS = ('ks', 'chi2_reduced', 'wasserstein')    # metrics the table can be ranked by
+TOP_ROWS = 20                                   # number of rows of the ranked table that are printed
+COMPARISON_DTYPE = np.dtype([('dataset_a', 'U64'), ('dataset_b', 'U64'), ('particle', 'U16'), ('material_a', np.int64), ('material_b', np.int64),
+                             ('momentum', np.float64), ('angle', np.float64), ('variable', 'U16'), ('n_a', np.int64), ('n_b', np.int64),
+                             ('ks', np.float64), ('ks_p_value', np.float64), ('chi2_reduced', np.float64), ('chi2_p_value', np.float64),
+                             ('wasserstein', np.float64)])
+
+
+# Two-sample comparison of datasets
+# Info: a dataset is a histogram store (see analysis_store.py), or the slice of one material of a store, written as
+#       <histogram_store.npz>[@<material>] (e.g. plots/general/histogram_store.npz@1 for Glass). The stores are loaded
+#       in parallel, and the theta, phi and momentum histograms of the configurations (particle, momentum, incident
+#       angle, and material unless a dataset is a single material) found in both datasets of every pair are compared,
+#       all configurations of a pair at once on the stacked histograms:
+#           ks:             Kolmogorov-Smirnov distance max|CDF_a - CDF_b| of the binned CDFs, with its asymptotic
+#                           p-value for the effective size n_a*n_b/(n_a + n_b)
+#           chi2_reduced:   two-sample chi^2 of the unweighted histograms (as ROOT's TH1::Chi2Test "UU")
+#                           sum (sqrt(n_b/n_a)*a_i - sqrt(n_a/n_b)*b_i)^2/(a_i + b_i) over the bins with entries,
+#                           divided by its dof = number of bins with entries - 1, with its p-value
+#           wasserstein:    earth mover's distance sum|CDF_a - CDF_b|*bin width (in deg, or MeV/c for the momentum)
+#       The rows of all the pairs are ranked by the chosen metric, largest difference first, and saved to a .npz file.
+#       The binned statistics are resolution-limited: KS and Wasserstein are exact for the binned distributions only.
+#
+#       Usage:
+#           python3 analysis_compare.py <dataset> <dataset> [<dataset> ...] [--rank ks] [--top 20] [--output comparison.npz]
+#=====================================================
+def parse_dataset(specification):
+    '''
+        Parameters:
+            specification (string):     <histogram_store.npz>[@<material>]
+
+        Returns:
+            dataset (dict):             'label', 'path' and 'material' (None: all the materials of the store)
+    '''
+    path, _, material = specification.rpartition('@') if '@' in os.path.basename(specification) else (specification, '', '')
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No histogram store {path}")
+    return {'label': specification, 'path': path, 'material': int(material) if material else None}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_datasets(specifications, n_workers=None):
+    '''
+        Parameters:
+            specifications (string list): datasets (see parse_dataset)
+            n_workers (int):            number of stores loaded at the same time (default: one per store)
+
+        Returns:
+            datasets (list):            datasets with their 'store' (each store file is loaded once)
+    '''
+    datasets = [parse_dataset(specification) for specification in specifications]
+    paths = sorted({dataset['path'] for dataset in datasets})
+    with ThreadPoolExecutor(max_workers=n_workers or len(paths)) as executor:
+        stores = dict(zip(paths, executor.map(load_histogram_store, paths)))
+    for dataset in datasets:
+        dataset['store'] = stores[dataset['path']]
+        if dataset['material'] is not None and dataset['material'] not in dataset['store']['materials']:
+            raise ValueError(f"{dataset['label']}: material {dataset['material']} is not in the store")
+    return datasets
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def matching_configurations(dataset_a, dataset_b):
+    '''
+        Parameters:
+            dataset_a (dict):           dataset (see load_datasets)
+            dataset_b (dict):           dataset
+
+        Returns:
+            matches (list):             (configuration of a, configuration of b) pairs of (particle, material, momentum,
+                                        angle) indices, of the configurations filled in both datasets (a dataset without
+                                        a material is matched on the material of the other one, or on every material)
+    '''
+    store_a, store_b = dataset_a['store'], dataset_b['store']
+    if dataset_a['material'] is None and dataset_b['material'] is None:
+        materials = [(material, material) for material in store_a['materials']]
+    else:
+        material_a = dataset_a['material'] if dataset_a['material'] is not None else dataset_b['material']
+        material_b = dataset_b['material'] if dataset_b['material'] is not None else dataset_a['material']
+        materials = [(material_a, material_b)]
+
+    matches = []
+    for particle in store_a['particles']:
+        for material_a, material_b in materials:
+            for momentum in store_a['momenta']:
+                for angle in store_a['angles']:
+                    try:
+                        index_a = store_index(store_a, particle, material_a, momentum, angle)
+                        index_b = store_index(store_b, particle, material_b, momentum, angle)
+                    except KeyError:
+                        continue
+                    if store_a['filled'][index_a] and store_b['filled'][index_b]:
+                        matches.append((index_a, index_b))
+    return matches
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def compare_histograms(counts_a, counts_b, widths):
+    '''
+        Parameters:
+            counts_a (float 2d array):  (N, bins) histograms of the first sample
+            counts_b (float 2d array):  (N, bins) histograms of the second sample, with the same bins
+            widths (float 2d array):    (N, bins) or (bins,) bin widths (for the Wasserstein distance)
+
+        Returns:
+            metrics (dict):             'n_a', 'n_b' and the 'ks', 'ks_p_value', 'chi2_reduced', 'chi2_p_value' and
+                                        'wasserstein' arrays (N,) (NaN where a histogram is empty)
+    '''
+    counts_a = np.asarray(counts_a, dtype=np.float64)
+    counts_b = np.asarray(counts_b, dtype=np.float64)
+    n_a = counts_a.sum(axis=1)
+    n_b = counts_b.sum(axis=1)
+    empty = (n_a == 0) | (n_b == 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        difference = np.cumsum(counts_a, axis=1)/n_a[:, None] - np.cumsum(counts_b, axis=1)/n_b[:, None]
+        ks = np.abs(difference).max(axis=1)
+        ks_p_value = special.kolmogorov(np.sqrt(n_a*n_b/(n_a + n_b))*ks)
+        wasserstein = np.sum(np.abs(difference)*widths, axis=1)
+
+        both = counts_a + counts_b
+        terms = np.square(np.sqrt(n_b/n_a)[:, None]*counts_a - np.sqrt(n_a/n_b)[:, None]*counts_b)/both
+        chi2 = np.sum(np.where(both > 0, terms, 0.0), axis=1)
+        dof = np.count_nonzero(both > 0, axis=1) - 1
+        chi2_reduced = np.where(dof > 0, chi2/dof, np.nan)
+        chi2_p_value = np.where(dof > 0, stats.chi2.sf(chi2, np.maximum(dof, 1)), np.nan)
+
+    metrics = {'n_a': n_a.astype(np.int64), 'n_b': n_b.astype(np.int64), 'ks': ks, 'ks_p_value': ks_p_value, 'chi2_reduced': chi2_reduced,
+               'chi2_p_value': chi2_p_value, 'wasserstein': wasserstein}
+    for name in RANKING_METRICS + ('ks_p_value', 'chi2_p_value'):
+        metrics[name] = np.where(empty, np.nan, metrics[name])
+    return metrics
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def compare_datasets(dataset_a, dataset_b, variables=COMPARED_VARIABLES):
+    '''
+        Parameters:
+            dataset_a (dict):           dataset (see load_datasets)
+            dataset_b (dict):           dataset
+            variables (string list):    histograms to compare (see COMPARED_VARIABLES)
+
+        Returns:
+            rows (structured array):    one COMPARISON_DTYPE row per matching configuration and variable
+
+        Info:
+            Raises ValueError if the two stores have different bin edges for a compared variable
+    '''
+    store_a, store_b = dataset_a['store'], dataset_b['store']
+    matches = matching_configurations(dataset_a, dataset_b)
+    rows = np.zeros(len(matches)*len(variables), dtype=COMPARISON_DTYPE)
+    if not matches:
+        return rows
+    indices_a = tuple(np.array([match[0] for match in matches]).T)
+    indices_b = tuple(np.array([match[1] for match in matches]).T)
+    momenta = store_a['momenta'][indices_a[2]]
+
+    for v, variable in enumerate(variables):
+        edges = store_a[f'{variable}_edges']
+        if not np.array_equal(edges, store_b[f'{variable}_edges']):
+            raise ValueError(f"{dataset_a['label']} and {dataset_b['label']} have different {variable} binnings")
+        widths = np.diff(edges)[None, :]*(momenta[:, None] if variable == 'momentum' else 1.0)
+        metrics = compare_histograms(store_a[variable][indices_a], store_b[variable][indices_b], widths)
+        block = rows[v*len(matches):(v + 1)*len(matches)]
+        block['variable'] = variable
+        block['particle'] = store_a['particles'][indices_a[0]]
+        block['material_a'] = store_a['materials'][indices_a[1]]
+        block['material_b'] = store_b['materials'][indices_b[1]]
+        block['momentum'] = momenta
+        block['angle'] = store_a['angles'][indices_a[3]]
+        for name, values in metrics.items():
+            block[name] = values
+    rows['dataset_a'] = dataset_a['label']
+    rows['dataset_b'] = dataset_b['label']
+    return rows
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def ranked_comparison(datasets, variables=COMPARED_VARIABLES, rank='ks'):
+    '''
+        Parameters:
+            datasets (list):            two or more datasets (see load_datasets)
+            variables (string list):    histograms to compare (see COMPARED_VARIABLES)
+            rank (string):              metric the rows are ranked by (see RANKING_METRICS)
+
+        Returns:
+            table (structured array):   COMPARISON_DTYPE rows of every pair of datasets, largest difference first
+                                        (rows with an empty histogram last)
+    '''
+    if rank not in RANKING_METRICS:
+        raise ValueError(f"Unknown ranking metric {rank} (known: {', '.join(RANKING_METRICS)})")
+    if len(datasets) < 2:
+        raise ValueError("At least two datasets are needed")
+    table = np.concatenate([compare_datasets(a, b, variables) for a, b in itertools.combinations(datasets, 2)])
+    order = np.argsort(np.where(np.isnan(table[rank]), -np.inf, -table[rank]), kind='stable')
+    return table[order]
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def print_comparison(table, top=TOP_ROWS):
+    '''
+        Parameters:
+            table (structured array):   ranked comparison (see ranked_comparison)
+            top (int):                  number of rows to print
+
+        Returns:
+    '''
+    print(f"{'dataset a':<30} {'dataset b':<30} {'particle':<8} {'mat':>7} {'P':>7} {'angle':>6} {'variable':<9} {'n_a':>7} {'n_b':>7} {'KS':>7} {'p(KS)':>9} {'chi2/dof':>9} {'p(chi2)':>9} {'W1':>9}")
+    for row in table[:top]:
+        print(f"{row['dataset_a'][-30:]:<30} {row['dataset_b'][-30:]:<30} {row['particle']:<8} {row['material_a']:>3}/{row['material_b']:<3} {row['momentum']:>7g} {row['angle']:>6g} "
+              f"{row['variable']:<9} {row['n_a']:>7} {row['n_b']:>7} {row['ks']:>7.4f} {row['ks_p_value']:>9.2e} {row['chi2_reduced']:>9.3f} {row['chi2_p_value']:>9.2e} {row['wasserstein']:>9.4g}")
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rank the differences between the outgoing distributions of histogram stores")
+    parser.add_argument('datasets', nargs='+', help="histogram stores, optionally restricted to one material (<histogram_store.npz>[@<material>])")
+    parser.add_argument('--variables', nargs='+', default=list(COMPARED_VARIABLES), choices=COMPARED_VARIABLES, help="histograms to compare")
+    parser.add_argument('--rank', default='ks', choices=RANKING_METRICS, help="metric the table is ranked by (default: ks)")
+    parser.add_argument('--top', type=int, default=TOP_ROWS, help=f"number of rows printed (default: {TOP_ROWS})")
+    parser.add_argument('--output', default=None, help="save the full ranked table to this .npz file")
+    arguments = parser.parse_args()
+
+    table = ranked_comparison(load_datasets(arguments.datasets), arguments.variables, arguments.rank)
+    if arguments.output:
+        np.savez_compressed(arguments.output, table=table)
+    print_comparison(table, arguments.top)
@@ -0,0 +1,266 @@
+# File: analysis_core.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import configparser
+
+from analysis_helpers import *
+from analysis_binning import *
+from analysis_io import *
+from analysis_results import *
+from analysis_decays import *
+
+
+# Constants
+#=====================================================
+PLOT_SELECTION = ('THETA_HISTOGRAMS', 'PHI_HISTOGRAMS', 'MOMENTUM_HISTOGRAMS', 'CORRELATION_HISTOGRAM_THETA_MOMENTUM', 'CORRELATION_HISTOGRAM_THETA_PHI',
+                  'THETA_HISTOGRAM_ARRAY', 'PHI_HISTOGRAM_ARRAY', 'MOMENTUM_HISTOGRAM_ARRAY', 'CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY',
+                  'CORRELATION_HISTOGRAM_THETA_PHI_ARRAY', 'REFLECTED_TRANSMITTED_DECAYED_SCATTER_PLOT', 'THETAS_SCATTER_PLOT', 'MOMENTUM_SCATTER_PLOT',
+                  'TRANSMITTED_PARTICLES', 'CUTOFF_THETA_SCATTER_PLOT', 'HISTOGRAM_MOMENTA_INCIDENT_ANGLE', 'ALPHA_PLOTS', 'DECAY_PRODUCTS_PLOT')
+MOMENTUM_PLOTS = ('ALPHA_PLOTS', 'MOMENTUM_HISTOGRAMS', 'CORRELATION_HISTOGRAM_THETA_MOMENTUM', 'MOMENTUM_HISTOGRAM_ARRAY',
+                  'CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY', 'MOMENTUM_SCATTER_PLOT', 'HISTOGRAM_MOMENTA_INCIDENT_ANGLE')
+
+
+# Functions shared by the analysis scripts (configuration file, event selection, counts and statistics of one configuration)
+# Info: analysis.py runs them in one process, analysis_distributed.py in map tasks over slices of the grid, and
+#       analysis_multi.py once per data file for several configuration files
+#=====================================================
+def read_analysis_config(config_file):
+    '''
+        Parameters:
+            config_file (string):       path to a plot configuration file (see plot_config/example.ini)
+
+        Returns:
+            options (dict):             settings keyed by the constant names of analysis.py (EVENTS, CUT, PARTICLES,
+                                        MATERIALS, MOMENTA, ANGLES, THICKNESS, DATA, DATA_FOLDER, the PlotSelection flags, ...)
+                                        plus the parsed 'config' itself
+    '''
+    config = configparser.ConfigParser()
+    if not config.read(config_file):
+        raise FileNotFoundError(f"Configuration file {config_file} not found")
+
+    options = {'config': config}
+    options['EVENTS'] = int(config['Setup']['EVENTS'])
+    options['CUT'] = int(config['Setup']['EVENTS_CUT'])
+    options['COMPACT_DTYPES'] = config.getboolean('Setup', 'COMPACT_DTYPES', fallback=False)
+    options['STREAMING_STATISTICS'] = config.getboolean('Setup', 'STREAMING_STATISTICS', fallback=False)
+    for name in PLOT_SELECTION:
+        options[name] = config.getboolean('PlotSelection', name, fallback=False)
+    options['HISTOGRAM_STORE'] = config.getboolean('HistogramStore', 'HISTOGRAM_STORE', fallback=False)
+
+    momenta_range = list(map(int, config['PlottingParameters']['MOMENTA'].split(',')))
+    angles_range = list(map(float, config['PlottingParameters']['ANGLES'].split(',')))
+    options['angles_range'] = angles_range
+    options['MOMENTA'] = np.arange(momenta_range[0], momenta_range[1] + momenta_range[2], momenta_range[2])
+    options['ANGLES'] = np.arange(angles_range[0], angles_range[1] + angles_range[2], angles_range[2])
+    options['MATERIALS'] = list(map(int, config['PlottingParameters']['MATERIALS'].split(',')))
+    options['PARTICLES'] = [particle.strip() for particle in config['PlottingParameters']['PARTICLES'].split(',')]
+    options['THICKNESS'] = int(config['PlottingParameters']['THICKNESS'])
+
+    options['DATA_FOLDER'] = config.get('Data', 'DATA_SUBDIRECTORY')
+    options['DATA'] = config.get('Data', 'DATA_DIRECTORY') + options['DATA_FOLDER']
+    options['refl_trans_string'] = "Transmitted" if options['TRANSMITTED_PARTICLES'] else "Reflected"
+    options['transmit'] = "_transmitted" if options['TRANSMITTED_PARTICLES'] else ""
+    options['SELECTION'] = None                 # named selection of the [Selections] section (see analysis_selections.py)
+    return options
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def needs_momenta(options):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+
+        Returns:
+            read_momenta (bool):        True if the selected plots/outputs need the momentum columns
+    '''
+    selection_momenta = options['SELECTION'] is not None and options['SELECTION']['momenta']
+    return any(options[name] for name in MOMENTUM_PLOTS) or options['HISTOGRAM_STORE'] or selection_momenta
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def configuration_columns(read_momenta):
+    '''
+        Parameters:
+            read_momenta (bool):        read the momentum columns
+
+        Returns:
+            primary_columns (string tuple): PrimaryEvents columns needed by select_events
+    '''
+    return ('fEvent', 'fTheta', 'fPhi') + (('fP_x', 'fP_y', 'fP_z') if read_momenta else ())
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def event_counts(ntuples):
+    '''
+        Parameters:
+            ntuples (dict):             event arrays of the configuration (see load_events)
+
+        Returns:
+            counts (dict):              COUNT_FIELDS tallies of the configuration, except 'selected'
+    '''
+    theta_i = ntuples["fTheta"]
+    is_decayed = event_flag(ntuples, "fIsDecayed")
+    is_absorbed = event_flag(ntuples, "fIsAbsorbed")
+    decayed_out_event_nums = ntuples["all_fEvent"][event_flag(ntuples, "fIsDecayedOut")]
+    theta_decay = theta_i[np.isin(ntuples["fEvent"], decayed_out_event_nums)]
+    counts = {
+        'events': len(ntuples["all_fEvent"]),
+        'reflected': np.count_nonzero(theta_i < 90),
+        'transmitted': np.count_nonzero(theta_i > 90),
+        'decayed': np.count_nonzero(np.logical_and(is_decayed, np.logical_not(is_absorbed))),
+        'absorbed': np.count_nonzero(is_absorbed),
+        'decayed_in': np.count_nonzero(event_flag(ntuples, "fIsDecayedIn")),
+        'decayed_out_r': np.count_nonzero(theta_decay < 90),
+        'decayed_out_t': np.count_nonzero(theta_decay > 90),
+    }
+    return counts
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def selected_alphas(momentum, momenta, theta_incident):
+    '''
+        Parameters:
+            momentum (float):           incident momentum (in MeV/c)
+            momenta (float array):      momenta of the selected particles
+            theta_incident (float):     incident angle (in deg)
+
+        Returns:
+            alphas (float array):       finite alphas of the selected particles (see compute_alphas); momenta below
+                                        P_incident*sin(theta_incident) have no alpha and are left out, so the plain and
+                                        streaming statistics and the histogram store see the same alphas
+    '''
+    with np.errstate(invalid='ignore', divide='ignore'):
+        alphas = compute_alphas(momentum, momenta, theta_incident)
+    return alphas[np.isfinite(alphas)]
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def select_events(ntuples, momentum, theta_incident, transmitted):
+    '''
+        Parameters:
+            ntuples (dict):             event arrays of the configuration (see load_events); the momenta are only
+                                        computed if the momentum columns were read
+            momentum (float):           incident momentum (in MeV/c)
+            theta_incident (float):     incident angle (in deg)
+            transmitted (bool):         select transmitted (True) or reflected (False) particles
+
+        Returns:
+            selection (dict):           'thetas' (transmitted thetas folded onto 0-90 deg), 'phis', 'momenta', 'alphas'
+                                        of the selected particles, 'counts' (COUNT_FIELDS tallies) and 'decay_products'
+                                        (PDG codes of the decayed events and their in/during/out counts, see decay_product_counts)
+    '''
+    theta_i = ntuples["fTheta"]
+    selected = theta_i > 90 if transmitted else theta_i <= 90
+    thetas = theta_i[selected]
+    phis = ntuples["fPhi"][selected]
+
+    momenta = np.empty(0, dtype=thetas.dtype)
+    if "fP_y" in ntuples:
+        p_y = ntuples["fP_y"]
+        selected_p = p_y < 0 if transmitted else p_y >= 0
+        momenta = np.sqrt(np.square(ntuples["fP_x"][selected_p]) + np.square(p_y[selected_p]) + np.square(ntuples["fP_z"][selected_p]))
+
+    # Reflected, transmitted, decayed and absorbed tallies
+    counts = event_counts(ntuples)
+    counts['selected'] = len(thetas)
+
+    selection = {
+        'thetas': 180 - thetas if transmitted else thetas,
+        'phis': phis,
+        'momenta': momenta,
+        'alphas': selected_alphas(momentum, momenta, theta_incident),
+        'counts': counts,
+        'decay_products': decay_product_counts(ntuples),
+    }
+    return selection
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def select_configuration_events(path, momentum, theta_incident, transmitted, read_momenta, compact=False):
+    '''
+        Parameters:
+            path (string):              path to the data file of the configuration
+            momentum (float):           incident momentum (in MeV/c)
+            theta_incident (float):     incident angle (in deg)
+            transmitted (bool):         select transmitted (True) or reflected (False) particles
+            read_momenta (bool):        read the momentum columns (momenta and alphas are empty otherwise)
+            compact (bool):             compact dtype mode of load_events
+
+        Returns:
+            selection (dict):           selected events of the configuration (see select_events)
+    '''
+    ntuples = load_events(path, configuration_columns(read_momenta), ALL_COLUMNS, compact=compact)
+    return select_events(ntuples, momentum, theta_incident, transmitted)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def counts_error(counts, events):
+    '''
+        Parameters:
+            counts (dict):              tallies of a configuration (see select_configuration_events)
+            events (int):               number of events expected in the data file (EVENTS)
+
+        Returns:
+            error (string):             error message if the data file is not valid, None otherwise
+    '''
+    if counts['events'] != events:
+        return "******ERROR*****\nEVENTS does not match number in file"
+    if (counts['reflected'] + counts['transmitted'] + counts['decayed'] + counts['absorbed'] - counts['decayed_out_r'] - counts['decayed_out_t']) != counts['events']:
+        return "*****ERROR2*****"
+    return None
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def record_configuration_statistics(results, index, momentum, selection, streaming=False):
+    '''
+        Parameters:
+            results (structured array): summary (or a view of it)
+            index (int or tuple):       index of the configuration in results
+            momentum (float):           incident momentum of the configuration
+            selection (dict):           selected events (see select_configuration_events)
+            streaming (bool):           use the mergeable accumulators and sketches (STREAMING_STATISTICS)
+
+        Returns:
+
+        Info:
+            Records the statistics of theta and phi, and of momentum and alpha if the momenta were read, with the same
+            estimators as analysis.py
+    '''
+    has_momenta = len(selection['momenta']) > 0
+    if streaming:
+        partial = make_streaming_statistics(momentum)
+        update_streaming_statistics(partial, selection['thetas'], selection['phis'], selection['momenta'] if has_momenta else None, selection['alphas'] if has_momenta else None)
+        record_streaming_statistics(results, index, partial)
+        return
+
+    variables = ('theta', 'phi', 'momentum', 'alpha') if has_momenta else ('theta', 'phi')
+    for variable in variables:
+        data = selection[variable + 's'] if variable != 'momentum' else selection['momenta']
+        histogram = auto_histogram(data)
+        mode, mode_hwhm_l, mode_hwhm_r = mode_helper(data, histogram)
+        mean = np.nanmean(data, dtype=np.float64)
+        mean_error = root_mean_squared_error(data, mean)
+        record_statistics(results, index, variable, mean=mean, mode=mode, std_dev=np.nanstd(data, dtype=np.float64), mean_error=mean_error,
+                          mode_hwhm_left=mode_hwhm_l, mode_hwhm_right=mode_hwhm_r)
+        if variable == 'momentum':
+            mode, mode_error = shifted_mode_rmse(data, mean_error, mean, histogram)
+            record_statistics(results, index, variable, mode=mode, mode_error=mode_error)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def summary_cutoff_angles(results, angles, cut):
+    '''
+        Parameters:
+            results (structured array): summary of one (particle, material), indexed by (momentum, angle)
+            angles (float array):       incident angles of the grid
+            cut (int):                  EVENTS_CUT
+
+        Returns:
+            cutoff_angles (float array): largest incident angle with fewer than cut selected events, for each momentum (0 if none)
+    '''
+    below_cut = results['selected'] < cut
+    return np.array([angles[np.flatnonzero(row)[-1]] if row.any() else 0 for row in below_cut], dtype=float)
@@ -0,0 +1,222 @@
+# File: analysis_cutoff.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import os
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tqdm import tqdm
+import uproot
+
+from analysis_helpers import *
+from analysis_plotters import *
+from analysis_core import *
+
+
+# Constants
+#=====================================================
+CUTOFF_COLUMNS = ('fTheta',)                    # PrimaryEvents columns read to count the selected particles
+
+
+# Cutoff angles by bisection (CUTOFF_THETA_SCATTER_PLOT without processing every data file)
+# Info: the cutoff angle of a (particle, material, momentum) curve is, as in analysis.py, the largest incident angle with
+#       fewer than EVENTS_CUT selected (reflected, or transmitted if TRANSMITTED_PARTICLES) particles, or 0 if there is
+#       none. Only fTheta is read, in chunks, to count the selected particles of a data file. As the count varies
+#       monotonically with the incident angle, the last angle is read first (if it is below the cut it is the cutoff, as
+#       for the transmitted particles), then the first one, and the crossing of EVENTS_CUT between them is found by
+#       bisection of the angle grid: about log2(#angles) + 2 files are read per curve instead of all of them. The curves
+#       of all the particles, materials and momenta are searched in parallel on a local process pool.
+#
+#       With --verify, the angles next to the crossing are also read; if their counts break the monotonic trend, all the
+#       angles of the curve are read and the cutoff is that of the full scan. Named selections (see analysis_selections.py)
+#       are not applied, the counts are those of analysis.py.
+#
+#       Usage:
+#           python3 analysis_cutoff.py <config.ini> [--verify] [--workers N] [--plot]
+#=====================================================
+def selected_count(path, transmitted, step_size=STEP_SIZE):
+    '''
+        Parameters:
+            path (string):              path to the data file of a configuration
+            transmitted (bool):         count transmitted (True) or reflected (False) particles
+            step_size (int):            number of entries read per chunk
+
+        Returns:
+            count (int):                number of selected particles (as len(thetas) of select_events)
+    '''
+    count = 0
+    with uproot.open(path) as file:
+        for chunk in file["PrimaryEvents"].iterate(list(CUTOFF_COLUMNS), step_size=step_size, library="np"):
+            count += np.count_nonzero(chunk['fTheta'] > 90 if transmitted else chunk['fTheta'] <= 90)
+    return count
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def bisect_cutoff(count, n_angles, cut, verify=False):
+    '''
+        Parameters:
+            count (function):           selected count of the angle of an index (reads a data file)
+            n_angles (int):             number of incident angles of the curve
+            cut (int):                  EVENTS_CUT
+            verify (bool):              read the angles next to the crossing, and all the angles if they break the trend
+
+        Returns:
+            cutoff_index (int):         index of the largest angle with fewer than cut selected particles (-1 if none)
+            counts (dict):              selected count of each angle index read
+            monotonic (bool):           False if the verification found counts breaking the monotonic trend
+    '''
+    counts = {}
+    def below(index):
+        if index not in counts:
+            counts[index] = count(index)
+        return counts[index] < cut
+
+    if below(n_angles - 1):
+        return n_angles - 1, counts, True
+    lower, upper = (-1, 0) if not below(0) else (0, n_angles - 1)
+    while upper - lower > 1:
+        middle = (lower + upper)//2
+        if below(middle):
+            lower = middle
+        else:
+            upper = middle
+
+    if verify:
+        neighbours = [index for index in (lower - 1, upper + 1) if 0 <= index < n_angles]
+        if any(below(index) != (index <= lower) for index in neighbours):
+            below_cut = [index for index in range(n_angles) if below(index)]
+            return below_cut[-1] if below_cut else -1, counts, False
+    return lower, counts, True
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def cutoff_curve(data, particle, material, momentum, angles, thickness, cut, transmitted, verify=False):
+    '''
+        Parameters:
+            data (string):              path to the directory of the data files
+            particle (string):          particle of the curve
+            material (int):             material of the curve
+            momentum (float):           incident momentum of the curve
+            angles (float array):       incident angles of the grid
+            thickness (float):          thickness of the plate (in mm)
+            cut (int):                  EVENTS_CUT
+            transmitted (bool):         count transmitted (True) or reflected (False) particles
+            verify (bool):              verify the crossing (see bisect_cutoff)
+
+        Returns:
+            cutoff_angle (float):       cutoff angle of the curve (0 if every angle has at least cut selected particles)
+            counts (dict):              selected count of each angle index read
+            monotonic (bool):           see bisect_cutoff
+    '''
+    def count(index):
+        path = find_data_file(data, material, particle, momentum, angles[index], thickness)
+        if path is None:
+            candidates = '\n'.join(data_file_candidates(data, material, particle, momentum, angles[index], thickness))
+            raise FileNotFoundError(f"No data file for {particle} on material {material} at {momentum} MeV/c and {angles[index]} deg, tried:\n{candidates}")
+        return selected_count(path, transmitted)
+
+    cutoff_index, counts, monotonic = bisect_cutoff(count, len(angles), cut, verify)
+    return (float(angles[cutoff_index]) if cutoff_index >= 0 else 0.0), counts, monotonic
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def find_cutoff_angles(options, verify=False, n_workers=None):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+            verify (bool):              verify the crossing of every curve (see bisect_cutoff)
+            n_workers (int):            number of worker processes (default: number of CPUs)
+
+        Returns:
+            cutoffs (dict):             'cutoff_angles' (particles, materials, momenta), 'files_read' and 'monotonic' of
+                                        every curve, and the 'counts' (particles, materials, momenta, angles) of the
+                                        angles read (-1 elsewhere)
+    '''
+    PARTICLES, MATERIALS, MOMENTA, ANGLES = options['PARTICLES'], options['MATERIALS'], options['MOMENTA'], options['ANGLES']
+    shape = (len(PARTICLES), len(MATERIALS), len(MOMENTA))
+    cutoffs = {
+        'cutoff_angles': np.zeros(shape), 'files_read': np.zeros(shape, dtype=np.int64), 'monotonic': np.ones(shape, dtype=bool),
+        'counts': np.full(shape + (len(ANGLES),), -1, dtype=np.int64),
+    }
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {executor.submit(cutoff_curve, options['DATA'], PARTICLES[p], MATERIALS[m], MOMENTA[k], ANGLES, options['THICKNESS'],
+                                   options['CUT'], options['TRANSMITTED_PARTICLES'], verify): (p, m, k)
+                   for p, m, k in itertools.product(*(range(size) for size in shape))}
+        for future in tqdm(as_completed(futures), total=len(futures), leave=False, desc='CURVES', dynamic_ncols=True):
+            index = futures[future]
+            cutoff_angle, counts, monotonic = future.result()
+            cutoffs['cutoff_angles'][index] = cutoff_angle
+            cutoffs['files_read'][index] = len(counts)
+            cutoffs['monotonic'][index] = monotonic
+            for angle_index, count in counts.items():
+                cutoffs['counts'][index + (angle_index,)] = count
+    return cutoffs
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_cutoff_angles(path, cutoffs, options):
+    '''
+        Parameters:
+            path (string):              path of the output .npz file
+            cutoffs (dict):             cutoff angles (see find_cutoff_angles)
+            options (dict):             settings (see read_analysis_config)
+
+        Returns:
+    '''
+    np.savez(path, **cutoffs, particles=np.asarray(options['PARTICLES'], dtype=str), materials=np.asarray(options['MATERIALS']),
+             momenta=options['MOMENTA'], angles=options['ANGLES'], cut=options['CUT'], refl_trans_string=options['refl_trans_string'])
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def plot_cutoff_angles(cutoffs, options):
+    '''
+        Parameters:
+            cutoffs (dict):             cutoff angles (see find_cutoff_angles)
+            options (dict):             settings (see read_analysis_config)
+
+        Returns:
+
+        Info:
+            Writes the cutoff angle scatter plot of every (particle, material), as CUTOFF_THETA_SCATTER_PLOT of analysis.py
+    '''
+    for particle_index, particle in enumerate(options['PARTICLES']):
+        for material_index, material in enumerate(options['MATERIALS']):
+            material_name = return_surface_name(material)
+            fig_cutoff, ax_cutoff = plt.subplots()
+            make_cutoff_angle_scatterplot(fig_cutoff, ax_cutoff, options['MOMENTA'], cutoffs['cutoff_angles'][particle_index, material_index], options['CUT'],
+                                          material_name, particle, options['EVENTS'], options['refl_trans_string'], options['THICKNESS'])
+            fig_cutoff.savefig(f"plots/{options['DATA_FOLDER']}/scatter_plot_cutoff_theta_{particle}_{material_name}{options['transmit']}")
+            plt.close(fig_cutoff)
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cutoff angles of every momentum, found by bisection of the incident angles")
+    parser.add_argument('config', help="plot configuration file (see plot_config/example.ini)")
+    parser.add_argument('--verify', action='store_true', help="read the angles next to each crossing, and every angle of a curve breaking the monotonic trend")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--plot', action='store_true', help="write the cutoff angle scatter plots")
+    arguments = parser.parse_args()
+
+    options = read_analysis_config(arguments.config)
+    cutoffs = find_cutoff_angles(options, arguments.verify, arguments.workers)
+    os.makedirs(f"plots/{options['DATA_FOLDER']}", exist_ok=True)
+    save_cutoff_angles(f"plots/{options['DATA_FOLDER']}/cutoff_angles{options['transmit']}.npz", cutoffs, options)
+    if arguments.plot:
+        plot_cutoff_angles(cutoffs, options)
+
+    for particle_index, particle in enumerate(options['PARTICLES']):
+        for material_index, material in enumerate(options['MATERIALS']):
+            for momentum_index, momentum in enumerate(options['MOMENTA']):
+                index = (particle_index, material_index, momentum_index)
+                trend = '' if cutoffs['monotonic'][index] else ' (not monotonic, full scan)'
+                print(f"{particle} {return_surface_name(material)} {momentum} MeV/c: cutoff {cutoffs['cutoff_angles'][index]:g} deg, {cutoffs['files_read'][index]}/{len(options['ANGLES'])} files read{trend}")
+    print(f"{cutoffs['files_read'].sum()} of {cutoffs['files_read'].size*len(options['ANGLES'])} data files read")
@@ -0,0 +1,148 @@
+# File: analysis_decays.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+
+from analysis_io import event_flag
+
+
+# Constants
+#=====================================================
+DECAY_STAGES = ('in', 'during', 'out')          # order of the decay stages in the counts of a decay table
+DECAY_FLAGS = ('fIsDecayedIn', 'fIsDecayedDuring', 'fIsDecayedOut')     # AllEvents flag of each decay stage
+PDG_NAMES = {11: 'e-', -11: 'e+', 12: 'nu_e', -12: 'anti_nu_e', 13: 'mu-', -13: 'mu+', 14: 'nu_mu', -14: 'anti_nu_mu',
+             22: 'gamma', 111: 'pi0', 211: 'pi+', -211: 'pi-', 321: 'kaon+', -321: 'kaon-', 2112: 'neutron', 2212: 'proton'}
+
+
+# Functions for the decay-product frequency tables
+# Info: instead of keeping the fDecayPDG column of every configuration, the PDG codes of decayed events are reduced to
+#       counts per (configuration, PDG code, decay stage). A table holds the PDG codes seen so far ('codes', in order of
+#       first appearance) and an int64 'counts' tensor of shape grid + (number of codes, 3), so its memory only grows
+#       with the number of distinct PDG codes.
+#=====================================================
+def decay_product_counts(ntuples):
+    '''
+        Parameters:
+            ntuples (dict):             event arrays of a configuration (see load_events, with the AllEvents columns)
+
+        Returns:
+            codes (int array):          distinct PDG codes of the decayed events
+            counts (int array):         (number of codes x 3) number of events decayed in, during and out, for each code
+    '''
+    pdg = ntuples["all_fDecayPDG"]
+    stages = [event_flag(ntuples, flag) for flag in DECAY_FLAGS]
+    decayed = np.logical_or.reduce(stages)
+    codes, inverse = np.unique(pdg[decayed], return_inverse=True)
+    counts = np.zeros((len(codes), len(DECAY_STAGES)), dtype=np.int64)
+    for stage_index, stage in enumerate(stages):
+        counts[:, stage_index] = np.bincount(inverse[stage[decayed]], minlength=len(codes))
+    return codes, counts
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_decay_table(shape):
+    '''
+        Parameters:
+            shape (int tuple):          shape of the grid, e.g. (len(PARTICLES), len(MATERIALS), len(MOMENTA), len(ANGLES))
+
+        Returns:
+            table (dict):               empty decay table ('codes', 'counts' and the code -> column 'index' lookup)
+    '''
+    return {'codes': np.zeros(0, dtype=np.int64), 'counts': np.zeros(tuple(shape) + (0, len(DECAY_STAGES)), dtype=np.int64), 'index': {}}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _code_columns(table, codes):
+    '''
+        Parameters:
+            table (dict):               decay table (new codes are appended in place)
+            codes (int array):          PDG codes
+
+        Returns:
+            columns (int array):        column of each code in table['counts']
+    '''
+    new_codes = [int(code) for code in codes if int(code) not in table['index']]
+    if new_codes:
+        for code in new_codes:
+            table['index'][code] = len(table['index'])
+        table['codes'] = np.append(table['codes'], new_codes).astype(np.int64)
+        padding = np.zeros(table['counts'].shape[:-2] + (len(new_codes), len(DECAY_STAGES)), dtype=np.int64)
+        table['counts'] = np.concatenate([table['counts'], padding], axis=-2)
+    return np.array([table['index'][int(code)] for code in codes], dtype=np.intp)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def update_decay_table(table, index, codes, counts):
+    '''
+        Parameters:
+            table (dict):               decay table (updated in place)
+            index (int tuple):          index of the configuration in the grid
+            codes (int array):          PDG codes of the configuration (see decay_product_counts)
+            counts (int array):         (number of codes x 3) counts of each code and decay stage
+
+        Returns:
+            table (dict):               the updated table
+    '''
+    columns = _code_columns(table, codes)
+    table['counts'][tuple(index)][columns] += counts
+    return table
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_decay_tables(table, other):
+    '''
+        Parameters:
+            table (dict):               decay table (updated in place)
+            other (dict):               decay table of the same grid (e.g. filled by another map task)
+
+        Returns:
+            table (dict):               the merged table (the codes of other are matched by value)
+    '''
+    columns = _code_columns(table, other['codes'])
+    table['counts'][..., columns, :] += other['counts']
+    return table
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_decay_table(path, table, particles, materials, momenta, angles):
+    '''
+        Parameters:
+            path (string):              path of the output .npz file
+            table (dict):               decay table
+            particles, materials, momenta, angles (arrays): axes of the grid
+
+        Returns:
+    '''
+    np.savez_compressed(path, codes=table['codes'], counts=table['counts'], stages=np.asarray(DECAY_STAGES, dtype=str),
+                        particles=np.asarray(particles, dtype=str), materials=np.asarray(materials, dtype=int),
+                        momenta=np.asarray(momenta, dtype=float), angles=np.asarray(angles, dtype=float))
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_decay_table(path):
+    '''
+        Parameters:
+            path (string):              path of a .npz file written by save_decay_table
+
+        Returns:
+            table (dict):               decay table, with the grid axes ('particles', 'materials', 'momenta', 'angles')
+    '''
+    with np.load(path) as archive:
+        table = {key: archive[key] for key in archive.files}
+    table['index'] = {int(code): column for column, code in enumerate(table['codes'])}
+    return table
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def pdg_name(code):
+    '''
+        Parameters:
+            code (int):                 PDG code
+
+        Returns:
+            name (string):              particle name (the code itself if unknown)
+    '''
+    return PDG_NAMES.get(int(code), str(int(code)))
@@ -0,0 +1,447 @@
+# File: analysis_distributed.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import os
+import sys
+import subprocess
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tqdm import tqdm
+
+from analysis_helpers import *
+from analysis_plotters import *
+from analysis_store import *
+from analysis_output import *
+from analysis_io import *
+from analysis_results import *
+from analysis_core import *
+from analysis_decays import *
+
+
+# Constants
+#=====================================================
+HISTOGRAM_PLOTS = ('THETA_HISTOGRAMS', 'PHI_HISTOGRAMS', 'MOMENTUM_HISTOGRAMS', 'CORRELATION_HISTOGRAM_THETA_MOMENTUM', 'CORRELATION_HISTOGRAM_THETA_PHI',
+                   'THETA_HISTOGRAM_ARRAY', 'PHI_HISTOGRAM_ARRAY', 'MOMENTUM_HISTOGRAM_ARRAY', 'CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY',
+                   'CORRELATION_HISTOGRAM_THETA_PHI_ARRAY', 'ALPHA_PLOTS')      # plots made from the histogram store by analysis_replot.py
+
+# Distributed analysis (map/reduce over slices of the plot configuration grid)
+# Info: the grid of a plot configuration file is split into momentum lines (particle, material, momentum; all incident
+#       angles of a line stay in the same task, as the cutoff angle and the momentum plots are made per line), and the
+#       lines are dealt round-robin to n_tasks map tasks. Each map task reads its data files and writes a partial
+#       (summary records, histogram store, decay-product table and momentum vs incident angle histograms of its lines)
+#       to plots/<DATA_SUBDIRECTORY>/partials/. The reduce step merges the partials, saves summary.npz,
+#       decay_products.npz and histogram_store.npz as analysis.py does, and renders the figures. The histogram store is
+#       only filled if HISTOGRAM_STORE or one of the HISTOGRAM_PLOTS (made from it) is selected.
+#
+#       Usage:
+#           python3 analysis_distributed.py map <config> <task> <n_tasks>           (one map task, e.g. a batch job)
+#           python3 analysis_distributed.py reduce <config> <n_tasks>               (merge the partials and make the plots)
+#           python3 analysis_distributed.py local <config> [n_workers] [n_tasks]    (map tasks on a local process pool, then reduce)
+#=====================================================
+def plan_map_tasks(options, n_tasks):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+            n_tasks (int):              number of map tasks
+
+        Returns:
+            tasks (list):               for each task, the list of (particle, material, momentum) index triples it covers
+    '''
+    lines = list(itertools.product(range(len(options['PARTICLES'])), range(len(options['MATERIALS'])), range(len(options['MOMENTA']))))
+    return [lines[task::n_tasks] for task in range(n_tasks)]
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def needs_histogram_store(options):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+
+        Returns:
+            fill_store (bool):          True if the histogram store is saved or the selected plots are made from it
+    '''
+    return options['HISTOGRAM_STORE'] or any(options[name] for name in HISTOGRAM_PLOTS)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def partial_path(options, task, n_tasks):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+            task (int):                 index of the map task
+            n_tasks (int):              number of map tasks
+
+        Returns:
+            path (string):              path of the partial written by the map task
+    '''
+    return f"plots/{options['DATA_FOLDER']}/partials{options['transmit']}/partial_{task:04d}_of_{n_tasks:04d}.npz"
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_partial(options):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+
+        Returns:
+            partial (dict):             empty partial of the grid: 'summary' records, 'covered' (particle, material,
+                                        momentum) lines, histogram 'store' (None if not needed, see
+                                        needs_histogram_store), 'decays' table and 'momentum_angle' histograms
+    '''
+    grid = (len(options['PARTICLES']), len(options['MATERIALS']), len(options['MOMENTA']), len(options['ANGLES']))
+    partial = {
+        'summary': make_summary(grid),
+        'covered': np.zeros(grid[:3], dtype=bool),
+        'store': init_histogram_store(read_histogram_binning(options['config']), options['PARTICLES'], options['MATERIALS'], options['MOMENTA'], options['ANGLES'],
+                                      options['THICKNESS'], options['EVENTS'], options['refl_trans_string']) if needs_histogram_store(options) else None,
+        'decays': make_decay_table(grid),
+        'momentum_angle': np.zeros(grid + (MOMENTUM_ANGLE_BINS,)),
+    }
+    return partial
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def fill_partial(partial, options, index, selection, path=''):
+    '''
+        Parameters:
+            partial (dict):             partial of the grid (updated in place)
+            options (dict):             settings (see read_analysis_config)
+            index (int, int, int, int): (particle, material, momentum, angle) index of the configuration
+            selection (dict):           selected events of the configuration (see select_events)
+            path (string):              data file of the configuration (for the error message)
+
+        Returns:
+
+        Info:
+            Records the tallies and decay products and, if there are at least EVENTS_CUT selected events, the statistics, histograms and
+            momentum vs incident angle row of one configuration. Raises ValueError if the data file is not valid
+            (the same checks as analysis.py), before anything is recorded; the configuration is only marked valid once
+            its statistics and histograms are filled
+    '''
+    error = counts_error(selection['counts'], options['EVENTS'])
+    if error is not None:
+        raise ValueError(f"{path}: {error}")
+    summary = partial['summary']
+    record_counts(summary, index, **selection['counts'])
+    update_decay_table(partial['decays'], index, *selection['decay_products'])
+    if selection['counts']['selected'] < options['CUT']:
+        return
+
+    momentum = options['MOMENTA'][index[2]]
+    if options['HISTOGRAM_MOMENTA_INCIDENT_ANGLE']:
+        fill_momentum_angle_histogram(partial['momentum_angle'][index[:3]], index[3], selection['momenta'], momentum)
+    if partial['store'] is not None:
+        read_momenta = needs_momenta(options)
+        fill_histogram_store(partial['store'], index, momentum, selection['thetas'], selection['phis'],
+                             selection['momenta'] if read_momenta else None, selection['alphas'] if read_momenta else None)
+    record_configuration_statistics(summary, index, momentum, selection, streaming=options['STREAMING_STATISTICS'])
+    summary['valid'][index] = True
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def configuration_path(options, index):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+            index (int, int, int, int): (particle, material, momentum, angle) index of the configuration
+
+        Returns:
+            path (string):              data file of the configuration (raises FileNotFoundError if there is none)
+    '''
+    particle, material = options['PARTICLES'][index[0]], options['MATERIALS'][index[1]]
+    momentum, theta_incident = options['MOMENTA'][index[2]], options['ANGLES'][index[3]]
+    path = find_data_file(options['DATA'], material, particle, momentum, theta_incident, options['THICKNESS'])
+    if path is None:
+        candidates = data_file_candidates(options['DATA'], material, particle, momentum, theta_incident, options['THICKNESS'])
+        raise FileNotFoundError(f"No data file found, tried: {', '.join(candidates)}")
+    return path
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_partial(partial, path):
+    '''
+        Parameters:
+            partial (dict):             partial of the grid
+            path (string):              path of the output .npz file
+
+        Returns:
+
+        Info:
+            The partial is written to a temporary file first, so a batch job killed while writing leaves no partial behind
+    '''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = path[:-len('.npz')] + '.tmp.npz'
+    store = partial['store'] if partial['store'] is not None else {}
+    np.savez_compressed(temporary_path, summary=partial['summary'], covered=partial['covered'], momentum_angle=partial['momentum_angle'],
+                        decay_codes=partial['decays']['codes'], decay_counts=partial['decays']['counts'],
+                        **{'store_' + key: value for key, value in store.items()})
+    os.replace(temporary_path, path)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_partial(path):
+    '''
+        Parameters:
+            path (string):              path of a partial written by save_partial
+
+        Returns:
+            partial (dict):             partial of the grid (see make_partial)
+    '''
+    with np.load(path) as archive:
+        partial = {key: archive[key] for key in ('summary', 'covered', 'momentum_angle')}
+        partial['store'] = {key[len('store_'):]: archive[key] for key in archive.files if key.startswith('store_')} or None
+        partial['decays'] = {'codes': archive['decay_codes'], 'counts': archive['decay_counts']}
+    partial['decays']['index'] = {int(code): column for column, code in enumerate(partial['decays']['codes'])}
+    return partial
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_partials(partial, other):
+    '''
+        Parameters:
+            partial (dict):             partial of the grid (updated in place)
+            other (dict):               partial of the same grid (e.g. written by another map task)
+
+        Returns:
+            partial (dict):             the merged partial
+    '''
+    covered = other['covered']
+    partial['summary'][covered] = other['summary'][covered]
+    partial['covered'] |= covered
+    if partial['store'] is not None:
+        merge_histogram_stores(partial['store'], other['store'])
+    merge_decay_tables(partial['decays'], other['decays'])
+    partial['momentum_angle'] += other['momentum_angle']
+    return partial
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def run_map_task(config_file, task, n_tasks):
+    '''
+        Parameters:
+            config_file (string):       path to the plot configuration file
+            task (int):                 index of the map task (0 to n_tasks-1)
+            n_tasks (int):              number of map tasks
+
+        Returns:
+            path (string):              path of the partial written by the task
+
+        Info:
+            Raises FileNotFoundError if a data file is missing and ValueError if a data file is not valid
+    '''
+    options = read_analysis_config(config_file)
+    read_momenta = needs_momenta(options)
+    partial = make_partial(options)
+
+    for line in plan_map_tasks(options, n_tasks)[task]:
+        momentum = options['MOMENTA'][line[2]]
+        for theta_index, theta_incident in enumerate(options['ANGLES']):
+            index = line + (theta_index,)
+            path = configuration_path(options, index)
+            selection = select_configuration_events(path, momentum, theta_incident, options['TRANSMITTED_PARTICLES'], read_momenta, compact=options['COMPACT_DTYPES'])
+            fill_partial(partial, options, index, selection, path)
+        partial['covered'][line] = True
+
+    path = partial_path(options, task, n_tasks)
+    save_partial(partial, path)
+    return path
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def open_summary_output(options):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+
+        Returns:
+            plot_output (dict):         plot output of the summary figures, with the PLOT_BACKEND of the [Output] section
+                                        (plots{transmit}.zip as analysis.py, see analysis_output.py)
+    '''
+    return open_plot_output(f"plots/{options['DATA_FOLDER']}", read_plot_backend(options['config']), f"plots{options['transmit']}.zip")
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def render_summary_figures(options, summary, momentum_angle, plot_output, decays=None):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+            summary (structured array): merged summary of the grid
+            momentum_angle (float array): merged momentum vs incident angle histograms
+            plot_output (dict):         plot output the figures are saved to (see open_plot_output)
+            decays (dict):              merged decay-product table (decay products plots skipped if None)
+
+        Returns:
+
+        Info:
+            Makes the figures of analysis.py that only need the summary (theta scatter plots, reflected/transmitted/decayed
+            scatter plots, cutoff angles), the momentum vs incident angle histograms and the decay products plots
+    '''
+    DATA_FOLDER, transmit, refl_trans_string = options['DATA_FOLDER'], options['transmit'], options['refl_trans_string']
+    EVENTS, THICKNESS, CUT, ANGLES, MOMENTA = options['EVENTS'], options['THICKNESS'], options['CUT'], options['ANGLES'], options['MOMENTA']
+    angles_range = options['angles_range']
+
+    for particle_index, particle in enumerate(options['PARTICLES']):
+        for material_index, material in enumerate(options['MATERIALS']):
+            material_name = return_surface_name(material)
+            if options['THETAS_SCATTER_PLOT']:
+                fig_mean, ax_mean = plt.subplots()
+                fig_mode, ax_mode = plt.subplots()
+
+            for momentum_index, momentum in enumerate(MOMENTA):
+                results = summary[particle_index, material_index, momentum_index]
+                valid = results['valid']
+                incident_angles = ANGLES[valid]
+
+                if options['THETAS_SCATTER_PLOT']:
+                    ax_mean.errorbar(incident_angles, results['theta_mean'][valid], yerr=results['theta_mean_error'][valid], fmt='o',markersize=5, markeredgecolor='black', capsize=3, elinewidth=1, markeredgewidth=0.5, ecolor='black', label=f"P = {momentum} MeV/c")
+                    ax_mode.errorbar(incident_angles, results['theta_mode'][valid], yerr=(results['theta_mode_hwhm_left'][valid], results['theta_mode_hwhm_right'][valid]), fmt='o',markersize=5, markeredgecolor='black', capsize=3, elinewidth=1, markeredgewidth=0.5, ecolor='black', label=f"P = {momentum} MeV/c")
+
+                if options['REFLECTED_TRANSMITTED_DECAYED_SCATTER_PLOT']:
+                    fig_rtd, ax_rtd = plt.subplots(figsize=(8,5))
+                    make_rtd_scatter_plot(fig_rtd, ax_rtd, ANGLES, results['reflected'], results['transmitted'], results['decayed'], results['decayed_in'], results['decayed_out_r'], results['decayed_out_t'], results['absorbed'], particle, material_name, momentum, EVENTS, THICKNESS, angles_range)
+                    save_figure(plot_output, fig_rtd, f'plots/{DATA_FOLDER}/scatter_plot_rtd_{particle}_{material_name}_{momentum}.png')
+                    plt.close(fig_rtd)
+
+                if options['HISTOGRAM_MOMENTA_INCIDENT_ANGLE']:
+                    fig_mom_inc, ax_mom_inc = plt.subplots(figsize=(8,6))
+                    make_2dhist_momenta_inc_angle_counts(fig_mom_inc, ax_mom_inc, momentum_angle[particle_index, material_index, momentum_index], ANGLES, particle, material_name, momentum, EVENTS, THICKNESS, refl_trans_string)
+                    save_figure(plot_output, fig_mom_inc, f'plots/{DATA_FOLDER}/hist2d_momenta_vs_incident_angle_{particle}_{material_name}_{momentum}.png')
+                    plt.close(fig_mom_inc)
+
+                if options['DECAY_PRODUCTS_PLOT'] and decays is not None:
+                    fig_dec, ax_dec = plt.subplots(figsize=(8,5))
+                    make_decay_products_plot(fig_dec, ax_dec, decays['codes'], decays['counts'][particle_index, material_index, momentum_index].sum(axis=0), particle, material_name, momentum, EVENTS, THICKNESS)
+                    save_figure(plot_output, fig_dec, f'plots/{DATA_FOLDER}/decay_products_{particle}_{material_name}_{momentum}.png')
+                    plt.close(fig_dec)
+
+            if options['THETAS_SCATTER_PLOT']:
+                make_thetas_scatter_plot_mean(fig_mean, ax_mean, particle, material_name, refl_trans_string, THICKNESS, angles_range)
+                save_figure(plot_output, fig_mean, f"plots/{DATA_FOLDER}/scatter_plot_theta_mean_{particle}_{material_name}.png")
+                plt.close(fig_mean)
+                make_thetas_scatter_plot_mode(fig_mode, ax_mode, particle, material_name, refl_trans_string, THICKNESS, angles_range)
+                save_figure(plot_output, fig_mode, f"plots/{DATA_FOLDER}/scatter_plot_theta_mode_{particle}_{material_name}.png")
+                plt.close(fig_mode)
+
+            if options['CUTOFF_THETA_SCATTER_PLOT']:
+                cutoff_angles = summary_cutoff_angles(summary[particle_index, material_index], ANGLES, CUT)
+                fig_cutoff, ax_cutoff = plt.subplots()
+                make_cutoff_angle_scatterplot(fig_cutoff, ax_cutoff, MOMENTA, cutoff_angles, CUT, material_name, particle, EVENTS, refl_trans_string, THICKNESS)
+                save_figure(plot_output, fig_cutoff, f"plots/{DATA_FOLDER}/scatter_plot_cutoff_theta_{particle}_{material_name}{transmit}")
+                plt.close(fig_cutoff)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def finish_partial(options, partial, config_file, plot_output=None):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+            partial (dict):             partial covering the whole grid
+            config_file (string):       path to the plot configuration file (passed on to analysis_replot.py)
+            plot_output (dict):         open plot output already holding the summary figures (watch mode), closed here
+                                        instead of making them again (default: the summary figures are made into a new
+                                        plot output of the PLOT_BACKEND of the configuration)
+
+        Returns:
+            summary (structured array): summary of the grid
+
+        Info:
+            Raises ValueError if the partial does not cover the whole grid. Saves the summary, the decay-product table and the histogram store
+            (if it was filled, see needs_histogram_store; the histogram plots and arrays are made from it with
+            analysis_replot.py, which is run here if any of them is selected) and makes the summary figures.
+    '''
+    covered = partial['covered']
+    if not covered.all():
+        raise ValueError(f"Partials cover {np.count_nonzero(covered)} of {covered.size} momentum lines")
+
+    DATA_FOLDER, transmit = options['DATA_FOLDER'], options['transmit']
+    os.makedirs(f"plots/{DATA_FOLDER}", exist_ok=True)
+    save_summary(f"plots/{DATA_FOLDER}/summary{transmit}.npz", partial['summary'], options['PARTICLES'], options['MATERIALS'], options['MOMENTA'], options['ANGLES'], options['THICKNESS'], options['EVENTS'], options['refl_trans_string'])
+    save_decay_table(f"plots/{DATA_FOLDER}/decay_products.npz", partial['decays'], options['PARTICLES'], options['MATERIALS'], options['MOMENTA'], options['ANGLES'])
+    if partial['store'] is not None:
+        save_histogram_store(partial['store'], f"plots/{DATA_FOLDER}/histogram_store{transmit}.npz")
+
+    if plot_output is None:
+        plot_output = open_summary_output(options)
+        render_summary_figures(options, partial['summary'], partial['momentum_angle'], plot_output, partial['decays'])
+    close_plot_output(plot_output)
+    if any(options[name] for name in HISTOGRAM_PLOTS):
+        replot = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analysis_replot.py')
+        selection = [options['SELECTION']['name']] if options['SELECTION'] is not None else []
+        subprocess.run([sys.executable, replot, config_file] + selection, check=True)
+    return partial['summary']
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def run_reduce(config_file, n_tasks):
+    '''
+        Parameters:
+            config_file (string):       path to the plot configuration file
+            n_tasks (int):              number of map tasks
+
+        Returns:
+            summary (structured array): merged summary of the grid
+
+        Info:
+            Raises FileNotFoundError if a partial is missing (see finish_partial for the outputs)
+    '''
+    options = read_analysis_config(config_file)
+    paths = [partial_path(options, task, n_tasks) for task in range(n_tasks)]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"{len(missing)} of {n_tasks} partials missing, e.g. {missing[0]}")
+
+    partial = load_partial(paths[0])
+    for path in paths[1:]:
+        merge_partials(partial, load_partial(path))
+    return finish_partial(options, partial, config_file)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def run_local(config_file, n_workers=None, n_tasks=None):
+    '''
+        Parameters:
+            config_file (string):       path to the plot configuration file
+            n_workers (int):            number of worker processes (default: number of CPUs)
+            n_tasks (int):              number of map tasks (default: one per momentum line)
+
+        Returns:
+            summary (structured array): merged summary of the grid
+
+        Info:
+            Runs the same map tasks as the batch jobs on a local process pool, then the reduce step
+    '''
+    options = read_analysis_config(config_file)
+    n_workers = n_workers or os.cpu_count()
+    n_tasks = n_tasks or len(options['PARTICLES'])*len(options['MATERIALS'])*len(options['MOMENTA'])
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(run_map_task, config_file, task, n_tasks) for task in range(n_tasks)]
+        for future in tqdm(as_completed(futures), total=n_tasks, leave=False, desc='MAP TASKS', dynamic_ncols=True):
+            future.result()
+    return run_reduce(config_file, n_tasks)
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    usage = "Usage: python3 analysis_distributed.py map <config> <task> <n_tasks> | reduce <config> <n_tasks> | local <config> [n_workers] [n_tasks]"
+    if len(sys.argv) < 3 or sys.argv[1] not in ('map', 'reduce', 'local'):
+        print(usage)
+        sys.exit(1)
+    mode, config_file, arguments = sys.argv[1], sys.argv[2], [int(argument) for argument in sys.argv[3:]]
+
+    if mode == 'map' and len(arguments) == 2:
+        print(run_map_task(config_file, *arguments))
+    elif mode == 'reduce' and len(arguments) == 1:
+        run_reduce(config_file, *arguments)
+    elif mode == 'local' and len(arguments) <= 2:
+        run_local(config_file, *arguments)
+    else:
+        print(usage)
+        sys.exit(1)
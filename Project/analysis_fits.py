@@ -0,0 +1,318 @@
+# File: analysis_fits.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import os
+import sys
+
+from analysis_results import *
+
+
+# Constants
+#=====================================================
+MAX_ITERATIONS = 100                            # maximum number of Gauss-Newton iterations of the non-linear models
+TOLERANCE = 1e-10                               # relative change of chi^2 below which a non-linear fit has converged
+FIT_STATISTICS = ('mean', 'mode')              # statistics of the summary that can be fitted (weighted by their errors, see statistic_errors)
+
+
+# Models of a curve y(x) of incident angle x (in deg)
+# Info: a linear model is given by the columns of its design matrix (y = X(x) @ parameters), a non-linear model by its
+#       function, its jacobian (d y/d parameters) and a starting point estimated from the data. All the functions take
+#       x as an (A,) array and the parameters as an (N, k) array, and return (N, A) (jacobian: (N, A, k)) arrays.
+#=====================================================
+def _weighted_ends(y, w):
+    '''
+        Parameters:
+            y (float 2d array):         (N, A) values of the curves
+            w (float 2d array):         (N, A) weights of the points (0: point left out)
+
+        Returns:
+            first (float array):        first point of each curve with a non-zero weight (NaN if none)
+            last (float array):         last point of each curve with a non-zero weight (NaN if none)
+    '''
+    used = w > 0
+    rows = np.arange(len(y))
+    first = np.where(used.any(axis=1), y[rows, np.argmax(used, axis=1)], np.nan)
+    last = np.where(used.any(axis=1), y[rows, y.shape[1] - 1 - np.argmax(used[:, ::-1], axis=1)], np.nan)
+    return first, last
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _exponential(x, parameters):
+    '''
+        Returns:
+            y (float 2d array):         a + b*exp(-x/c)
+    '''
+    a, b, c = parameters[:, 0, None], parameters[:, 1, None], parameters[:, 2, None]
+    return a + b*np.exp(-x/c)
+
+def _exponential_jacobian(x, parameters):
+    '''
+        Returns:
+            jacobian (float 3d array):  derivatives of a + b*exp(-x/c) with respect to (a, b, c)
+    '''
+    b, c = parameters[:, 1, None], parameters[:, 2, None]
+    decay = np.exp(-x/c)
+    return np.stack([np.ones_like(decay), decay, b*x*decay/np.square(c)], axis=-1)
+
+def _exponential_start(x, y, w):
+    '''
+        Returns:
+            parameters (float 2d array): a at the last point, a + b at the first point, c a third of the angle range
+    '''
+    first, last = _weighted_ends(y, w)
+    return np.stack([last, first - last, np.full(len(y), (x.max() - x.min())/3 or 1.0)], axis=-1)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _power(x, parameters):
+    '''
+        Returns:
+            y (float 2d array):         a*x^b
+    '''
+    a, b = parameters[:, 0, None], parameters[:, 1, None]
+    return a*np.power(x, b)
+
+def _power_jacobian(x, parameters):
+    '''
+        Returns:
+            jacobian (float 3d array):  derivatives of a*x^b with respect to (a, b)
+    '''
+    a, b = parameters[:, 0, None], parameters[:, 1, None]
+    power = np.power(x, b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.stack([power, np.where(x > 0, a*power*np.log(x), 0.0)], axis=-1)
+
+def _power_start(x, y, w):
+    '''
+        Returns:
+            parameters (float 2d array): straight line through the origin and the last point (b = 1)
+    '''
+    first, last = _weighted_ends(y, w)
+    return np.stack([np.where(np.isfinite(last), last, 1.0)/max(x.max(), 1e-12), np.ones(len(y))], axis=-1)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+FIT_MODELS = {
+    'constant': {'parameters': ('a',), 'design': lambda x: np.ones((len(x), 1))},
+    'proportional': {'parameters': ('b',), 'design': lambda x: x[:, None]},
+    'linear': {'parameters': ('a', 'b'), 'design': lambda x: np.stack([np.ones_like(x), x], axis=-1)},
+    'quadratic': {'parameters': ('a', 'b', 'c'), 'design': lambda x: np.stack([np.ones_like(x), x, np.square(x)], axis=-1)},
+    'exponential': {'parameters': ('a', 'b', 'c'), 'function': _exponential, 'jacobian': _exponential_jacobian, 'start': _exponential_start},
+    'power': {'parameters': ('a', 'b'), 'function': _power, 'jacobian': _power_jacobian, 'start': _power_start},
+}       # y = a, b*x, a + b*x, a + b*x + c*x^2, a + b*exp(-x/c), a*x^b
+
+
+# Batched least squares fits of the curves of a grid
+# Info: the curves (e.g. mean outgoing theta vs incident angle of every (particle, material, momentum)) are stacked
+#       into (N, A) arrays and fitted together. Points with a NaN value or a non-positive/non-finite error get zero
+#       weight. Linear models are solved in closed form with one batched solve of the weighted normal equations
+#       (X^T W X) p = X^T W y; non-linear models with batched Gauss-Newton steps, damped per curve (Levenberg-Marquardt)
+#       so that each step lowers the chi^2 of its curve. As scipy.optimize.curve_fit(absolute_sigma=True), the
+#       uncertainties are the square roots of the diagonal of (J^T W J)^-1, and the reduced chi^2 is that of
+#       analysis_helpers.reduced_chi_squared with dof = number of points - number of parameters.
+#
+#       Usage:
+#           python3 analysis_fits.py <summary.npz> <model> [variable] [statistic]
+#=====================================================
+def _solve(matrix, vector):
+    '''
+        Parameters:
+            matrix (float 3d array):    (N, k, k) stacked matrices
+            vector (float 2d array):    (N, k) stacked right-hand sides
+
+        Returns:
+            solution (float 2d array):  (N, k) solutions (NaN for singular matrices)
+    '''
+    solution = np.full(vector.shape, np.nan)
+    regular = np.isfinite(matrix).all(axis=(1, 2)) & (np.abs(np.linalg.det(matrix)) > 0)
+    if regular.any():
+        solution[regular] = np.linalg.solve(matrix[regular], vector[regular][..., None])[..., 0]
+    return solution
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _inverse(matrix):
+    '''
+        Parameters:
+            matrix (float 3d array):    (N, k, k) stacked matrices
+
+        Returns:
+            inverse (float 3d array):   (N, k, k) inverses (NaN for singular matrices)
+    '''
+    inverse = np.full(matrix.shape, np.nan)
+    regular = np.isfinite(matrix).all(axis=(1, 2)) & (np.abs(np.linalg.det(matrix)) > 0)
+    if regular.any():
+        inverse[regular] = np.linalg.inv(matrix[regular])
+    return inverse
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _chi_squared(y, w, model):
+    '''
+        Parameters:
+            y (float 2d array):         (N, A) values of the curves (ignored where w = 0)
+            w (float 2d array):         (N, A) weights (1/error^2)
+            model (float 2d array):     (N, A) values of the model
+
+        Returns:
+            chi_squared (float array):  chi^2 of each curve
+    '''
+    residuals = np.where(w > 0, y - model, 0.0)
+    return np.sum(w*np.square(residuals), axis=1)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def fit_curves(x, y, errors, model='linear', max_iterations=MAX_ITERATIONS, tolerance=TOLERANCE):
+    '''
+        Parameters:
+            x (float array):            (A,) incident angles
+            y (float 2d array):         (N, A) values of the curves
+            errors (float 2d array):    (N, A) errors of the values (None: unit errors)
+            model (string):             one of FIT_MODELS
+            max_iterations (int):       maximum number of Gauss-Newton iterations (non-linear models)
+            tolerance (float):          relative change of chi^2 below which a non-linear fit has converged
+
+        Returns:
+            fit (dict):                 'parameters' and 'errors' ((N, k), NaN where the fit is undetermined),
+                                        'reduced_chi2' and 'dof' (N,) of each curve, 'converged' (N,) and the 'model'
+                                        and its 'parameter_names'
+    '''
+    if model not in FIT_MODELS:
+        raise ValueError(f"Unknown fit model {model} (known: {', '.join(FIT_MODELS)})")
+    definition = FIT_MODELS[model]
+    x = np.asarray(x, dtype=np.float64)
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    errors = np.ones_like(y) if errors is None else np.broadcast_to(np.asarray(errors, dtype=np.float64), y.shape)
+    k = len(definition['parameters'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = np.where(np.isfinite(y) & np.isfinite(errors) & (errors > 0), 1/np.square(errors), 0.0)
+    y = np.where(w > 0, y, 0.0)
+    dof = np.count_nonzero(w, axis=1) - k
+
+    if 'design' in definition:
+        # Weighted normal equations, one batched solve
+        design = definition['design'](x)
+        normal = np.einsum('na,ai,aj->nij', w, design, design)
+        parameters = _solve(normal, np.einsum('na,ai->ni', w*y, design))
+        fitted = parameters @ design.T
+        converged = np.isfinite(parameters).all(axis=1)
+    else:
+        # Damped Gauss-Newton, each curve keeps its own damping and stops once its chi^2 no longer changes
+        parameters = definition['start'](x, y, w)
+        with np.errstate(all='ignore'):
+            chi_squared = _chi_squared(y, w, definition['function'](x, parameters))
+        damping = np.full(len(y), 1e-3)
+        converged = np.zeros(len(y), dtype=bool)
+        for _ in range(max_iterations):
+            active = ~converged & np.isfinite(chi_squared)
+            if not active.any():
+                break
+            with np.errstate(all='ignore'):
+                p = parameters[active]
+                jacobian = definition['jacobian'](x, p)
+                residuals = np.where(w[active] > 0, y[active] - definition['function'](x, p), 0.0)
+                normal = np.einsum('na,nai,naj->nij', w[active], jacobian, jacobian)
+                normal += damping[active, None, None]*np.einsum('nii->ni', normal)[:, :, None]*np.eye(k)
+                step = _solve(normal, np.einsum('na,nai->ni', w[active]*residuals, jacobian))
+                trial = p + step
+                trial_chi_squared = _chi_squared(y[active], w[active], definition['function'](x, trial))
+            better = np.isfinite(trial_chi_squared) & (trial_chi_squared <= chi_squared[active])
+            indices = np.flatnonzero(active)
+            done = better & (chi_squared[active] - trial_chi_squared <= tolerance*np.maximum(chi_squared[active], 1e-300))
+            parameters[indices[better]] = trial[better]
+            chi_squared[indices[better]] = trial_chi_squared[better]
+            damping[indices] = np.where(better, damping[indices]/10, damping[indices]*10)
+            converged[indices[done | ~np.isfinite(step).all(axis=1)]] = True
+            converged[indices[damping[indices] > 1e12]] = True
+        with np.errstate(all='ignore'):
+            fitted = definition['function'](x, parameters)
+            jacobian = definition['jacobian'](x, parameters)
+            normal = np.einsum('na,nai,naj->nij', w, jacobian, jacobian)
+        converged &= np.isfinite(parameters).all(axis=1)
+
+    covariance = _inverse(normal)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        reduced_chi2 = np.where(dof > 0, _chi_squared(y, w, fitted)/dof, np.nan)
+        parameter_errors = np.sqrt(np.einsum('nii->ni', covariance))
+    undetermined = dof < 0
+    parameters[undetermined] = np.nan
+    parameter_errors[undetermined] = np.nan
+    return {'parameters': parameters, 'errors': parameter_errors, 'reduced_chi2': reduced_chi2, 'dof': dof,
+            'converged': converged & ~undetermined, 'model': model, 'parameter_names': definition['parameters']}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def fit_summary_curves(summary, angles, variable='theta', statistic='mean', model='linear', **kwargs):
+    '''
+        Parameters:
+            summary (structured array): (particles, materials, momenta, angles) summary of a grid
+            angles (float array):       incident angles of the grid
+            variable (string):          one of STATISTIC_VARIABLES
+            statistic (string):         one of FIT_STATISTICS
+            model (string):             one of FIT_MODELS
+            kwargs:                     options of fit_curves (max_iterations, tolerance)
+
+        Returns:
+            fit (dict):                 result of fit_curves, with the arrays reshaped to (particles, materials, momenta, ...)
+
+        Info:
+            Each point is weighted by the error on its statistic, the spread recorded in the summary divided by
+            sqrt(selected events) (see statistic_errors). Configurations that are not valid (below the cutoff, or
+            missing) are left out of their curve. Raises ValueError if the valid configurations of a curve have no
+            finite error
+    '''
+    if statistic not in FIT_STATISTICS:
+        raise ValueError(f"Only {', '.join(FIT_STATISTICS)} can be fitted")
+    grid = summary.shape[:-1]
+    values = np.where(summary['valid'], summary[f'{variable}_{statistic}'], np.nan).reshape(-1, summary.shape[-1])
+    errors = statistic_errors(summary, variable, statistic).reshape(-1, summary.shape[-1])
+    unweighted = np.isfinite(values).any(axis=1) & ~(np.isfinite(values) & np.isfinite(errors) & (errors > 0)).any(axis=1)
+    if unweighted.any():
+        curve = tuple(int(i) for i in np.unravel_index(np.flatnonzero(unweighted)[0], grid))
+        raise ValueError(f"No finite error on the {variable} {statistic} of the valid configurations of the (particle, material, momentum) curve {curve} ({np.count_nonzero(unweighted)} curves)")
+    fit = fit_curves(angles, values, errors, model, **kwargs)
+    for key in ('parameters', 'errors'):
+        fit[key] = fit[key].reshape(grid + (-1,))
+    for key in ('reduced_chi2', 'dof', 'converged'):
+        fit[key] = fit[key].reshape(grid)
+    return fit
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_fit(path, fit, summary):
+    '''
+        Parameters:
+            path (string):              path of the output .npz file
+            fit (dict):                 result of fit_summary_curves
+            summary (dict):             loaded summary the curves come from (see load_summary), for the grid axes
+
+        Returns:
+    '''
+    np.savez_compressed(path, parameters=fit['parameters'], errors=fit['errors'], reduced_chi2=fit['reduced_chi2'], dof=fit['dof'],
+                        converged=fit['converged'], model=np.asarray(fit['model'], dtype=str),
+                        parameter_names=np.asarray(fit['parameter_names'], dtype=str),
+                        **{axis: summary[axis] for axis in ('particles', 'materials', 'momenta', 'angles')})
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    if len(sys.argv) not in (3, 4, 5):
+        print("Usage: python3 analysis_fits.py <summary.npz> <model> [variable] [statistic]")
+        sys.exit(1)
+    summary_path, model = sys.argv[1], sys.argv[2]
+    variable = sys.argv[3] if len(sys.argv) > 3 else 'theta'
+    statistic = sys.argv[4] if len(sys.argv) > 4 else 'mean'
+
+    summary = load_summary(summary_path)
+    fit = fit_summary_curves(summary['summary'], summary['angles'], variable, statistic, model)
+    save_fit(os.path.join(os.path.dirname(summary_path), f"fit_{variable}_{statistic}_{model}.npz"), fit, summary)
+    for index in np.ndindex(fit['reduced_chi2'].shape):
+        particle, material, momentum = summary['particles'][index[0]], summary['materials'][index[1]], summary['momenta'][index[2]]
+        values = "  ".join(f"{name} = {value:.4g} +- {error:.2g}" for name, value, error in zip(fit['parameter_names'], fit['parameters'][index], fit['errors'][index]))
+        print(f"{particle} {material} {momentum}:  {values}  chi2/dof = {fit['reduced_chi2'][index]:.3g}{'' if fit['converged'][index] else '  (not converged)'}")
@@ -7,6 +7,8 @@
 import numpy as np
 import math
 
+from analysis_binning import *
+
 
 # Helper Functions
 #=====================================================
@@ -73,10 +75,11 @@ def bootstrap_mode_error(data):
         mode_error (float):     The uncertainty in the estimated mode.
     """
     # Calculate the mode for each bootstrap sample
+    data = finite_data(data)
     bootstrap_modes = []
     for _ in range(100):
-        bootstrap_sample = np.random.choice(data, size=len(data), replace=True)
-        bin_counts, bin_edges = np.histogram(bootstrap_sample, bins='auto')
+        bootstrap_sample = data[np.random.randint(0, len(data), size=len(data))]
+        bin_counts, bin_edges = auto_histogram(bootstrap_sample)
         bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
         bootstrap_mode = bin_centers[np.argmax(bin_counts)]
         bootstrap_modes.append(bootstrap_mode)
@@ -90,14 +93,14 @@ def bootstrap_mode_error(data):
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
 
-def mode_helper(data):
+def histogram_mode_hwhm(hist, bin_edges):
     '''
-    Estimates the mode of a distribution using auto binning. 
-    Computes left and right HWHM estimates, for error on the mode.
+    Estimates the mode of a binned distribution (center of the maximum bin), and the left and right HWHM
+    (distance from the mode to the centers of the nearest bins at or below half maximum).
     
     Parameters:
-        data (array-like):      The input data set for which to compute the mode.
-        
+        hist (array-like):      bin counts
+        bin_edges (array-like): bin edges
         
     Returns:
         mode (float):           Mode estimate of the data set
@@ -106,7 +109,6 @@ def mode_helper(data):
     '''
     
     # Estimate mode
-    hist, bin_edges = np.histogram(data, bins='auto')
     bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
     max_bin_index = np.argmax(hist)
     mode = bin_centers[max_bin_index]
@@ -128,6 +130,25 @@ def mode_helper(data):
     return mode, mode - left_hwhm, right_hwhm - mode
 
 
+def mode_helper(data, histogram=None):
+    '''
+    Estimates the mode of a distribution using auto binning. 
+    Computes left and right HWHM estimates, for error on the mode.
+    
+    Parameters:
+        data (array-like):      The input data set for which to compute the mode.
+        histogram (tuple):      (counts, edges) of data, e.g. from auto_histogram(data), to reuse instead of rebinning the data
+        
+    Returns:
+        mode (float):           Mode estimate of the data set
+        left_hwhm (float):      The left HWHM estimate of the data set
+        right_hwhm (float):     The right HWHM estimate of the data set
+    '''
+    
+    hist, bin_edges = histogram if histogram is not None else auto_histogram(data)
+    return histogram_mode_hwhm(hist, bin_edges)
+
+
 def root_mean_squared_error(data, mean):
     '''
     Computes the Root Mean Squared Error of a data set.
@@ -142,13 +163,13 @@ def root_mean_squared_error(data, mean):
 
     n = len(data)
     data = np.asarray(data)
-    data_minus_mean = data - mean
+    data_minus_mean = np.subtract(data, mean, dtype=np.float64)    # accumulate in float64 (data may be float32 in compact mode)
     rmse = math.sqrt(np.sum(np.square(data_minus_mean))/n)
     
     return rmse
 
 
-def shifted_mode_rmse(data, rmse, mean):
+def shifted_mode_rmse(data, rmse, mean, histogram=None):
     '''
     Computes the error on the mode as sigma_m^2 = sigma_(mu)^2 + (mode - mean)^2
     
@@ -156,6 +177,7 @@ def shifted_mode_rmse(data, rmse, mean):
         data (array):       data set
         rmse (float):       root_mean_squared_error of data
         mean (float):       mean of the data
+        histogram (tuple):  (counts, edges) of data, e.g. from auto_histogram(data), to reuse instead of rebinning the data
         
     Returns:
         mode (float):       estimated mode of data set
@@ -163,7 +185,7 @@ def shifted_mode_rmse(data, rmse, mean):
     '''
     
     # Estimate mode
-    hist, bin_edges = np.histogram(data, bins='auto')
+    hist, bin_edges = histogram if histogram is not None else auto_histogram(data)
     bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
     max_bin_index = np.argmax(hist)
     mode = bin_centers[max_bin_index]
@@ -183,18 +205,13 @@ def compute_alphas(incident_momentum, reflected_momenta, incident_theta):
         incident_theta[degrees] (float)
         
     Returns:
-        alpha (float)
+        alphas (float array)
     '''
     theta_inc_rad = math.radians(incident_theta)
     p_i_term1 = (incident_momentum*math.sin(theta_inc_rad))**2
     p_i_term2 = incident_momentum*math.cos(theta_inc_rad)
     
-    # compute array of alphas
-    print(p_i_term1)
-    print(reflected_momenta[0]**2)
-    alphas = []
-    for mom in reflected_momenta:
-        alpha = np.sqrt(np.square(mom) - p_i_term1)/p_i_term2
-        alphas.append(alpha)
+    # compute array of alphas (in one vectorized pass, keeping the dtype of the momenta)
+    alphas = np.sqrt(np.square(np.asarray(reflected_momenta)) - p_i_term1)/p_i_term2
     
     return alphas
\ No newline at end of file
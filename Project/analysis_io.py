@@ -0,0 +1,192 @@
+# File: analysis_io.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import uproot
+import os
+
+
+# Constants
+#=====================================================
+PRIMARY_COLUMNS = ('fEvent', 'fP_x', 'fP_y', 'fP_z', 'fTheta', 'fPhi', 'fDepth')                                   # PrimaryEvents ntuple
+ALL_COLUMNS = ('fEvent', 'fIsDecayed', 'fIsAbsorbed', 'fIsDecayedIn', 'fIsDecayedDuring', 'fIsDecayedOut', 'fDecayPDG')  # AllEvents ntuple
+FLAG_BITS = {                                   # bit of each AllEvents flag in the packed 'flags' column (compact mode)
+    'fIsDecayed': 1,
+    'fIsAbsorbed': 2,
+    'fIsDecayedIn': 4,
+    'fIsDecayedDuring': 8,
+    'fIsDecayedOut': 16,
+}
+STEP_SIZE = 200000                              # number of entries read per chunk in compact mode
+
+
+# Functions to locate and read simulation output files
+#=====================================================
+def data_file_candidates(data, material, particle, momentum, theta_incident, thickness):
+    '''
+        Parameters:
+            data (string):              path to the directory of the data files
+            material (int):             material of plate
+            particle (string):          name of particle
+            momentum (float):           incident momentum
+            theta_incident (float):     incident theta
+            thickness (float):          thickness of the plate (in mm)
+
+        Returns:
+            paths (string array):       possible names of the output file of the configuration, in order of preference
+    '''
+    prefix = data + "output_" + str(material) + '_' + str(particle) + '_' + str(momentum) + '_'
+    paths = [
+        prefix + str(theta_incident) + '.root',
+        prefix + str(theta_incident) + '_' + str(thickness) + '.root',
+        prefix + str(round(theta_incident)) + '.root',
+        prefix + str(round(theta_incident)) + '_' + str(thickness) + '.root',
+    ]
+    return paths
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def find_data_file(data, material, particle, momentum, theta_incident, thickness):
+    '''
+        Parameters:
+            data (string):              path to the directory of the data files
+            material (int):             material of plate
+            particle (string):          name of particle
+            momentum (float):           incident momentum
+            theta_incident (float):     incident theta
+            thickness (float):          thickness of the plate (in mm)
+
+        Returns:
+            path (string):              path to the output file of the configuration (None if no file is found)
+    '''
+    for path in data_file_candidates(data, material, particle, momentum, theta_incident, thickness):
+        if os.path.exists(path):
+            return path
+    return None
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def pack_flags(columns):
+    '''
+        Parameters:
+            columns (dict):             AllEvents flag columns (any integer/boolean dtype), keyed by name
+
+        Returns:
+            flags (uint8 array):        flags packed into one bitfield per event (see FLAG_BITS)
+    '''
+    flags = None
+    for name, bit in FLAG_BITS.items():
+        if name not in columns:
+            continue
+        if flags is None:
+            flags = np.zeros(len(columns[name]), dtype=np.uint8)
+        flags |= (np.asarray(columns[name]) != 0).astype(np.uint8)*np.uint8(bit)
+    return flags
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def event_flag(events, name):
+    '''
+        Parameters:
+            events (dict):              event arrays returned by load_events
+            name (string):              name of an AllEvents flag (e.g. 'fIsDecayedOut')
+
+        Returns:
+            flag (bool array):          flag of every event, for both the compact and the full dtype mode
+    '''
+    if 'flags' in events:
+        return (events['flags'] & np.uint8(FLAG_BITS[name])) != 0
+    return np.asarray(events[name]) != 0
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _read_tree(tree, columns, dtypes, step_size):
+    '''
+        Parameters:
+            tree (uproot TTree):        ntuple to read
+            columns (string array):     columns to read
+            dtypes (dict):              dtype of each column in memory
+            step_size (int):            number of entries read per chunk
+
+        Returns:
+            arrays (dict):              column arrays, converted chunk by chunk into preallocated arrays (so the
+                                        full-precision copy of a column is never held in memory)
+    '''
+    n = tree.num_entries
+    arrays = {column: np.empty(n, dtype=dtypes[column]) for column in columns}
+    start = 0
+    for chunk in tree.iterate(list(columns), step_size=step_size, library="np"):
+        stop = start + len(chunk[columns[0]])
+        for column in columns:
+            arrays[column][start:stop] = chunk[column]
+        start = stop
+    return arrays
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_events(path, primary_columns=PRIMARY_COLUMNS, all_columns=ALL_COLUMNS, compact=False, step_size=STEP_SIZE):
+    '''
+        Parameters:
+            path (string):                  path to a simulation output file
+            primary_columns (string array): PrimaryEvents columns to read
+            all_columns (string array):     AllEvents columns to read
+            compact (bool):                 compact dtype mode (see Info)
+            step_size (int):                number of entries read per chunk in compact mode
+
+        Returns:
+            events (dict):                  PrimaryEvents columns keyed by their names, and AllEvents columns keyed by
+                                            their names with an 'all_' prefix for fEvent/fDecayPDG ('all_fEvent', 'all_fDecayPDG').
+                                            AllEvents flags are keyed by their names, or packed in 'flags' in compact mode.
+
+        Info:
+            In compact mode the PrimaryEvents kinematics are read as float32 (fEvent stays int32), and the AllEvents flags
+            are packed into a single uint8 bitfield per event (use event_flag to read them back). This reduces the memory
+            of a configuration by more than half. In the default mode the columns keep their file dtypes (float64/int32).
+    '''
+    primary_columns = tuple(primary_columns)
+    all_columns = tuple(all_columns)
+    flag_columns = tuple(column for column in all_columns if column in FLAG_BITS)
+    other_columns = tuple(column for column in all_columns if column not in FLAG_BITS)
+
+    events = {}
+    with uproot.open(path) as file:
+        if not compact:
+            if primary_columns:
+                events.update(file["PrimaryEvents"].arrays(list(primary_columns), library="np"))
+            if all_columns:
+                for column, array in file["AllEvents"].arrays(list(all_columns), library="np").items():
+                    events[column if column in FLAG_BITS else 'all_' + column] = array
+            return events
+
+        if primary_columns:
+            dtypes = {column: (np.int32 if column == 'fEvent' else np.float32) for column in primary_columns}
+            events.update(_read_tree(file["PrimaryEvents"], primary_columns, dtypes, step_size))
+        if other_columns:
+            dtypes = {column: np.int32 for column in other_columns}
+            for column, array in _read_tree(file["AllEvents"], other_columns, dtypes, step_size).items():
+                events['all_' + column] = array
+        if flag_columns:
+            tree = file["AllEvents"]
+            flags = np.empty(tree.num_entries, dtype=np.uint8)
+            start = 0
+            for chunk in tree.iterate(list(flag_columns), step_size=step_size, library="np"):
+                stop = start + len(chunk[flag_columns[0]])
+                flags[start:stop] = pack_flags(chunk)
+                start = stop
+            events['flags'] = flags
+    return events
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def events_nbytes(events):
+    '''
+        Parameters:
+            events (dict):      event arrays returned by load_events
+
+        Returns:
+            nbytes (int):       memory held by the event arrays (in bytes)
+    '''
+    return sum(array.nbytes for array in events.values())
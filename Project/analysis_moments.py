@@ -0,0 +1,124 @@
+# File: analysis_moments.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import math
+
+
+# Mergeable moment accumulators (Welford/Chan)
+# Info: an accumulator holds the count, mean and sum of squared deviations (M2) of the finite entries seen so far.
+#       Chunks are reduced with one pass each, and two accumulators are combined with Chan's parallel formula:
+#           n = n_a + n_b,  delta = mean_b - mean_a
+#           mean = mean_a + delta*n_b/n
+#           M2 = M2_a + M2_b + delta^2*n_a*n_b/n
+#       so chunks, shards and worker processes can be merged in any order (exact up to float64 rounding).
+#=====================================================
+def make_moments():
+    '''
+        Parameters:
+
+        Returns:
+            moments (dict):             empty accumulator ('count', 'mean', 'm2', 'nan_count')
+    '''
+    return {'count': 0, 'mean': 0.0, 'm2': 0.0, 'nan_count': 0}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_moments(moments, other):
+    '''
+        Parameters:
+            moments (dict):             accumulator (updated in place)
+            other (dict):               accumulator to add
+
+        Returns:
+            moments (dict):             the merged accumulator
+    '''
+    n_a, n_b = moments['count'], other['count']
+    moments['nan_count'] += other['nan_count']
+    if n_b == 0:
+        return moments
+    if n_a == 0:
+        moments.update(count=n_b, mean=other['mean'], m2=other['m2'])
+        return moments
+    n = n_a + n_b
+    delta = other['mean'] - moments['mean']
+    moments['mean'] += delta*n_b/n
+    moments['m2'] += other['m2'] + delta*delta*n_a*n_b/n
+    moments['count'] = n
+    return moments
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def update_moments(moments, data):
+    '''
+        Parameters:
+            moments (dict):             accumulator (updated in place)
+            data (float array):         chunk of data (NaN/inf entries are counted in nan_count and ignored)
+
+        Returns:
+            moments (dict):             the updated accumulator
+    '''
+    data = np.asarray(data).ravel()
+    finite = np.isfinite(data)
+    n_finite = int(np.count_nonzero(finite))
+    chunk = {'count': n_finite, 'mean': 0.0, 'm2': 0.0, 'nan_count': len(data) - n_finite}
+    if n_finite > 0:
+        values = data if n_finite == len(data) else data[finite]
+        chunk['mean'] = float(np.mean(values, dtype=np.float64))
+        deviations = np.subtract(values, chunk['mean'], dtype=np.float64)
+        chunk['m2'] = float(np.dot(deviations, deviations))
+    return merge_moments(moments, chunk)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def moments_mean(moments):
+    '''
+        Parameters:
+            moments (dict):             accumulator
+
+        Returns:
+            mean (float):               mean of the finite entries (as np.nanmean), NaN if empty
+    '''
+    return moments['mean'] if moments['count'] > 0 else np.nan
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def moments_variance(moments, ddof=0):
+    '''
+        Parameters:
+            moments (dict):             accumulator
+            ddof (int):                 delta degrees of freedom (0 for the population variance, as np.nanvar)
+
+        Returns:
+            variance (float):           variance of the finite entries, NaN if count <= ddof
+    '''
+    return moments['m2']/(moments['count'] - ddof) if moments['count'] > ddof else np.nan
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def moments_std(moments, ddof=0):
+    '''
+        Parameters:
+            moments (dict):             accumulator
+            ddof (int):                 delta degrees of freedom (0 as np.nanstd)
+
+        Returns:
+            std_dev (float):            standard deviation of the finite entries
+    '''
+    return math.sqrt(moments_variance(moments, ddof)) if moments['count'] > ddof else np.nan
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def moments_rmse(moments):
+    '''
+        Parameters:
+            moments (dict):             accumulator
+
+        Returns:
+            rmse (float):               root mean squared deviation from the mean (as root_mean_squared_error(data, mean)
+                                        on the finite entries)
+    '''
+    return moments_std(moments, ddof=0)
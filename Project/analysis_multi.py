@@ -0,0 +1,96 @@
+# File: analysis_multi.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import sys
+from collections import OrderedDict
+from tqdm import tqdm
+
+from analysis_io import *
+from analysis_core import *
+from analysis_distributed import *
+from analysis_selections import *
+
+
+# Multi-configuration analysis (several plot configuration files, one pass over the data files)
+# Info: the grids of all the plot configuration files are merged into one list of data files. Each data file is read
+#       once, with the union of the columns needed by the configuration files that use it (full precision unless they
+#       all set COMPACT_DTYPES), and the events are selected and binned for each of these configuration files
+#       (e.g. reflected and transmitted particles, or different plot selections of the same DATA_SUBDIRECTORY).
+#       Every configuration file then gets the same outputs as the reduce step of analysis_distributed.py.
+#       The named selections of the [Selections] section of a configuration file (see analysis_selections.py) are
+#       evaluated on the same read and get their own outputs in plots/<DATA_SUBDIRECTORY>/selections/<name>/.
+#
+#       Usage:
+#           python3 analysis_multi.py <config_1> <config_2> ...
+#=====================================================
+def plan_data_files(all_options):
+    '''
+        Parameters:
+            all_options (list):         settings of each configuration file (see read_analysis_config)
+
+        Returns:
+            data_files (OrderedDict):   for each data file (in order of first use), the list of (configuration file index,
+                                        (particle, material, momentum, angle) index) that use it
+    '''
+    data_files = OrderedDict()
+    for config_index, options in enumerate(all_options):
+        grid = (len(options['PARTICLES']), len(options['MATERIALS']), len(options['MOMENTA']), len(options['ANGLES']))
+        for index in np.ndindex(grid):
+            data_files.setdefault(configuration_path(options, index), []).append((config_index, index))
+    return data_files
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def run_multi_config(config_files):
+    '''
+        Parameters:
+            config_files (string list): paths to the plot configuration files
+
+        Returns:
+            summaries (list):           summary of the grid of each configuration file, followed by those of its named selections
+
+        Info:
+            Raises FileNotFoundError if a data file is missing and ValueError if a data file is not valid
+    '''
+    analyses = []
+    for config_file in config_files:
+        options = read_analysis_config(config_file)
+        analyses.append((config_file, options))
+        analyses += [(config_file, selection_options(options, selection)) for selection in read_selections(options['config'])]
+    all_options = [options for _, options in analyses]
+    partials = [make_partial(options) for options in all_options]
+    data_files = plan_data_files(all_options)
+
+    for path, uses in tqdm(data_files.items(), leave=False, desc='DATA FILES', dynamic_ncols=True):
+        users = [all_options[config_index] for config_index in set(config_index for config_index, _ in uses)]
+        read_momenta = any(needs_momenta(options) for options in users)
+        compact = all(options['COMPACT_DTYPES'] for options in users)
+        ntuples = load_events(path, configuration_columns(read_momenta), ALL_COLUMNS, compact=compact)
+
+        for config_index, index in uses:
+            options = all_options[config_index]
+            momentum, theta_incident = options['MOMENTA'][index[2]], options['ANGLES'][index[3]]
+            if options['SELECTION'] is None:
+                selection = select_events(ntuples, momentum, theta_incident, options['TRANSMITTED_PARTICLES'])
+            else:
+                selection = select_named_events(ntuples, options['SELECTION'], momentum, theta_incident)
+            fill_partial(partials[config_index], options, index, selection, path)
+
+    summaries = []
+    for (config_file, options), partial in zip(analyses, partials):
+        partial['covered'][...] = True
+        summaries.append(finish_partial(options, partial, config_file))
+    return summaries
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Please include one or more configuration files")
+        sys.exit(1)
+    run_multi_config(sys.argv[1:])
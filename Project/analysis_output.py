@@ -0,0 +1,222 @@
+# File: analysis_output.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import matplotlib
+import os
+import sys
+import io
+import pickle
+import fnmatch
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Constants
+#=====================================================
+PLOT_BACKENDS = ('png', 'zip')                  # loose PNG files in plots/<DATA_SUBDIRECTORY>/, or a single archive of them
+PENDING_FIGURES_PER_WORKER = 4                  # figures queued per worker before the writer waits for the oldest one
+
+
+# Plot output (loose PNG files or a single archive)
+# Info: with PLOT_BACKEND = png (default) every figure is saved as its own PNG file, as before. With PLOT_BACKEND = zip,
+#       the figures of a run are written into one uncompressed zip archive (the PNGs are already compressed) instead of
+#       tens of thousands of small files, which are slow metadata operations on EOS. A figure is pickled when it is
+#       saved (so it can be closed right away) and rendered to PNG on a local process pool, while the main process
+#       carries on with the analysis; the rendered images are appended to the archive in the order they were saved.
+#       The archive is written to a temporary file and moved into place when the output is closed. Its central
+#       directory is the index: any image can be listed, read or extracted without reading the others.
+#
+#       Usage:
+#           python3 analysis_output.py list <plots.zip> [pattern]
+#           python3 analysis_output.py extract <plots.zip> <output_directory> [pattern ...]
+#=====================================================
+def read_plot_backend(config):
+    '''
+        Parameters:
+            config (ConfigParser):      parsed plot configuration file
+
+        Returns:
+            backend (string):           PLOT_BACKEND of the [Output] section (default: png)
+    '''
+    backend = config.get('Output', 'PLOT_BACKEND', fallback='png').strip().lower()
+    if backend not in PLOT_BACKENDS:
+        raise ValueError(f"Unknown PLOT_BACKEND {backend} (expected one of {', '.join(PLOT_BACKENDS)})")
+    return backend
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _init_render_worker():
+    '''
+        Parameters:
+
+        Returns:
+
+        Info:
+            Renders the figures of a worker process without a display
+    '''
+    matplotlib.use('Agg')
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _render_figure(pickled_figure):
+    '''
+        Parameters:
+            pickled_figure (bytes):     pickled matplotlib figure
+
+        Returns:
+            image (bytes):              PNG image of the figure
+    '''
+    import matplotlib.pyplot as plt
+    fig = pickle.loads(pickled_figure)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getvalue()
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def open_plot_output(folder, backend='png', archive_name='plots.zip', n_workers=None):
+    '''
+        Parameters:
+            folder (string):            directory of the plots (e.g. plots/<DATA_SUBDIRECTORY>)
+            backend (string):           one of PLOT_BACKENDS
+            archive_name (string):      name of the archive in folder (zip backend)
+            n_workers (int):            number of processes rendering the figures (zip backend, default: number of CPUs)
+
+        Returns:
+            output (dict):              plot output, passed to save_figure and close_plot_output
+    '''
+    if backend not in PLOT_BACKENDS:
+        raise ValueError(f"Unknown PLOT_BACKEND {backend} (expected one of {', '.join(PLOT_BACKENDS)})")
+    output = {'backend': backend, 'folder': folder}
+    if backend == 'zip':
+        n_workers = n_workers or os.cpu_count() or 1
+        output['path'] = os.path.join(folder, archive_name)
+        output['archive'] = zipfile.ZipFile(output['path'] + '.tmp', 'w', compression=zipfile.ZIP_STORED)
+        output['executor'] = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_render_worker)
+        output['pending'] = deque()
+        output['max_pending'] = PENDING_FIGURES_PER_WORKER*n_workers
+    return output
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _write_oldest(output):
+    '''
+        Parameters:
+            output (dict):              plot output (see open_plot_output)
+
+        Returns:
+
+        Info:
+            Waits for the oldest pending figure and appends its image to the archive
+    '''
+    name, future = output['pending'].popleft()
+    output['archive'].writestr(name, future.result())
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_figure(output, fig, path):
+    '''
+        Parameters:
+            output (dict):              plot output (see open_plot_output)
+            fig (matplotlib figure):    figure to save (can be closed once saved)
+            path (string):              path the PNG file would have (as for fig.savefig)
+
+        Returns:
+
+        Info:
+            With the zip backend the image is stored under the path relative to the folder of the output, with a .png
+            extension added if the path has none (as savefig would)
+    '''
+    if output['backend'] == 'png':
+        fig.savefig(path)
+        return
+    name = os.path.relpath(path, output['folder']).replace(os.sep, '/')
+    if not os.path.splitext(name)[1]:
+        name += '.png'
+    while len(output['pending']) >= output['max_pending']:
+        _write_oldest(output)
+    output['pending'].append((name, output['executor'].submit(_render_figure, pickle.dumps(fig))))
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def close_plot_output(output):
+    '''
+        Parameters:
+            output (dict):              plot output (see open_plot_output)
+
+        Returns:
+            path (string):              path of the archive (None for the png backend)
+    '''
+    if output['backend'] == 'png':
+        return None
+    while output['pending']:
+        _write_oldest(output)
+    output['executor'].shutdown()
+    output['archive'].close()
+    os.replace(output['path'] + '.tmp', output['path'])
+    return output['path']
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def list_plots(path, pattern='*'):
+    '''
+        Parameters:
+            path (string):              path of a plot archive
+            pattern (string):           shell-style pattern of the image names (e.g. 'histogram_theta_mu-_Copper_*')
+
+        Returns:
+            names (string list):        names of the matching images
+    '''
+    with zipfile.ZipFile(path) as archive:
+        return [name for name in archive.namelist() if fnmatch.fnmatch(name, pattern)]
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def read_plot(path, name):
+    '''
+        Parameters:
+            path (string):              path of a plot archive
+            name (string):              name of an image in the archive
+
+        Returns:
+            image (bytes):              PNG image (e.g. for matplotlib.image.imread(io.BytesIO(image)))
+    '''
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(name)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def extract_plots(path, output_directory, patterns=('*',)):
+    '''
+        Parameters:
+            path (string):              path of a plot archive
+            output_directory (string):  directory the images are extracted to
+            patterns (string list):     shell-style patterns of the images to extract
+
+        Returns:
+            names (string list):        names of the extracted images
+    '''
+    with zipfile.ZipFile(path) as archive:
+        names = [name for name in archive.namelist() if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+        for name in names:
+            archive.extract(name, output_directory)
+    return names
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    if len(sys.argv) in (3, 4) and sys.argv[1] == 'list':
+        for name in list_plots(*sys.argv[2:]):
+            print(name)
+    elif len(sys.argv) >= 4 and sys.argv[1] == 'extract':
+        names = extract_plots(sys.argv[2], sys.argv[3], sys.argv[4:] or ('*',))
+        print(f"{len(names)} images extracted to {sys.argv[3]}")
+    else:
+        print("Usage: python3 analysis_output.py list <plots.zip> [pattern] | extract <plots.zip> <output_directory> [pattern ...]")
+        sys.exit(1)
@@ -0,0 +1,158 @@
+# File: analysis_phase_space.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import math
+
+
+# Constants
+#=====================================================
+PHASE_SPACE_VARIABLES = ('x', 'xp', 'y', 'yp', 'p')   # position (mm), slope (mrad) in each transverse plane, and momentum (MeV/c)
+PLANES = ('x', 'y')                                 # transverse planes (slopes 'xp' and 'yp')
+PARTICLE_MASSES = {'mu-': 105.6583755, 'mu+': 105.6583755, 'e-': 0.51099895, 'e+': 0.51099895, 'pi-': 139.57039,
+                   'pi+': 139.57039, 'proton': 938.27208816}    # masses used for the normalized emittance (in MeV/c^2)
+BEAM_PARAMETER_NAMES = tuple(f'{name}_{plane}' for plane in PLANES for name in ('sigma', 'divergence', 'emittance', 'normalized_emittance', 'alpha', 'beta', 'gamma'))
+
+
+# Mergeable second moments of the transverse phase space
+# Info: the multivariate form of the accumulators of analysis_moments.py: count, mean vector and co-moment matrix
+#       (sum of the outer products of the deviations from the mean) of (x, x', y, y', p), where the slopes are taken
+#       relative to the beam direction (x' = P_x/|P_z|, so a beam along -z, as in the capillary, has the same sign
+#       convention as one along +z). Chunks are reduced in one pass each, and accumulators of chunks, files or worker
+#       processes are combined with Chan's formula
+#           C = C_a + C_b + outer(delta, delta)*n_a*n_b/n
+#       From the 2x2 covariance of a plane (<x^2>, <xx'>, <x'^2>), the RMS emittance and Twiss parameters are
+#           emittance = sqrt(<x^2><x'^2> - <xx'>^2),  beta = <x^2>/emittance,  alpha = -<xx'>/emittance,  gamma = <x'^2>/emittance
+#       and the normalized emittance is <p>/m times the emittance.
+#=====================================================
+def make_phase_space():
+    '''
+        Parameters:
+
+        Returns:
+            phase_space (dict):         empty accumulator ('count', 'mean', 'comoment', 'nan_count')
+    '''
+    n = len(PHASE_SPACE_VARIABLES)
+    return {'count': np.zeros((), dtype=np.int64), 'mean': np.zeros(n), 'comoment': np.zeros((n, n)), 'nan_count': np.zeros((), dtype=np.int64)}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_phase_space(phase_space, other):
+    '''
+        Parameters:
+            phase_space (dict):         accumulator (updated in place)
+            other (dict):               accumulator to add
+
+        Returns:
+            phase_space (dict):         the merged accumulator
+    '''
+    n_a, n_b = int(phase_space['count']), int(other['count'])
+    phase_space['nan_count'] += other['nan_count']
+    if n_b == 0:
+        return phase_space
+    if n_a == 0:
+        phase_space['mean'][:] = other['mean']
+        phase_space['comoment'][:] = other['comoment']
+        phase_space['count'] += n_b
+        return phase_space
+    n = n_a + n_b
+    delta = other['mean'] - phase_space['mean']
+    phase_space['mean'] += delta*n_b/n
+    phase_space['comoment'] += other['comoment'] + np.outer(delta, delta)*n_a*n_b/n
+    phase_space['count'] += n_b
+    return phase_space
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def update_phase_space(phase_space, x, y, p_x, p_y, p_z):
+    '''
+        Parameters:
+            phase_space (dict):         accumulator (updated in place)
+            x (float array):            x positions of a chunk of particles (in mm)
+            y (float array):            y positions (in mm)
+            p_x (float array):          x momenta (in MeV/c)
+            p_y (float array):          y momenta (in MeV/c)
+            p_z (float array):          z momenta (in MeV/c)
+
+        Returns:
+            phase_space (dict):         the updated accumulator
+
+        Info:
+            Particles with a non-finite coordinate (e.g. P_z = 0) are counted in nan_count and ignored
+    '''
+    x, y, p_x, p_y, p_z = (np.asarray(column, dtype=np.float64) for column in (x, y, p_x, p_y, p_z))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_forward = np.abs(p_z)
+        columns = np.stack([x, 1e3*p_x/p_forward, y, 1e3*p_y/p_forward, np.sqrt(np.square(p_x) + np.square(p_y) + np.square(p_z))])
+    finite = np.isfinite(columns).all(axis=0)
+    n_finite = int(np.count_nonzero(finite))
+    chunk = make_phase_space()
+    chunk['nan_count'] += columns.shape[1] - n_finite
+    if n_finite > 0:
+        values = columns if n_finite == columns.shape[1] else columns[:, finite]
+        chunk['count'] += n_finite
+        chunk['mean'][:] = values.mean(axis=1)
+        deviations = values - chunk['mean'][:, None]
+        chunk['comoment'][:] = deviations @ deviations.T
+    return merge_phase_space(phase_space, chunk)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def phase_space_covariance(phase_space):
+    '''
+        Parameters:
+            phase_space (dict):         accumulator
+
+        Returns:
+            covariance (float 2d array): population covariance matrix of (x, x', y, y', p) (NaN if empty)
+    '''
+    count = int(phase_space['count'])
+    if count == 0:
+        return np.full_like(phase_space['comoment'], np.nan)
+    return phase_space['comoment']/count
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def twiss_parameters(phase_space, plane):
+    '''
+        Parameters:
+            phase_space (dict):         accumulator
+            plane (string):             'x' or 'y'
+
+        Returns:
+            twiss (dict):               RMS 'sigma' (mm), 'divergence' (mrad), 'emittance' (mm mrad), 'alpha', 'beta' (m)
+                                        and 'gamma' (1/m) of the plane (NaN if there are no particles or the emittance is 0)
+    '''
+    position = PHASE_SPACE_VARIABLES.index(plane)
+    slope = PHASE_SPACE_VARIABLES.index(plane + 'p')
+    covariance = phase_space_covariance(phase_space)
+    xx, xxp, xpxp = covariance[position, position], covariance[position, slope], covariance[slope, slope]
+    emittance = math.sqrt(max(xx*xpxp - xxp*xxp, 0.0)) if np.isfinite(xx) else np.nan
+    twiss = {'sigma': math.sqrt(xx) if np.isfinite(xx) else np.nan, 'divergence': math.sqrt(xpxp) if np.isfinite(xpxp) else np.nan,
+             'emittance': emittance, 'alpha': np.nan, 'beta': np.nan, 'gamma': np.nan}
+    if np.isfinite(emittance) and emittance > 0:
+        twiss.update(alpha=-xxp/emittance, beta=xx/emittance, gamma=xpxp/emittance)   # mm/mrad = m and mrad/mm = 1/m
+    return twiss
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def beam_parameters(phase_space, mass=None):
+    '''
+        Parameters:
+            phase_space (dict):         accumulator
+            mass (float):               mass of the particle (in MeV/c^2, None: no normalized emittance)
+
+        Returns:
+            parameters (dict):          BEAM_PARAMETER_NAMES of both planes (see twiss_parameters), the normalized
+                                        emittances (<p>/m times the emittance, in mm mrad) and the 'count' of particles
+    '''
+    parameters = {'count': int(phase_space['count'])}
+    mean_momentum = phase_space['mean'][PHASE_SPACE_VARIABLES.index('p')] if parameters['count'] > 0 else np.nan
+    for plane in PLANES:
+        twiss = twiss_parameters(phase_space, plane)
+        twiss['normalized_emittance'] = twiss['emittance']*mean_momentum/mass if mass else np.nan
+        parameters.update({f'{name}_{plane}': twiss[name] for name in twiss})
+    return parameters
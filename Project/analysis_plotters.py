@@ -10,13 +10,76 @@ from scipy import stats, optimize
 import scipy as sc
 import matplotlib.pyplot as plt
 import matplotlib.colors as colors
+from matplotlib.patches import StepPatch
+from matplotlib.legend_handler import HandlerPatch
 
 from analysis_helpers import *
+from analysis_store import init_momentum_angle_histogram, fill_momentum_angle_histogram
+from analysis_decays import DECAY_STAGES, pdg_name
+
+
+# Functions to draw histograms from precomputed bin counts
+#=====================================================
+STEP_LEGEND_HANDLER = {StepPatch: HandlerPatch()}      # legend entry of ax.stairs drawn as a box, as for ax.hist(histtype='step')
+
+def stairs_histogram(ax_h, counts, edges, density=True, **kwargs):
+    '''
+        Parameters:
+            ax_h (matplotlib axes):         axes of plot
+            counts (float array):           bin counts
+            edges (float array):            bin edges
+            density (bool):                 normalize the counts to a probability density (as ax.hist(density=True))
+            kwargs:                         style arguments passed to ax.stairs (color, linewidth, label, ...)
+
+        Returns:
+            n (float array):                the values of the histogram bins
+
+        Info:
+            Draws the same step outline as ax.hist(histtype='step'), at a cost independent of the number of events
+    '''
+    counts = np.asarray(counts, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    n = counts
+    if density:
+        total = np.sum(counts)
+        n = counts/(total*np.diff(edges)) if total > 0 else np.zeros_like(counts)
+    ax_h.stairs(n, edges, baseline=0, fill=False, **kwargs)
+    return n
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def pcolormesh_histogram2d(ax_h, counts, x_edges, y_edges, density=True, **kwargs):
+    '''
+        Parameters:
+            ax_h (matplotlib axes):         axes of plot
+            counts (float 2d array):        (x bins x y bins) bin counts
+            x_edges (float array):          bin edges along x
+            y_edges (float array):          bin edges along y
+            density (bool):                 normalize the counts to a probability density (as ax.hist2d(density=True))
+            kwargs:                         style arguments passed to ax.pcolormesh (cmap, norm, ...)
+
+        Returns:
+            hist (tuple):                   (values, x_edges, y_edges, mesh), as returned by ax.hist2d
+
+        Info:
+            Draws the same mesh as ax.hist2d, at a cost independent of the number of events
+    '''
+    counts = np.asarray(counts, dtype=float)
+    x_edges = np.asarray(x_edges, dtype=float)
+    y_edges = np.asarray(y_edges, dtype=float)
+    h = counts
+    if density:
+        total = np.sum(counts)
+        h = counts/(total*np.outer(np.diff(x_edges), np.diff(y_edges))) if total > 0 else np.zeros_like(counts)
+    mesh = ax_h.pcolormesh(x_edges, y_edges, h.T, **kwargs)
+    ax_h.set_xlim(x_edges[0], x_edges[-1])
+    ax_h.set_ylim(y_edges[0], y_edges[-1])
+    return h, x_edges, y_edges, mesh
 
 
 # Functions to setup and make plots for analysis.py
 #=====================================================
-def setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident, refl_trans_string):
+def setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident, refl_trans_string, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             ax_h (matplotlib axes):         axes of plot
@@ -26,6 +89,9 @@ def setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident,
             std_dev_ (float):               standard deviation of thetas of reflected/transmitted particles (i.e. std dev of raw data)
             theta_incident (float):         incident theta of particle
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of thetas (e.g. bin counts when thetas are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
             setup (array):                  [the values of the histogram bins]
@@ -46,7 +112,10 @@ def setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident,
 
     # Plot histogram
     range_theta = (0,90)
-    n, bins, _ = ax_h.hist(thetas, bins='auto', range=range_theta, density=True, histtype='step', color='blue', linewidth=1, label=f"$\sigma: {std_dev_:.2f}$")
+    if counts is None:
+        n, bins, _ = ax_h.hist(thetas, bins=bins, range=range_theta, weights=weights, density=True, histtype='step', color='blue', linewidth=1, label=f"$\sigma: {std_dev_:.2f}$")
+    else:
+        n = stairs_histogram(ax_h, counts, bins, density=True, color='blue', linewidth=1, label=f"$\sigma: {std_dev_:.2f}$")
     
     # Plot mean, mode, and incident theta
     ax_h.axvline(mean_, 0, 1, color='black', linestyle='dashed', linewidth=1, label=f"Mean: {mean_:.2f}")
@@ -66,7 +135,7 @@ def setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident,
     ax_h.yaxis.tick_left()
     
     # Make legend
-    ax_h.legend(fontsize=8)
+    ax_h.legend(fontsize=8, handler_map=STEP_LEGEND_HANDLER)
 
     # Return setup (array of anything needed from this function)
     setup = [n]
@@ -74,7 +143,7 @@ def setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident,
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_theta_histogram(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_theta_histogram(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             fig_h (matplotlib figure):      figure of plot
@@ -91,6 +160,9 @@ def make_theta_histogram(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle,
             refl_trans (int):               number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
         
@@ -98,13 +170,13 @@ def make_theta_histogram(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle,
             Runs setup function to make histogram, adds title for individual histogram and adjusts height of max bin
 
     '''
-    setup = setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident, refl_trans_string)
+    setup = setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident, refl_trans_string, bins, weights, counts)
     ax_h.set_title(f"Particle: {particle}, Material: {material_name}, Momentum: {momentum}MeV/c, Theta: {theta_incident}deg \nEvents: Total={total}, {refl_trans_string}={refl_trans}, Thickness: {thickness:.2f}mm", fontsize=11)
     ax_h.set_ylim([0,1.01*np.max(setup[0])])
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_theta_histogram_a(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_theta_histogram_a(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             fig_h (matplotlib figure):      figure of plot
@@ -121,6 +193,9 @@ def make_theta_histogram_a(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle
             refl_trans (int):               number of reflected/transmitted particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
         
@@ -128,12 +203,12 @@ def make_theta_histogram_a(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle
             Runs setup function to make histogram and adds title for array of histograms
 
     '''
-    _ = setup_theta_histogram(fig_h, ax_h, thetas, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string)
+    _ = setup_theta_histogram(ax_h, thetas, mode_, mean_, std_dev_, theta_incident, refl_trans_string, bins, weights, counts)
     ax_h.set_title(f"Momentum: {momentum}MeV/c, Theta: {theta_incident}deg\nN {refl_trans_string}: {refl_trans}, Thickness: {thickness:.2f}mm", fontsize=11)
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string):
+def setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             ax_h (matplotlib axes):         axes of plot
@@ -142,6 +217,9 @@ def setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string):
             mean_ (float):                  mean of phis of reflected/transmitted particles (i.e. mean of raw data)
             std_dev_ (float):               standard deviation of phis of reflected/transmitted particles (i.e. std dev of raw data)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of phis (e.g. bin counts when phis are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
             setup (array):                  [the values of the histogram bins]
@@ -150,7 +228,10 @@ def setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string):
             Makes a histogram of the output phi distribution of one configuration of the scattering simulation
     '''
     # Plot histogram
-    n, bins, _ = ax_h.hist(phis, bins='auto', range=(0,360), density=True, histtype='step', color='blue', linewidth=1, label=f"$\sigma: {std_dev_:.2f}$")
+    if counts is None:
+        n, bins, _ = ax_h.hist(phis, bins=bins, range=(0,360), weights=weights, density=True, histtype='step', color='blue', linewidth=1, label=f"$\sigma: {std_dev_:.2f}$")
+    else:
+        n = stairs_histogram(ax_h, counts, bins, density=True, color='blue', linewidth=1, label=f"$\sigma: {std_dev_:.2f}$")
     
     # Plot mean, mode, and incident phi
     ax_h.axvline(mean_, 0, 1, color='black', linestyle='dashed', linewidth=1, label=f"Mean: {mean_:.2f}")
@@ -170,7 +251,7 @@ def setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string):
     ax_h.yaxis.tick_left()
     
     # Make legend
-    ax_h.legend(fontsize=8)
+    ax_h.legend(fontsize=8, handler_map=STEP_LEGEND_HANDLER)
 
     # Return setup (array of anything needed from this function)
     setup = [n]
@@ -178,7 +259,7 @@ def setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string):
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_phi_histogram(fig_h, ax_h, phis, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_phi_histogram(fig_h, ax_h, phis, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             fig_h (matplotlib figure):      figure of plot
@@ -195,6 +276,9 @@ def make_phi_histogram(fig_h, ax_h, phis, mode_, mean_, std_dev_, particle, mate
             refl_trans (int):               number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
         
@@ -202,13 +286,13 @@ def make_phi_histogram(fig_h, ax_h, phis, mode_, mean_, std_dev_, particle, mate
             Runs setup function to make histogram, adds title for individual histogram and adjusts height of max bin
 
     '''
-    setup = setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string)
+    setup = setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string, bins, weights, counts)
     ax_h.set_title(f"Particle: {particle}, Material: {material_name}, Momentum: {momentum}MeV/c, Theta: {theta_incident}deg \nEvents: Total={total}, {refl_trans_string}={refl_trans}, Thickness: {thickness:.2f}mm", fontsize=11)
     ax_h.set_ylim([0,1.01*np.max(setup[0])])
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_phi_histogram_a(fig_h, ax_h, phis, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_phi_histogram_a(fig_h, ax_h, phis, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             fig_h (matplotlib figure):      figure of plot
@@ -225,6 +309,9 @@ def make_phi_histogram_a(fig_h, ax_h, phis, mode_, mean_, std_dev_, particle, ma
             refl_trans (int):               number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
         
@@ -232,12 +319,12 @@ def make_phi_histogram_a(fig_h, ax_h, phis, mode_, mean_, std_dev_, particle, ma
             Runs setup function to make histogram and adds title for array of histograms
 
     '''
-    _ = setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string)
+    _ = setup_phi_histogram(ax_h, phis, mode_, mean_, std_dev_, refl_trans_string, bins, weights, counts)
     ax_h.set_title(f"Momentum: {momentum}MeV/c, Theta: {theta_incident}deg\nN {refl_trans_string}: {refl_trans}, Thickness: {thickness:.2f}mm", fontsize=11)
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, refl_trans_string):
+def setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, refl_trans_string, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             ax_h (matplotlib axes):         axes of plot
@@ -247,6 +334,9 @@ def setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, re
             std_dev_ (float):               standard deviation of thetas of reflected/transmitted particles (i.e. std dev of raw data)
             momentum (float):               momentum of incident particle
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of momenta (e.g. bin counts when momenta are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
             setup (array):                  [the values of the histogram bins]
@@ -255,7 +345,10 @@ def setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, re
             Makes a histogram of the output momentum distribution of one configuration of the scattering simulation
     '''
     # Plot histogram
-    n, bins, _ = ax_h.hist(momenta, bins='auto', range=(0, momentum), density=True, histtype='step', color='blue', linewidth=1, label=f"$\sigma$: {std_dev_:.2f} MeV/c")
+    if counts is None:
+        n, bins, _ = ax_h.hist(momenta, bins=bins, range=(0, momentum), weights=weights, density=True, histtype='step', color='blue', linewidth=1, label=f"$\sigma$: {std_dev_:.2f} MeV/c")
+    else:
+        n = stairs_histogram(ax_h, counts, bins, density=True, color='blue', linewidth=1, label=f"$\sigma$: {std_dev_:.2f} MeV/c")
     
     # Plot mean, mode, and incident theta
     ax_h.axvline(mean_, 0, 1, color='black', linestyle='dashed', linewidth=1, label=f"Mean: {mean_:.2f} MeV/c ({(mean_/momentum)*100:.2f}% of Incident)")
@@ -275,7 +368,7 @@ def setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, re
     ax_h.yaxis.tick_left()
     
     # Make legend
-    ax_h.legend(fontsize=8)
+    ax_h.legend(fontsize=8, handler_map=STEP_LEGEND_HANDLER)
     
     # Return setup (array of anything needed from this function)
     setup = [n]
@@ -283,7 +376,7 @@ def setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, re
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_momentum_histogram(fig_h, ax_h, momenta, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_momentum_histogram(fig_h, ax_h, momenta, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             fig_h (matplotlib figure):      figure of plot
@@ -300,19 +393,22 @@ def make_momentum_histogram(fig_h, ax_h, momenta, mode_, mean_, std_dev_, partic
             refl_trans (int):               number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
         
         Info:
             Runs setup function to make histogram, adds title for individual histogram and adjusts height of max bin
     '''
-    setup = setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, refl_trans_string)
+    setup = setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, refl_trans_string, bins, weights, counts)
     ax_h.set_ylim([0,1.01*np.max(setup[0])])
     ax_h.set_title(f"Particle: {particle}, Material: {material_name}, Momentum: {momentum}MeV/c, Theta: {theta_incident}deg \nEvents: Total={total}, {refl_trans_string}={refl_trans}, Thickness: {thickness:.2f}mm", fontsize=11)
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_momentum_histogram_a(fig_h, ax_h, momenta, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_momentum_histogram_a(fig_h, ax_h, momenta, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             fig_h (matplotlib figure):      figure of plot
@@ -329,20 +425,23 @@ def make_momentum_histogram_a(fig_h, ax_h, momenta, mode_, mean_, std_dev_, part
             refl_trans (int):               number of reflected/transmitted particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
         
         Info:
             Runs setup function to make histogram and adds title for array of histograms
     '''
-    _ = setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, refl_trans_string)
+    _ = setup_momentum_histogram(ax_h, momenta, mode_, mean_, std_dev_, momentum, refl_trans_string, bins, weights, counts)
     ax_h.set_title(f"Momentum: {momentum}MeV/c, Theta: {theta_incident}deg \nN {refl_trans_string}={refl_trans}, Thickness: {thickness:.2f}mm", fontsize=11)
     
     
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def setup_alpha_histogram(ax_h, alphas, mode_, mean_, std_dev_):
+def setup_alpha_histogram(ax_h, alphas, mode_, mean_, std_dev_, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             ax_h (matplotlib axes):         axes of plot
@@ -350,6 +449,9 @@ def setup_alpha_histogram(ax_h, alphas, mode_, mean_, std_dev_):
             mode_ (float):                  mode of alphas (center of maximum histogram bin)
             mean_ (float):                  mean of alphas of reflected particles (i.e. mean of raw data)
             std_dev_ (float):               standard deviation of alphas of reflected particles (i.e. std dev of raw data)
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of alphas (e.g. bin counts when alphas are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
             setup (array):                  [the values of the histogram bins]
@@ -358,7 +460,10 @@ def setup_alpha_histogram(ax_h, alphas, mode_, mean_, std_dev_):
             Makes a histogram of the alpha distribution of one configuration of the scattering simulation
     '''
     # Plot histogram
-    n, bins, _ = ax_h.hist(alphas, bins='auto', density=False, histtype='step', color='blue', linewidth=1, label=f"$\sigma$: {std_dev_:.2f}")
+    if counts is None:
+        n, bins, _ = ax_h.hist(alphas, bins=bins, weights=weights, density=False, histtype='step', color='blue', linewidth=1, label=f"$\sigma$: {std_dev_:.2f}")
+    else:
+        n = stairs_histogram(ax_h, counts, bins, density=False, color='blue', linewidth=1, label=f"$\sigma$: {std_dev_:.2f}")
     
     # Plot mean, mode, and incident theta
     ax_h.axvline(mean_, 0, 1, color='black', linestyle='dashed', linewidth=1, label=f"Mean: {mean_:.2f}")
@@ -377,7 +482,7 @@ def setup_alpha_histogram(ax_h, alphas, mode_, mean_, std_dev_):
     ax_h.yaxis.tick_left()
     
     # Make legend
-    ax_h.legend(fontsize=8)
+    ax_h.legend(fontsize=8, handler_map=STEP_LEGEND_HANDLER)
     
     # Return setup (array of anything needed from this function)
     setup = [n]
@@ -385,7 +490,7 @@ def setup_alpha_histogram(ax_h, alphas, mode_, mean_, std_dev_):
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_alpha_histogram(fig_h, ax_h, alphas, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, reflected, thickness):
+def make_alpha_histogram(fig_h, ax_h, alphas, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, reflected, thickness, bins='auto', weights=None, counts=None):
     '''
         Parameters:
             fig_h (matplotlib figure):      figure of plot
@@ -401,19 +506,22 @@ def make_alpha_histogram(fig_h, ax_h, alphas, mode_, mean_, std_dev_, particle,
             total (int):                    total number of particles for configuration
             reflected (int):                total number of alpha measurements
             thickness (float):              thickness of the plate (in mm)
+            bins (string or float array):   binning of the histogram ('auto' or bin edges)
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            counts (float array):           precomputed bin counts (bins are then the bin edges and the data are ignored), None to bin the raw data
 
         Returns:
         
         Info:
             Runs setup function to make histogram, adds title for individual histogram and adjusts height of max bin
     '''
-    setup = setup_alpha_histogram(ax_h, alphas, mode_, mean_, std_dev_)
+    setup = setup_alpha_histogram(ax_h, alphas, mode_, mean_, std_dev_, bins, weights, counts)
     ax_h.set_ylim([0,1.01*np.max(setup[0])])
     ax_h.set_title(f"Particle: {particle}, Material: {material_name}, Momentum: {momentum}MeV/c\, Theta: {theta_incident}deg\n Events: Total={total}, Reflected={reflected}, Thickness: {thickness:.2f}mm", fontsize=11)
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def setup_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string):
+def setup_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, bins=None, weights=None, correlation=None, counts=None):
     '''
         Parameters:
             fig_h_cor (matplotlib figure):  figure of plot
@@ -427,6 +535,10 @@ def setup_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, mome
             total (int):                    total number of particles for configuration
             refl_trans (int):               number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
+            bins ([float array, float array]):  theta and momentum/phi bin edges, None for 'auto' binning of the raw data
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            correlation (float):            precomputed Pearson correlation, None to compute it from the raw data
+            counts (float 2d array):        precomputed (theta x momentum/phi) bin counts on the bin edges given in bins, None to bin the raw data
 
         Returns:
             setup (matplotlib histogram):   2d matplotlib histogram
@@ -436,22 +548,28 @@ def setup_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, mome
     '''
     
     # Compute Correlation (Pearson)
-    correlation = np.corrcoef(thetas, momenta)
+    if correlation is None:
+        correlation = np.corrcoef(thetas, momenta)[0][1]
     
     # Setup Histogram
-    range_theta = (0,90)
-    counts_theta, bins_theta = np.histogram(thetas, bins='auto', range=range_theta, density = False)
-    counts_momentum, bins_momentum = np.histogram(momenta, bins='auto', range=(0,momentum), density = False)
-    hist = ax_h_cor.hist2d(thetas, momenta, bins=[bins_theta, bins_momentum], cmap='Greys',density = True, norm=colors.LogNorm())
+    if bins is None:
+        range_theta = (0,90)
+        bins_theta = auto_bin_edges(thetas, range=range_theta)
+        bins_momentum = auto_bin_edges(momenta, range=(0,momentum))
+        bins = [bins_theta, bins_momentum]
+    if counts is None:
+        hist = ax_h_cor.hist2d(thetas, momenta, bins=bins, weights=weights, cmap='Greys',density = True, norm=colors.LogNorm())
+    else:
+        hist = pcolormesh_histogram2d(ax_h_cor, counts, bins[0], bins[1], density=True, cmap='Greys', norm=colors.LogNorm())
     ax_h_cor.set_ylabel(f"{refl_trans_string} Momentum (MeV/c)", fontsize=10)
     ax_h_cor.set_xlabel(f"{refl_trans_string} Theta (deg)", fontsize=10)
     
-    setup = [hist, correlation[0][1]]
+    setup = [hist, correlation]
     return setup
     
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=None, weights=None, correlation=None, counts=None):
     '''
         Parameters:
             fig_h_cor (matplotlib figure):  figure of plot
@@ -466,13 +584,17 @@ def make_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momen
             refl_trans (int):               number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins ([float array, float array]):  theta and momentum/phi bin edges, None for 'auto' binning of the raw data
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            correlation (float):            precomputed Pearson correlation, None to compute it from the raw data
+            counts (float 2d array):        precomputed (theta x momentum/phi) bin counts on the bin edges given in bins, None to bin the raw data
 
         Returns:
             
         Info:
             Runs setup function for 2d histogram, adds title for individual 2d histogram and adds a colorbar + label
     '''
-    setup = setup_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans)
+    setup = setup_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, bins, weights, correlation, counts)
     ax_h_cor.set_title(f"Particle: {particle}, Material: {material_name}, Momentum: {momentum}MeV/c, Theta: {theta_incident}deg \nEvents: Total={total}, {refl_trans_string}={refl_trans}, Thickness: {thickness:.2f}mm, Corr: {setup[1]:.2f}", fontsize=11)
     
     # Add color bar for the intensity scale
@@ -481,7 +603,7 @@ def make_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, thetas, momen
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_correlation_theta_momentum_histogram_a(fig_cor_array, axes_cor_array, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_correlation_theta_momentum_histogram_a(fig_cor_array, axes_cor_array, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=None, weights=None, correlation=None, counts=None):
     '''
         Parameters:
             fig_cor_array (matplotlib figure):  figure of plot
@@ -496,20 +618,24 @@ def make_correlation_theta_momentum_histogram_a(fig_cor_array, axes_cor_array, t
             refl_trans (int):                   number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins ([float array, float array]):  theta and momentum/phi bin edges, None for 'auto' binning of the raw data
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            correlation (float):            precomputed Pearson correlation, None to compute it from the raw data
+            counts (float 2d array):        precomputed (theta x momentum/phi) bin counts on the bin edges given in bins, None to bin the raw data
 
         Returns:
             setup[0] (2d histogram):           2d histogram (for purposes of aligning the array colorbar with all the histograms in the array)
         Info:
             Runs setup function for 2d histogram and adds title for array of 2d histogram
     '''
-    setup = setup_correlation_theta_momentum_histogram(fig_cor_array, axes_cor_array, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans)
+    setup = setup_correlation_theta_momentum_histogram(fig_cor_array, axes_cor_array, thetas, momenta, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, bins, weights, correlation, counts)
     axes_cor_array.set_title(f"Momentum: {momentum}MeV/c, Theta: {theta_incident}deg \nN {refl_trans_string}={refl_trans}, Thickness: {thickness:.2f}mm, Corr: {setup[1]:.2f}", fontsize=11)
     
     return setup[0]
     
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def setup_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string):
+def setup_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, bins=None, weights=None, correlation=None, counts=None):
     '''
         Parameters:
             fig_h_cor (matplotlib figure):  figure of plot
@@ -523,6 +649,10 @@ def setup_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, par
             total (int):                    total number of particles for configuration
             refl_trans (int):               number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
+            bins ([float array, float array]):  theta and momentum/phi bin edges, None for 'auto' binning of the raw data
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            correlation (float):            precomputed Pearson correlation, None to compute it from the raw data
+            counts (float 2d array):        precomputed (theta x momentum/phi) bin counts on the bin edges given in bins, None to bin the raw data
 
         Returns:
             setup (matplotlib histogram):   2d matplotlib histogram
@@ -532,23 +662,29 @@ def setup_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, par
     '''
     
     # Compute Correlation (Pearson)
-    correlation = np.corrcoef(thetas, phis)
+    if correlation is None:
+        correlation = np.corrcoef(thetas, phis)[0][1]
     
     # Setup Histogram
-    range_theta = (0,90)
-    range_phi = (0,360)
-    counts_theta, bins_theta = np.histogram(thetas, bins='auto', range=range_theta, density = False)
-    counts_phi, bins_phi = np.histogram(phis, bins='auto', range=range_phi, density = False)
-    hist = ax_h_cor.hist2d(thetas, phis, bins=[bins_theta, bins_phi], cmap='Greys',density = True, norm=colors.LogNorm())
+    if bins is None:
+        range_theta = (0,90)
+        range_phi = (0,360)
+        bins_theta = auto_bin_edges(thetas, range=range_theta)
+        bins_phi = auto_bin_edges(phis, range=range_phi)
+        bins = [bins_theta, bins_phi]
+    if counts is None:
+        hist = ax_h_cor.hist2d(thetas, phis, bins=bins, weights=weights, cmap='Greys',density = True, norm=colors.LogNorm())
+    else:
+        hist = pcolormesh_histogram2d(ax_h_cor, counts, bins[0], bins[1], density=True, cmap='Greys', norm=colors.LogNorm())
     ax_h_cor.set_ylabel(f"{refl_trans_string} Phi (deg)", fontsize=10)
     ax_h_cor.set_xlabel(f"{refl_trans_string} Theta (deg)", fontsize=10)
     
-    setup = [hist, correlation[0][1]]
+    setup = [hist, correlation]
     return setup
     
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=None, weights=None, correlation=None, counts=None):
     '''
         Parameters:
             fig_h_cor (matplotlib figure):  figure of plot
@@ -564,13 +700,17 @@ def make_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, part
             refl_trans (int):               number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins ([float array, float array]):  theta and momentum/phi bin edges, None for 'auto' binning of the raw data
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            correlation (float):            precomputed Pearson correlation, None to compute it from the raw data
+            counts (float 2d array):        precomputed (theta x momentum/phi) bin counts on the bin edges given in bins, None to bin the raw data
 
         Returns:
             
         Info:
             Runs setup function for 2d histogram, adds title for individual 2d histogram and adds a colorbar + label
     '''
-    setup = setup_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans)
+    setup = setup_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, bins, weights, correlation, counts)
     ax_h_cor.set_title(f"Particle: {particle}, Material: {material_name}, Momentum: {momentum}MeV/c, Theta: {theta_incident}deg \nEvents: Total={total}, {refl_trans_string}={refl_trans}, Thickness: {thickness:.2f}mm, Corr: {setup[1]:.2f}", fontsize=11)
     
     # Add color bar for the intensity scale
@@ -579,7 +719,7 @@ def make_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, thetas, phis, part
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
-def make_correlation_theta_phi_histogram_a(fig_cor_array, ax_cor_array, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+def make_correlation_theta_phi_histogram_a(fig_cor_array, ax_cor_array, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=None, weights=None, correlation=None, counts=None):
     '''
         Parameters:
             fig_cor_array (matplotlib figure):  figure of plot
@@ -594,13 +734,17 @@ def make_correlation_theta_phi_histogram_a(fig_cor_array, ax_cor_array, thetas,
             refl_trans (int):                   number of reflected/transmited particles for configuration (excluding decayed particles)
             refl_trans_string (int):        string corresponding to whether the plots are for reflected or transmitted particles
             thickness (float):              thickness of the plate (in mm)
+            bins ([float array, float array]):  theta and momentum/phi bin edges, None for 'auto' binning of the raw data
+            weights (float array):          weights of the data (e.g. bin counts when the data are bin centers), None for raw data
+            correlation (float):            precomputed Pearson correlation, None to compute it from the raw data
+            counts (float 2d array):        precomputed (theta x momentum/phi) bin counts on the bin edges given in bins, None to bin the raw data
 
         Returns:
             setup[0] (2d histogram):           2d histogram (for purposes of aligning the array colorbar with all the histograms in the array)
         Info:
             Runs setup function for 2d histogram and adds title for array of 2d histogram
     '''
-    setup = setup_correlation_theta_phi_histogram(fig_cor_array, ax_cor_array, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans)
+    setup = setup_correlation_theta_phi_histogram(fig_cor_array, ax_cor_array, thetas, phis, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, bins, weights, correlation, counts)
     ax_cor_array.set_title(f"Momentum: {momentum}MeV/c, Theta: {theta_incident}deg \nN {refl_trans_string}={refl_trans}, Thickness: {thickness:.2f}mm, Corr: {setup[1]:.2f}", fontsize=11)
     
     return setup[0]
@@ -741,7 +885,8 @@ def make_rtd_scatter_plot(fig_rtd, ax_rtd, inc_angles, n_reflected, n_transmitte
     ax_rtd.spines['right'].set_visible(False)
     ax_rtd.set_xlim([angles_range[0], angles_range[1]+angles_range[2]])
     ax_rtd.set_ylim([-0.05*total,1.05*total])
-    ax2.set_ylim([-0.05*max(n_decayed_out_r+n_decayed_out_t),1.05*max(n_decayed_out_r+n_decayed_out_t)] if (max(n_decayed_out_r+n_decayed_out_t)>0) else [-0.05*5, 1.05*5])
+    max_decayed_out = max(np.max(n_decayed_out_r), np.max(n_decayed_out_t))
+    ax2.set_ylim([-0.05*max_decayed_out,1.05*max_decayed_out] if (max_decayed_out>0) else [-0.05*5, 1.05*5])
     
     # Shrink y axis by 20% to make room for legend
     box1 = ax_rtd.get_position()
@@ -776,13 +921,52 @@ def make_cutoff_angle_scatterplot(fig_cutoff, ax_cutoff, momenta, cutoff_angles,
 # - - - - - - - - - - - - - - - - - - - - - - - - - -
 
 def make_2dhist_momenta_inc_angle(fig_mom_inc, ax_mom_inc, momentum_distributions, incident_angles, particle, material_name, momentum, total, thickness, refl_trans_string):
-    # Create a 2D histogram grid
+    '''
+        Parameters:
+            fig_mom_inc (matplotlib figure):    figure of plot
+            ax_mom_inc (matplotlib axes):       axes of plot
+            momentum_distributions (array):     momenta of reflected/transmitted particles for each incident angle
+            incident_angles (float array):      array of incident thetas
+            particle (string):                  name of particle
+            material_name (string):             name of scattering surface/material
+            momentum (float):                   incident particle momentum
+            total (int):                        total number of events
+            thickness (float):                  thickness of the plate (in mm)
+            refl_trans_string (int):            string corresponding to whether the plots are for reflected or transmitted particles
+
+        Returns:
+
+        Info:
+            Bins the raw momenta of each incident angle and makes the 2d histogram with make_2dhist_momenta_inc_angle_counts
+    '''
     # Create individual 1D histograms for each incident angle
-    histograms = [np.histogram(momenta, bins=60, range=(0, momentum), density=True)[0] for momenta in momentum_distributions]
+    hist2d = init_momentum_angle_histogram(len(momentum_distributions))
+    for theta_index, momenta in enumerate(momentum_distributions):
+        fill_momentum_angle_histogram(hist2d, theta_index, momenta, momentum)
 
-    # Combine individual histograms into a 2D histogram
-    hist2d = np.array(histograms)
+    make_2dhist_momenta_inc_angle_counts(fig_mom_inc, ax_mom_inc, hist2d, incident_angles, particle, material_name, momentum, total, thickness, refl_trans_string)
 
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_2dhist_momenta_inc_angle_counts(fig_mom_inc, ax_mom_inc, hist2d, incident_angles, particle, material_name, momentum, total, thickness, refl_trans_string):
+    '''
+        Parameters:
+            fig_mom_inc (matplotlib figure):    figure of plot
+            ax_mom_inc (matplotlib axes):       axes of plot
+            hist2d (float array):               (angle x momentum bins) histogram filled with fill_momentum_angle_histogram
+            incident_angles (float array):      array of incident thetas
+            particle (string):                  name of particle
+            material_name (string):             name of scattering surface/material
+            momentum (float):                   incident particle momentum
+            total (int):                        total number of events
+            thickness (float):                  thickness of the plate (in mm)
+            refl_trans_string (int):            string corresponding to whether the plots are for reflected or transmitted particles
+
+        Returns:
+
+        Info:
+            Makes a 2d histogram of the outgoing momentum distribution vs the incident angle, for one particle, material and momentum
+    '''
     # Plot the 2D histogram
     im = ax_mom_inc.imshow(
         hist2d.T, extent=[min(incident_angles), 90, 0, momentum],
@@ -797,8 +981,196 @@ def make_2dhist_momenta_inc_angle(fig_mom_inc, ax_mom_inc, momentum_distribution
     ax_mom_inc.set_xlabel('Incident Angle (deg)')
     ax_mom_inc.set_title(f'2D Histogram of Momenta vs Incident Angle\nParticle: {particle}, Momentum: {momentum}MeV/c, Material: {material_name}, Thickness: {thickness:.2f}mm', fontsize=12)
 
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_decay_products_plot(fig_dec, ax_dec, codes, counts, particle, material_name, momentum, total, thickness):
+    '''
+        Parameters:
+            fig_dec (matplotlib figure):        figure of plot
+            ax_dec (matplotlib axes):           axes of plot
+            codes (int array):                  PDG codes of the decay table
+            counts (int array):                 (number of codes x 3) events decayed in, during and out for each code
+                                                (e.g. a decay table summed over the incident angles)
+            particle (string):                  name of particle
+            material_name (string):             name of scattering surface/material
+            momentum (float):                   incident particle momentum
+            total (int):                        total number of events
+            thickness (float):                  thickness of the plate (in mm)
+
+        Returns:
+
+        Info:
+            Makes a stacked bar chart of the decayed particles (by PDG code) split into decayed in, during and out,
+            for one particle, material and momentum
+    '''
+    present = counts.sum(axis=1) > 0
+    positions = np.arange(np.count_nonzero(present))
+    bottom = np.zeros(len(positions))
+    for stage_index, (stage, color) in enumerate(zip(DECAY_STAGES, ("tab:green", "tab:purple", "tab:blue"))):
+        ax_dec.bar(positions, counts[present, stage_index], bottom=bottom, color=color, edgecolor='black', linewidth=0.5, label=f"Decayed {stage.capitalize()}")
+        bottom += counts[present, stage_index]
+
+    ax_dec.set_xticks(positions)
+    ax_dec.set_xticklabels([pdg_name(code) for code in codes[present]])
+    ax_dec.set_xlabel("Decayed Particle", fontsize=9, fontweight='bold')
+    ax_dec.set_ylabel("Count (all incident angles)", fontsize=9, fontweight='bold')
+    ax_dec.tick_params(axis='both', which='major', labelsize=10)
+    ax_dec.set_title(f"Decay Products\n Particle: {particle}, Material: {material_name}, Momentum: {momentum} MeV/c\nN Events = {total}, Thickness: {thickness:.2f}mm", fontsize=11)
+    ax_dec.grid(True, axis='y', linestyle='--', linewidth=0.5)
+    ax_dec.spines['top'].set_visible(False)
+    ax_dec.spines['right'].set_visible(False)
+    ax_dec.legend(fontsize=8)
+
+
+# Functions to make plots from precomputed bin counts (cost independent of the number of events)
+#=====================================================
+def make_theta_histogram_counts(fig_h, ax_h, counts, edges, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float array):           theta bin counts
+            edges (float array):            theta bin edges
+            (others):                       as in make_theta_histogram
+
+        Returns:
+    '''
+    make_theta_histogram(fig_h, ax_h, None, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=edges, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_theta_histogram_counts_a(fig_h, ax_h, counts, edges, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float array):           theta bin counts
+            edges (float array):            theta bin edges
+            (others):                       as in make_theta_histogram_a
+
+        Returns:
+    '''
+    make_theta_histogram_a(fig_h, ax_h, None, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=edges, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_phi_histogram_counts(fig_h, ax_h, counts, edges, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float array):           phi bin counts
+            edges (float array):            phi bin edges
+            (others):                       as in make_phi_histogram
+
+        Returns:
+    '''
+    make_phi_histogram(fig_h, ax_h, None, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=edges, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_phi_histogram_counts_a(fig_h, ax_h, counts, edges, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float array):           phi bin counts
+            edges (float array):            phi bin edges
+            (others):                       as in make_phi_histogram_a
+
+        Returns:
+    '''
+    make_phi_histogram_a(fig_h, ax_h, None, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=edges, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_momentum_histogram_counts(fig_h, ax_h, counts, edges, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float array):           momentum bin counts
+            edges (float array):            momentum bin edges (in MeV/c)
+            (others):                       as in make_momentum_histogram
+
+        Returns:
+    '''
+    make_momentum_histogram(fig_h, ax_h, None, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=edges, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_momentum_histogram_counts_a(fig_h, ax_h, counts, edges, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float array):           momentum bin counts
+            edges (float array):            momentum bin edges (in MeV/c)
+            (others):                       as in make_momentum_histogram_a
+
+        Returns:
+    '''
+    make_momentum_histogram_a(fig_h, ax_h, None, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=edges, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_alpha_histogram_counts(fig_h, ax_h, counts, edges, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, reflected, thickness):
+    '''
+        Parameters:
+            counts (float array):           alpha bin counts
+            edges (float array):            alpha bin edges
+            (others):                       as in make_alpha_histogram
+
+        Returns:
+    '''
+    make_alpha_histogram(fig_h, ax_h, None, mode_, mean_, std_dev_, particle, material_name, momentum, theta_incident, total, reflected, thickness, bins=edges, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
 
+def make_correlation_theta_momentum_histogram_counts(fig_h_cor, ax_h_cor, counts, theta_edges, momentum_edges, correlation, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float 2d array):        (theta x momentum) bin counts
+            theta_edges (float array):      theta bin edges
+            momentum_edges (float array):   momentum bin edges (in MeV/c)
+            correlation (float):            Pearson correlation of theta and momentum
+            (others):                       as in make_correlation_theta_momentum_histogram
 
+        Returns:
+    '''
+    make_correlation_theta_momentum_histogram(fig_h_cor, ax_h_cor, None, None, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=[theta_edges, momentum_edges], correlation=correlation, counts=counts)
 
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
 
+def make_correlation_theta_momentum_histogram_counts_a(fig_cor_array, axes_cor_array, counts, theta_edges, momentum_edges, correlation, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float 2d array):        (theta x momentum) bin counts
+            theta_edges (float array):      theta bin edges
+            momentum_edges (float array):   momentum bin edges (in MeV/c)
+            correlation (float):            Pearson correlation of theta and momentum
+            (others):                       as in make_correlation_theta_momentum_histogram_a
 
+        Returns:
+            setup[0] (2d histogram):        2d histogram (for purposes of aligning the array colorbar with all the histograms in the array)
+    '''
+    return make_correlation_theta_momentum_histogram_a(fig_cor_array, axes_cor_array, None, None, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=[theta_edges, momentum_edges], correlation=correlation, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_correlation_theta_phi_histogram_counts(fig_h_cor, ax_h_cor, counts, theta_edges, phi_edges, correlation, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float 2d array):        (theta x phi) bin counts
+            theta_edges (float array):      theta bin edges
+            phi_edges (float array):        phi bin edges
+            correlation (float):            Pearson correlation of theta and phi
+            (others):                       as in make_correlation_theta_phi_histogram
+
+        Returns:
+    '''
+    make_correlation_theta_phi_histogram(fig_h_cor, ax_h_cor, None, None, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=[theta_edges, phi_edges], correlation=correlation, counts=counts)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def make_correlation_theta_phi_histogram_counts_a(fig_cor_array, ax_cor_array, counts, theta_edges, phi_edges, correlation, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness):
+    '''
+        Parameters:
+            counts (float 2d array):        (theta x phi) bin counts
+            theta_edges (float array):      theta bin edges
+            phi_edges (float array):        phi bin edges
+            correlation (float):            Pearson correlation of theta and phi
+            (others):                       as in make_correlation_theta_phi_histogram_a
+
+        Returns:
+            setup[0] (2d histogram):        2d histogram (for purposes of aligning the array colorbar with all the histograms in the array)
+    '''
+    return make_correlation_theta_phi_histogram_a(fig_cor_array, ax_cor_array, None, None, particle, material_name, momentum, theta_incident, total, refl_trans, refl_trans_string, thickness, bins=[theta_edges, phi_edges], correlation=correlation, counts=counts)
@@ -0,0 +1,89 @@
+# File: analysis_prefilled.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import uproot
+
+
+# Constants
+#=====================================================
+PREFILLED_H2 = {'position_in': 'Position_in', 'position_out': 'Position_out', 'momentum_map': 'P_in_vs_P_out',
+                'theta_map': 'Theta_in_vs_Theta_out'}     # H2 filled by EventAction.cc of Project_v2, keyed by the map they hold
+EDGE_TOLERANCE = 1e-9                           # relative tolerance when comparing the bin edges of a histogram to a binning
+
+
+# Histograms prefilled by the simulation
+# Info: the capillary simulation fills its H2 histograms (beam position at the input and output, P_in vs P_out and
+#       theta_in vs theta_out of the particles reaching the exit) while it runs, and writes them to the output file
+#       next to the ntuples. They are read here with uproot as a 'counts' array (under- and overflow bins left out, as
+#       np.histogram2d) and the 'edges' along each axis, and histograms of several shards or configurations are summed
+#       when their edges agree. Re-binning the ntuples is only needed for a binning the simulation did not fill.
+#=====================================================
+def read_histogram(file, name):
+    '''
+        Parameters:
+            file (uproot file):         open ROOT file
+            name (string):              name of a TH1 or TH2 in the file
+
+        Returns:
+            histogram (dict):           'counts' (float array, without the under- and overflow bins) and 'edges' (tuple
+                                        of the bin edges along each axis)
+    '''
+    values = file[name].to_numpy(flow=False)
+    return {'counts': np.asarray(values[0], dtype=np.float64), 'edges': tuple(np.asarray(edges, dtype=np.float64) for edges in values[1:])}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def read_prefilled_histograms(path, names=None):
+    '''
+        Parameters:
+            path (string):              path of a capillary data file
+            names (string list):        maps to read (keys of PREFILLED_H2, default: all)
+
+        Returns:
+            histograms (dict):          histogram of each map found in the file (see read_histogram); maps whose H2 is
+                                        not in the file are left out
+    '''
+    names = list(PREFILLED_H2) if names is None else names
+    with uproot.open(path) as file:
+        keys = set(file.keys(cycle=False))
+        return {name: read_histogram(file, PREFILLED_H2[name]) for name in names if PREFILLED_H2[name] in keys}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def same_edges(edges, other):
+    '''
+        Parameters:
+            edges (tuple):              bin edges along each axis
+            other (tuple):              bin edges along each axis
+
+        Returns:
+            same (bool):                whether the binnings agree (up to EDGE_TOLERANCE, as the simulation computes its edges in C++)
+    '''
+    return len(edges) == len(other) and all(len(a) == len(b) and np.allclose(a, b, rtol=EDGE_TOLERANCE, atol=0) for a, b in zip(edges, other))
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def sum_histograms(histograms):
+    '''
+        Parameters:
+            histograms (iterable):      histograms with the same binning (see read_histogram), e.g. of the shards of a configuration
+
+        Returns:
+            histogram (dict):           sum of the histograms (None if there are none)
+
+        Info:
+            Raises ValueError if the binnings differ
+    '''
+    total = None
+    for histogram in histograms:
+        if total is None:
+            total = {'counts': histogram['counts'].copy(), 'edges': histogram['edges']}
+        elif not same_edges(total['edges'], histogram['edges']):
+            raise ValueError("Histograms with different binnings cannot be summed")
+        else:
+            total['counts'] += histogram['counts']
+    return total
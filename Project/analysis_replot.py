@@ -0,0 +1,193 @@
+# File: analysis_replot.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import matplotlib.pyplot as plt
+import sys
+import configparser
+from tqdm import tqdm
+
+from analysis_helpers import *
+from analysis_plotters import *
+from analysis_store import *
+from analysis_selections import selection_data_folder
+from analysis_output import *
+
+# Read configuration file
+# Info: same plot configuration file as analysis.py; the plots are made from the histogram
+#       store written by analysis.py (HISTOGRAM_STORE = True) instead of the raw events, or
+#       from the store of a named selection of the [Selections] section if its name is given
+#       (python3 analysis_replot.py <config> [selection])
+#=====================================================
+if len(sys.argv) not in (2, 3):
+    print("Please include a configuration file")
+    sys.exit(1)
+config_file = sys.argv[1]
+config = configparser.ConfigParser()
+config.read(config_file)
+
+
+# Plotting Options
+#=====================================================
+THETA_HISTOGRAMS = config.getboolean('PlotSelection', 'THETA_HISTOGRAMS')
+PHI_HISTOGRAMS = config.getboolean('PlotSelection', 'PHI_HISTOGRAMS')
+MOMENTUM_HISTOGRAMS = config.getboolean('PlotSelection', 'MOMENTUM_HISTOGRAMS')
+CORRELATION_HISTOGRAM_THETA_MOMENTUM = config.getboolean('PlotSelection', 'CORRELATION_HISTOGRAM_THETA_MOMENTUM')
+CORRELATION_HISTOGRAM_THETA_PHI = config.getboolean('PlotSelection', 'CORRELATION_HISTOGRAM_THETA_PHI')
+THETA_HISTOGRAM_ARRAY = config.getboolean('PlotSelection', 'THETA_HISTOGRAM_ARRAY')
+PHI_HISTOGRAM_ARRAY = config.getboolean('PlotSelection', 'PHI_HISTOGRAM_ARRAY')
+MOMENTUM_HISTOGRAM_ARRAY = config.getboolean('PlotSelection', 'MOMENTUM_HISTOGRAM_ARRAY')
+CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY = config.getboolean('PlotSelection', 'CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY')
+CORRELATION_HISTOGRAM_THETA_PHI_ARRAY = config.getboolean('PlotSelection', 'CORRELATION_HISTOGRAM_THETA_PHI_ARRAY')
+ALPHA_PLOTS = config.getboolean('PlotSelection', 'ALPHA_PLOTS', fallback=False)
+TRANSMITTED_PARTICLES = config.getboolean('PlotSelection', 'TRANSMITTED_PARTICLES')
+
+
+# Data Directory and Histogram Store
+#=====================================================
+DATA_FOLDER = config.get('Data', 'DATA_SUBDIRECTORY')
+transmit = "_transmitted" if TRANSMITTED_PARTICLES else ""
+if len(sys.argv) == 3:
+    DATA_FOLDER = selection_data_folder(DATA_FOLDER, sys.argv[2])
+    transmit = ""
+store = load_histogram_store(f"plots/{DATA_FOLDER}/histogram_store{transmit}.npz")
+plot_output = open_plot_output(f"plots/{DATA_FOLDER}", read_plot_backend(config), f"replot{transmit}.zip")
+
+PARTICLES = store['particles']
+MATERIALS = store['materials']
+MOMENTA = store['momenta']
+ANGLES = store['angles']
+THICKNESS = float(store['thickness'])
+EVENTS = int(store['events'])
+refl_trans_string = str(store['refl_trans_string'])
+
+
+# Main Code
+#=====================================================
+for particle_index, particle in enumerate(tqdm(PARTICLES, leave=False, desc='PARTICLES', dynamic_ncols=True)):
+    for material_index, material in enumerate(tqdm(MATERIALS, leave=False, desc='MATERIALS', dynamic_ncols=True)):
+        material_name = return_surface_name(material)
+
+        if THETA_HISTOGRAM_ARRAY:
+            fig_theta_array, axes_theta_array = plt.subplots(len(MOMENTA), len(ANGLES), figsize=(16,16), sharex=False, sharey=False, squeeze=False)
+        if PHI_HISTOGRAM_ARRAY:
+            fig_phi_array, axes_phi_array = plt.subplots(len(MOMENTA), len(ANGLES), figsize=(16,16), sharex=False, sharey=False, squeeze=False)
+        if MOMENTUM_HISTOGRAM_ARRAY:
+            fig_momentum_array, axes_momentum_array = plt.subplots(len(MOMENTA), len(ANGLES), figsize=(16,16), sharex=False, sharey=False, squeeze=False)
+        if CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY:
+            fig_cor_array_t_m, axes_cor_array_t_m = plt.subplots(len(MOMENTA), len(ANGLES), figsize=(16,16), sharex=False, sharey=False, squeeze=False)
+        if CORRELATION_HISTOGRAM_THETA_PHI_ARRAY:
+            fig_cor_array_t_p, axes_cor_array_t_p = plt.subplots(len(MOMENTA), len(ANGLES), figsize=(16,16), sharex=False, sharey=False, squeeze=False)
+
+        for momentum_index, momentum in enumerate(tqdm(MOMENTA, leave=False, desc='MOMENTA', dynamic_ncols=True)):
+            momentum = int(momentum) if float(momentum).is_integer() else momentum
+            for theta_index, theta_incident in enumerate(ANGLES):
+                index = (particle_index, material_index, momentum_index, theta_index)
+                if not store['filled'][index]:
+                    continue
+
+                # Statistics and histograms of the configuration
+                n_theta, theta_mean, theta_std_dev, theta_mode = store_statistics(store, 'theta', index)
+                _, phi_mean, phi_std_dev, phi_mode = store_statistics(store, 'phi', index)
+                n_momentum, momentum_mean, momentum_std_dev, momentum_mode = store_statistics(store, 'momentum', index)
+                n_alpha, alpha_mean, alpha_std_dev, alpha_mode = store_statistics(store, 'alpha', index)
+                theta_counts, theta_edges = store_histogram(store, 'theta', index)
+                phi_counts, phi_edges = store_histogram(store, 'phi', index)
+                momentum_counts, momentum_edges = store_histogram(store, 'momentum', index)
+                alpha_counts, alpha_edges = store_histogram(store, 'alpha', index)
+                t_m_counts, t_m_theta_edges, t_m_momentum_edges = store_histogram(store, 'theta_momentum', index)
+                t_p_counts, t_p_theta_edges, t_p_phi_edges = store_histogram(store, 'theta_phi', index)
+
+                # Make individual histograms
+                if THETA_HISTOGRAMS:
+                    fig_h_theta, ax_h_theta = plt.subplots()
+                    make_theta_histogram_counts(fig_h_theta, ax_h_theta, theta_counts, theta_edges, theta_mode, theta_mean, theta_std_dev, particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_theta, f"plots/{DATA_FOLDER}/histogram_theta_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    plt.close(fig_h_theta)
+
+                if PHI_HISTOGRAMS:
+                    fig_h_phi, ax_h_phi = plt.subplots()
+                    make_phi_histogram_counts(fig_h_phi, ax_h_phi, phi_counts, phi_edges, phi_mode, phi_mean, phi_std_dev, particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_phi, f"plots/{DATA_FOLDER}/histogram_phi_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    plt.close(fig_h_phi)
+
+                if MOMENTUM_HISTOGRAMS and n_momentum > 0:
+                    fig_h_momentum, ax_h_momentum = plt.subplots()
+                    make_momentum_histogram_counts(fig_h_momentum, ax_h_momentum, momentum_counts, momentum_edges, momentum_mode, momentum_mean, momentum_std_dev, particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_momentum, f"plots/{DATA_FOLDER}/histogram_momentum_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    plt.close(fig_h_momentum)
+
+                if ALPHA_PLOTS and n_alpha > 0:
+                    fig_h_alpha, ax_h_alpha = plt.subplots()
+                    make_alpha_histogram_counts(fig_h_alpha, ax_h_alpha, alpha_counts, alpha_edges, alpha_mode, alpha_mean, alpha_std_dev, particle, material_name, momentum, theta_incident, EVENTS, n_alpha, THICKNESS)
+                    save_figure(plot_output, fig_h_alpha, f"plots/{DATA_FOLDER}/histogram_alpha_{particle}_{material_name}_{momentum}_{theta_incident}.png")
+                    plt.close(fig_h_alpha)
+
+                if CORRELATION_HISTOGRAM_THETA_MOMENTUM and n_momentum > 0:
+                    fig_h_cor, ax_h_cor = plt.subplots()
+                    make_correlation_theta_momentum_histogram_counts(fig_h_cor, ax_h_cor, t_m_counts, t_m_theta_edges, t_m_momentum_edges, store_correlation(store, 'theta_momentum', index), particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_cor, f"plots/{DATA_FOLDER}/histogram_correlation_theta_momentum_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    plt.close(fig_h_cor)
+
+                if CORRELATION_HISTOGRAM_THETA_PHI:
+                    fig_h_cor, ax_h_cor = plt.subplots()
+                    make_correlation_theta_phi_histogram_counts(fig_h_cor, ax_h_cor, t_p_counts, t_p_theta_edges, t_p_phi_edges, store_correlation(store, 'theta_phi', index), particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+                    save_figure(plot_output, fig_h_cor, f"plots/{DATA_FOLDER}/histogram_correlation_theta_phi_{particle}_{material_name}_{momentum}_{theta_incident}{transmit}.png")
+                    plt.close(fig_h_cor)
+
+                # Add histograms to arrays of histograms
+                if THETA_HISTOGRAM_ARRAY:
+                    make_theta_histogram_counts_a(fig_theta_array, axes_theta_array[momentum_index][theta_index], theta_counts, theta_edges, theta_mode, theta_mean, theta_std_dev, particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+
+                if PHI_HISTOGRAM_ARRAY:
+                    make_phi_histogram_counts_a(fig_phi_array, axes_phi_array[momentum_index][theta_index], phi_counts, phi_edges, phi_mode, phi_mean, phi_std_dev, particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+
+                if MOMENTUM_HISTOGRAM_ARRAY and n_momentum > 0:
+                    make_momentum_histogram_counts_a(fig_momentum_array, axes_momentum_array[momentum_index][theta_index], momentum_counts, momentum_edges, momentum_mode, momentum_mean, momentum_std_dev, particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+
+                if CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY and n_momentum > 0:
+                    hist_t_m = make_correlation_theta_momentum_histogram_counts_a(fig_cor_array_t_m, axes_cor_array_t_m[momentum_index][theta_index], t_m_counts, t_m_theta_edges, t_m_momentum_edges, store_correlation(store, 'theta_momentum', index), particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+
+                if CORRELATION_HISTOGRAM_THETA_PHI_ARRAY:
+                    hist_t_p = make_correlation_theta_phi_histogram_counts_a(fig_cor_array_t_p, axes_cor_array_t_p[momentum_index][theta_index], t_p_counts, t_p_theta_edges, t_p_phi_edges, store_correlation(store, 'theta_phi', index), particle, material_name, momentum, theta_incident, EVENTS, n_theta, refl_trans_string, THICKNESS)
+
+        # Save Histogram Arrays
+        if THETA_HISTOGRAM_ARRAY:
+            fig_theta_array.suptitle(f"{refl_trans_string} Theta Histograms - Theta versus Momentum - Particle: {particle}, Material: {material_name}\nN Events: {EVENTS}, Thickness: {THICKNESS}mm", fontsize=14, fontweight='bold')
+            fig_theta_array.tight_layout(pad=2)
+            save_figure(plot_output, fig_theta_array, f"plots/{DATA_FOLDER}/histogram_theta_array_{particle}_{material_name}{transmit}.png")
+            plt.close(fig_theta_array)
+
+        if PHI_HISTOGRAM_ARRAY:
+            fig_phi_array.suptitle(f"{refl_trans_string} Phi Histograms - Theta versus Momentum - Particle: {particle}, Material: {material_name}\nN Events: {EVENTS}, Thickness: {THICKNESS}mm", fontsize=14, fontweight='bold')
+            fig_phi_array.tight_layout(pad=2)
+            save_figure(plot_output, fig_phi_array, f"plots/{DATA_FOLDER}/histogram_phi_array_{particle}_{material_name}{transmit}.png")
+            plt.close(fig_phi_array)
+
+        if MOMENTUM_HISTOGRAM_ARRAY:
+            fig_momentum_array.suptitle(f"{refl_trans_string} Momentum Histograms - Theta versus Momentum - Particle: {particle}, Material: {material_name}\nN Events: {EVENTS}, Thickness: {THICKNESS}mm", fontsize=14, fontweight='bold')
+            fig_momentum_array.tight_layout(pad=2)
+            save_figure(plot_output, fig_momentum_array, f"plots/{DATA_FOLDER}/histogram_momentum_array_{particle}_{material_name}{transmit}.png")
+            plt.close(fig_momentum_array)
+
+        if CORRELATION_HISTOGRAM_THETA_MOMENTUM_ARRAY:
+            fig_cor_array_t_m.suptitle(f"{refl_trans_string} Theta Momentum Correlation Histograms - Theta versus Momentum - Particle: {particle}, Material: {material_name}\nN Events: {EVENTS}, Thickness: {THICKNESS}mm", fontsize=14, fontweight='bold')
+            cbar_ax = fig_cor_array_t_m.add_axes([0.93, 0.04, 0.015, 0.88])  # [left, bottom, width, height]
+            cbar = fig_cor_array_t_m.colorbar(hist_t_m[3], cax=cbar_ax)
+            cbar.set_label('Rate')
+            fig_cor_array_t_m.tight_layout(pad=2, rect=[0,0,0.92,1])
+            save_figure(plot_output, fig_cor_array_t_m, f"plots/{DATA_FOLDER}/histogram_correlation_array_theta_momentum_{particle}_{material_name}{transmit}.png")
+            plt.close(fig_cor_array_t_m)
+
+        if CORRELATION_HISTOGRAM_THETA_PHI_ARRAY:
+            fig_cor_array_t_p.suptitle(f"{refl_trans_string} Theta Phi Correlation Histograms - Theta versus Momentum - Particle: {particle}, Material: {material_name}, N Events: {EVENTS}, Thickness: {THICKNESS}mm", fontsize=14, fontweight='bold')
+            cbar_ax = fig_cor_array_t_p.add_axes([0.93, 0.04, 0.015, 0.88])  # [left, bottom, width, height]
+            cbar = fig_cor_array_t_p.colorbar(hist_t_p[3], cax=cbar_ax)
+            cbar.set_label('Rate')
+            fig_cor_array_t_p.tight_layout(pad=2, rect=[0,0,0.92,1])
+            save_figure(plot_output, fig_cor_array_t_p, f"plots/{DATA_FOLDER}/histogram_correlation_array_theta_phi_{particle}_{material_name}{transmit}.png")
+            plt.close(fig_cor_array_t_p)
+
+close_plot_output(plot_output)
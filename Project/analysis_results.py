@@ -0,0 +1,238 @@
+# File: analysis_results.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import math
+
+from analysis_moments import make_moments, update_moments, merge_moments, moments_mean, moments_std, moments_rmse
+from analysis_sketches import FINE_BINS, make_statistics_sketch, update_statistics_sketch, merge_statistics_sketches, sketch_mode
+
+
+# Constants
+#=====================================================
+COUNT_FIELDS = ('events', 'selected', 'reflected', 'transmitted', 'decayed', 'absorbed', 'decayed_in', 'decayed_out_r', 'decayed_out_t')
+STATISTIC_VARIABLES = ('theta', 'phi', 'momentum', 'alpha')
+STATISTIC_FIELDS = ('mean', 'mode', 'std_dev', 'mean_error', 'mode_hwhm_left', 'mode_hwhm_right', 'mode_error')
+STREAMING_RANGES = {'theta': (0, 90), 'phi': (0, 360)}                 # fine-bin ranges of the streaming sketches (momentum: 0 to P_incident)
+
+# One record per (particle, material, momentum, angle) configuration:
+#   valid:          configuration has at least EVENTS_CUT reflected/transmitted events
+#   counts:         events, selected (reflected/transmitted events kept), and the reflected, transmitted, decayed, ... tallies
+#   statistics:     <variable>_<statistic> for theta, phi, momentum and alpha (NaN if not computed)
+SUMMARY_DTYPE = np.dtype(
+    [('valid', bool)]
+    + [(field, np.int64) for field in COUNT_FIELDS]
+    + [(f'{variable}_{field}', np.float64) for variable in STATISTIC_VARIABLES for field in STATISTIC_FIELDS]
+)
+
+
+# Functions for the typed analysis summary (structured array sized from the grid)
+#=====================================================
+def make_summary(shape):
+    '''
+        Parameters:
+            shape (int tuple):          shape of the grid, e.g. (len(PARTICLES), len(MATERIALS), len(MOMENTA), len(ANGLES))
+
+        Returns:
+            summary (structured array): preallocated summary (counts set to 0, statistics set to NaN, valid set to False)
+    '''
+    summary = np.zeros(shape, dtype=SUMMARY_DTYPE)
+    for variable in STATISTIC_VARIABLES:
+        for field in STATISTIC_FIELDS:
+            summary[f'{variable}_{field}'] = np.nan
+    return summary
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def record_counts(results, index, **counts):
+    '''
+        Parameters:
+            results (structured array): summary (or a view of it, e.g. the angles of one momentum)
+            index (int or tuple):       index of the configuration in results
+            counts (int):               tallies keyed by their COUNT_FIELDS name (e.g. reflected=10)
+
+        Returns:
+    '''
+    for field, count in counts.items():
+        results[field][index] = count
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def record_statistics(results, index, variable, **statistics):
+    '''
+        Parameters:
+            results (structured array): summary (or a view of it, e.g. the angles of one momentum)
+            index (int or tuple):       index of the configuration in results
+            variable (string):          one of STATISTIC_VARIABLES
+            statistics (float):         statistics keyed by their STATISTIC_FIELDS name (e.g. mean=45.2)
+
+        Returns:
+    '''
+    for field, value in statistics.items():
+        results[f'{variable}_{field}'][index] = value
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def recorded_statistics(results, index, variable, *fields):
+    '''
+        Parameters:
+            results (structured array): summary (or a view of it, e.g. the angles of one momentum)
+            index (int or tuple):       index of the configuration in results
+            variable (string):          one of STATISTIC_VARIABLES
+            fields (string):            STATISTIC_FIELDS to return (e.g. 'mode', 'mean', 'std_dev')
+
+        Returns:
+            values (float tuple):       recorded statistics, in the order of fields
+    '''
+    return tuple(results[f'{variable}_{field}'][index] for field in fields)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def statistic_errors(results, variable, statistic='mean'):
+    '''
+        Parameters:
+            results (structured array): summary (or a view of it)
+            variable (string):          one of STATISTIC_VARIABLES
+            statistic (string):         'mean' or 'mode'
+
+        Returns:
+            errors (float array):       errors on the statistic of every configuration (NaN without selected events)
+
+        Info:
+            The recorded mean_error and mode_error are spreads of the distribution (RMS deviation from the mean, and from
+            the mode); the errors on the statistics are these spreads divided by sqrt(number of selected events). Only
+            the momentum has a mode_error; for the other variables (or where it is NaN) the spread around the mode is
+            the mean of the left and right HWHM
+    '''
+    spread = results[f'{variable}_{statistic}_error']
+    if statistic == 'mode':
+        spread = np.where(np.isnan(spread), (results[f'{variable}_mode_hwhm_left'] + results[f'{variable}_mode_hwhm_right'])/2, spread)
+    selected = results['selected'].astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(selected > 0, spread/np.sqrt(selected), np.nan)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_summary(path, summary, particles, materials, momenta, angles, thickness, events, refl_trans_string):
+    '''
+        Parameters:
+            path (string):                  path of the output .npz file
+            summary (structured array):     summary of the grid
+            particles (string array):       particles of the grid
+            materials (int array):          materials of the grid
+            momenta (float array):          incident momenta of the grid
+            angles (float array):           incident angles of the grid
+            thickness (float):              thickness of the plate (in mm)
+            events (int):                   number of events per configuration
+            refl_trans_string (string):     "Reflected" or "Transmitted"
+
+        Returns:
+    '''
+    np.savez_compressed(path, summary=summary, particles=np.asarray(particles, dtype=str), materials=np.asarray(materials, dtype=int),
+                        momenta=np.asarray(momenta, dtype=float), angles=np.asarray(angles, dtype=float),
+                        thickness=np.asarray(thickness, dtype=float), events=np.asarray(events, dtype=int),
+                        refl_trans_string=np.asarray(refl_trans_string, dtype=str))
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_summary(path):
+    '''
+        Parameters:
+            path (string):          path of a .npz file written by save_summary
+
+        Returns:
+            summary (dict):         'summary' (structured array) and the grid axes ('particles', 'materials', 'momenta', 'angles', ...)
+    '''
+    with np.load(path) as archive:
+        summary = {key: archive[key] for key in archive.files}
+    return summary
+
+
+# Functions for the streaming statistics of one configuration
+# Info: every variable keeps a moment accumulator (count, mean, M2) and a statistics sketch (fine histogram + quantiles).
+#       Each chunk of events is read once, partial statistics of chunks, files or worker processes merge exactly,
+#       and all the STATISTIC_FIELDS of the summary are derived from the merged partial:
+#           mean, std_dev:              moment accumulator (as np.nanmean, np.nanstd)
+#           mean_error:                 moment accumulator (as root_mean_squared_error(data, mean), NaNs ignored)
+#           mode, mode_hwhm_*:          statistics sketch with 'auto' rebinning (as mode_helper, to within one fine bin)
+#           mode_error (momentum):      sqrt(mean_error^2 + (mode - mean)^2) (as shifted_mode_rmse)
+#=====================================================
+def make_streaming_statistics(momentum, alpha_range=(0, 2), bins=FINE_BINS):
+    '''
+        Parameters:
+            momentum (float):           incident momentum of the configuration (upper edge of the momentum fine bins)
+            alpha_range (float, float): range of the alpha fine bins
+            bins (int):                 number of fine bins of every sketch
+
+        Returns:
+            partial (dict):             empty partial statistics keyed by STATISTIC_VARIABLES,
+                                        each {'moments': moment accumulator, 'sketch': statistics sketch}
+    '''
+    ranges = dict(STREAMING_RANGES, momentum=(0, momentum), alpha=tuple(alpha_range))
+    return {variable: {'moments': make_moments(), 'sketch': make_statistics_sketch(*ranges[variable], bins)} for variable in STATISTIC_VARIABLES}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def update_streaming_statistics(partial, thetas, phis, momenta=None, alphas=None):
+    '''
+        Parameters:
+            partial (dict):             partial statistics (updated in place)
+            thetas (float array):       chunk of thetas (already folded onto 0-90 deg)
+            phis (float array):         chunk of phis
+            momenta (float array):      chunk of momenta (None if not read)
+            alphas (float array):       chunk of alphas (None if not computed)
+
+        Returns:
+            partial (dict):             the updated partial statistics
+    '''
+    for variable, data in zip(STATISTIC_VARIABLES, (thetas, phis, momenta, alphas)):
+        if data is None:
+            continue
+        update_moments(partial[variable]['moments'], data)
+        update_statistics_sketch(partial[variable]['sketch'], data)
+    return partial
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_streaming_statistics(partial, other):
+    '''
+        Parameters:
+            partial (dict):             partial statistics (updated in place)
+            other (dict):               partial statistics of the same configuration (same fine bins)
+
+        Returns:
+            partial (dict):             the merged partial statistics
+    '''
+    for variable in STATISTIC_VARIABLES:
+        merge_moments(partial[variable]['moments'], other[variable]['moments'])
+        merge_statistics_sketches(partial[variable]['sketch'], other[variable]['sketch'])
+    return partial
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def record_streaming_statistics(results, index, partial):
+    '''
+        Parameters:
+            results (structured array): summary (or a view of it, e.g. the angles of one momentum)
+            index (int or tuple):       index of the configuration in results
+            partial (dict):             (merged) partial statistics of the configuration
+
+        Returns:
+
+        Info:
+            Variables without any finite entry (e.g. momenta that were not read) are left at NaN
+    '''
+    for variable in STATISTIC_VARIABLES:
+        moments = partial[variable]['moments']
+        if moments['count'] == 0:
+            continue
+        mean = moments_mean(moments)
+        mean_error = moments_rmse(moments)
+        mode, mode_hwhm_left, mode_hwhm_right = sketch_mode(partial[variable]['sketch'], rebin='auto')
+        record_statistics(results, index, variable, mean=mean, mode=mode, std_dev=moments_std(moments), mean_error=mean_error,
+                          mode_hwhm_left=mode_hwhm_left, mode_hwhm_right=mode_hwhm_right)
+        if variable == 'momentum':
+            record_statistics(results, index, variable, mode_error=math.sqrt(mean_error**2 + (mode - mean)**2))
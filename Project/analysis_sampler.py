@@ -0,0 +1,191 @@
+# File: analysis_sampler.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import sys
+
+from analysis_store import *
+from analysis_surrogate import axis_weights
+
+
+# Outgoing particle sampler (draws reflected/transmitted particles from the histogram store)
+# Info: for a particle and material of a histogram store (see analysis_store.py), the stored histograms of every
+#       configuration are turned into cumulative distribution tables: theta from the theta histogram, and the momentum
+#       fraction P/P_incident and phi conditional on the theta bin of the theta vs momentum and theta vs phi histograms
+#       (rows without entries fall back to the marginal of the configuration). Samples are drawn by inverse-CDF lookup,
+#       uniform within the selected bin, for all the samples at once: the rows of a table are offset by their index
+#       and flattened, so a single np.searchsorted finds the bins of samples from different rows.
+#
+#       Between grid points, a sample at (momentum, angle) is drawn from one of the (up to 4) neighbouring
+#       configurations, chosen with its bilinear interpolation weight (a linear interpolation of the distributions);
+#       configurations without entries get no weight. As the momentum is stored as a fraction of the incident
+#       momentum, it is scaled by the momentum of each sample rather than by that of the configuration.
+#
+#       Example:
+#           sampler = build_sampler(load_histogram_store('plots/general/histogram_store.npz'), 'mu-', 0)
+#           thetas, phis, momenta = sample_particles(sampler, momentum=35, angle=42.5, n=10**6)
+#=====================================================
+def _cdf_table(counts):
+    '''
+        Parameters:
+            counts (float array):       (..., bins) histograms
+
+        Returns:
+            table (float array):        (rows, bins) normalized cumulative distributions, offset by their row index and
+                                        flattened (rows without entries are left at the offset)
+    '''
+    counts = counts.reshape(-1, counts.shape[-1]).astype(np.float64)
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cdf = np.where(totals > 0, np.cumsum(counts, axis=1)/totals, 0.0)
+    cdf[totals[:, 0] > 0, -1] = 1.0
+    return (cdf + np.arange(len(cdf))[:, None]).ravel()
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _inverse_cdf(table, edges, rows, u):
+    '''
+        Parameters:
+            table (float array):        flattened cumulative distributions (see _cdf_table)
+            edges (float array):        bin edges shared by the rows
+            rows (int array):           row of each sample
+            u (float array):            uniform random numbers on [0, 1)
+
+        Returns:
+            values (float array):       samples, uniform within the selected bins
+    '''
+    n_bins = len(edges) - 1
+    position = np.searchsorted(table, rows + u, side='right')
+    bins = np.clip(position - rows*n_bins, 0, n_bins - 1)
+    position = rows*n_bins + bins
+    upper = table[position] - rows
+    lower = np.where(bins > 0, table[position - 1] - rows, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        within = np.clip(np.where(upper > lower, (u - lower)/(upper - lower), 0.5), 0, 1)
+    return edges[bins] + within*(edges[bins + 1] - edges[bins])
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def build_sampler(store, particle, material):
+    '''
+        Parameters:
+            store (dict):               histogram store (see load_histogram_store)
+            particle (string):          particle (e.g. 'mu-')
+            material (int):             material (see Material Identification)
+
+        Returns:
+            sampler (dict):             'momenta' and 'angles' of the grid, 'filled' (momenta, angles) configurations with
+                                        entries, the bin edges and the flattened 'theta', 'momentum' and 'phi' CDF tables
+
+        Info:
+            Raises ValueError if the particle and material are not in the store, or if the store was made without the
+            momenta (see needs_momenta)
+    '''
+    particle_index = np.flatnonzero(store['particles'] == particle)
+    material_index = np.flatnonzero(store['materials'] == int(material))
+    if particle_index.size == 0 or material_index.size == 0:
+        raise ValueError(f"No {particle} on material {material} in the histogram store")
+    index = (particle_index[0], material_index[0])
+    theta = store['theta'][index]
+    theta_momentum = store['theta_momentum'][index].astype(np.float64)
+    theta_phi = store['theta_phi'][index].astype(np.float64)
+    filled = theta.sum(axis=-1) > 0
+    if filled.any() and not theta_momentum.any():
+        raise ValueError("The histogram store has no momenta (enable a momentum plot or HISTOGRAM_STORE with the momenta read)")
+
+    # Conditional rows without entries fall back to the marginal of their configuration
+    for conditional in (theta_momentum, theta_phi):
+        empty = conditional.sum(axis=-1, keepdims=True) == 0
+        conditional[:] = np.where(empty, conditional.sum(axis=-2, keepdims=True), conditional)
+
+    return {
+        'momenta': store['momenta'], 'angles': store['angles'], 'filled': filled,
+        'theta_edges': store['theta_edges'], 'correlation_theta_edges': store['correlation_theta_edges'],
+        'momentum_edges': store['correlation_momentum_edges'], 'phi_edges': store['correlation_phi_edges'],
+        'theta': _cdf_table(theta), 'momentum': _cdf_table(theta_momentum), 'phi': _cdf_table(theta_phi),
+    }
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def neighbour_configurations(sampler, momentum, angle, u):
+    '''
+        Parameters:
+            sampler (dict):             sampler (see build_sampler)
+            momentum (float array):     incident momentum of each sample (in MeV/c)
+            angle (float array):        incident angle of each sample (in deg)
+            u (float array):            uniform random numbers on [0, 1)
+
+        Returns:
+            configurations (int array): flat (momentum, angle) index of the configuration each sample is drawn from
+
+        Info:
+            Raises ValueError if a sample is outside the grid or has no neighbouring configuration with entries
+    '''
+    cells = [axis_weights(sampler[axis], points) for axis, points in (('momenta', momentum), ('angles', angle))]
+    if any(np.isnan(upper_weight).any() for _, upper_weight in cells):
+        raise ValueError(f"Samples outside the grid (momenta {sampler['momenta'][0]}-{sampler['momenta'][-1]}, angles {sampler['angles'][0]}-{sampler['angles'][-1]})")
+    n_angles = len(sampler['angles'])
+    filled = sampler['filled'].ravel()
+
+    corners, weights = [], []
+    for side_momentum in range(1 if len(sampler['momenta']) == 1 else 2):
+        for side_angle in range(1 if n_angles == 1 else 2):
+            (momentum_lower, momentum_weight), (angle_lower, angle_weight) = cells
+            corner = (momentum_lower + side_momentum)*n_angles + angle_lower + side_angle
+            weight = (momentum_weight if side_momentum else 1 - momentum_weight)*(angle_weight if side_angle else 1 - angle_weight)
+            corners.append(corner)
+            weights.append(np.where(filled[corner], weight, 0.0))
+    corners, weights = np.stack(corners), np.stack(weights)
+    totals = weights.sum(axis=0)
+    if (totals <= 0).any():
+        raise ValueError("Samples next to configurations without entries only")
+    choice = np.minimum((np.cumsum(weights, axis=0) <= u*totals).sum(axis=0), len(corners) - 1)
+    return np.take_along_axis(corners, choice[None], axis=0)[0]
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def sample_particles(sampler, momentum, angle, n=None, rng=None):
+    '''
+        Parameters:
+            sampler (dict):             sampler (see build_sampler)
+            momentum (float array):     incident momentum (in MeV/c), one value or one per sample
+            angle (float array):        incident angle (in deg), one value or one per sample
+            n (int):                    number of samples (default: the broadcast size of momentum and angle)
+            rng (numpy Generator):      random number generator (default: np.random.default_rng())
+
+        Returns:
+            thetas (float array):       outgoing thetas (in deg, folded onto 0-90 as in the store)
+            phis (float array):         outgoing phis (in deg)
+            momenta (float array):      outgoing momenta (in MeV/c)
+    '''
+    rng = np.random.default_rng() if rng is None else rng
+    momentum, angle = np.broadcast_arrays(np.asarray(momentum, dtype=np.float64), np.asarray(angle, dtype=np.float64))
+    n = momentum.size if n is None else n
+    momentum, angle = np.broadcast_to(momentum.ravel(), (n,)) if momentum.size == 1 else momentum.ravel(), np.broadcast_to(angle.ravel(), (n,)) if angle.size == 1 else angle.ravel()
+    u = rng.random((4, n))
+
+    configurations = neighbour_configurations(sampler, momentum, angle, u[0])
+    thetas = _inverse_cdf(sampler['theta'], sampler['theta_edges'], configurations, u[1])
+    n_correlation = len(sampler['correlation_theta_edges']) - 1
+    theta_bins = np.clip(np.searchsorted(sampler['correlation_theta_edges'], thetas, side='right') - 1, 0, n_correlation - 1)
+    rows = configurations*n_correlation + theta_bins
+    fractions = _inverse_cdf(sampler['momentum'], sampler['momentum_edges'], rows, u[2])
+    phis = _inverse_cdf(sampler['phi'], sampler['phi_edges'], rows, u[3])
+    return thetas, phis, fractions*momentum
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    if len(sys.argv) not in (7, 8):
+        print("Usage: python3 analysis_sampler.py <histogram_store.npz> <particle> <material> <momentum> <angle> <n> [output.npz]")
+        sys.exit(1)
+    sampler = build_sampler(load_histogram_store(sys.argv[1]), sys.argv[2], int(sys.argv[3]))
+    thetas, phis, momenta = sample_particles(sampler, float(sys.argv[4]), float(sys.argv[5]), int(sys.argv[6]))
+    if len(sys.argv) == 8:
+        np.savez_compressed(sys.argv[7], theta=thetas, phi=phis, momentum=momenta)
+    for name, values in (('theta', thetas), ('phi', phis), ('momentum', momenta)):
+        print(f"{name}: mean {np.mean(values):.4g}, std {np.std(values):.4g}")
@@ -0,0 +1,235 @@
+# File: analysis_selections.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import ast
+import re
+
+from analysis_helpers import *
+from analysis_io import *
+from analysis_core import *
+from analysis_decays import *
+
+
+# Constants
+#=====================================================
+SELECTIONS_FOLDER = 'selections'                # outputs of a named selection go to plots/<DATA_SUBDIRECTORY>/selections/<name>/
+EVENT_VARIABLES = ('theta', 'phi')              # per-particle variables of the PrimaryEvents ntuple (theta: 0-180 deg)
+MOMENTUM_VARIABLES = ('p', 'p_x', 'p_y', 'p_z')     # per-particle variables that need the momentum columns (in MeV/c)
+FLAG_VARIABLES = {'decayed': 'fIsDecayed', 'absorbed': 'fIsAbsorbed', 'decayed_in': 'fIsDecayedIn',
+                  'decayed_during': 'fIsDecayedDuring', 'decayed_out': 'fIsDecayedOut'}     # AllEvents flags, matched to the particles by fEvent
+CONFIGURATION_VARIABLES = ('momentum', 'theta_incident')    # incident momentum (MeV/c) and angle (deg) of the configuration
+SELECTION_FUNCTIONS = {'abs': np.abs, 'sqrt': np.sqrt, 'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'radians': np.radians, 'degrees': np.degrees}
+BINARY_OPERATORS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide, ast.Mod: np.mod, ast.Pow: np.power}
+COMPARE_OPERATORS = {ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal}
+UNARY_OPERATORS = {ast.Not: np.logical_not, ast.USub: np.negative, ast.UAdd: np.positive}
+
+
+# Named selections
+# Info: the optional [Selections] section of a plot configuration file defines named selections of the outgoing particles,
+#       as expressions of the variables above, e.g.
+#           low_momentum = theta <= 90 and p < 0.5*momentum
+#           phi_sector = theta <= 90 and (phi < 45 or phi > 315)
+#           decayed_out = decayed_out
+#       The expressions are parsed once into a syntax tree of comparisons, arithmetic, and/or/not and the functions
+#       above (anything else, e.g. attribute access or other calls, is rejected), and evaluated as vectorized numpy
+#       masks. analysis_multi.py evaluates every selection of a configuration file on the same read of each data file;
+#       each selection gets its own summary, decay-product table, histogram store and figures (as the reflected
+#       or transmitted analysis, with the thetas above 90 deg folded onto 180-theta).
+#=====================================================
+def compile_selection(name, expression):
+    '''
+        Parameters:
+            name (string):              name of the selection
+            expression (string):        selection expression (see above)
+
+        Returns:
+            selection (dict):           'name', 'expression', parsed 'tree', referenced variable 'names' and whether the
+                                        momentum columns are needed ('momenta')
+
+        Info:
+            Raises ValueError if the name is not a valid file name or the expression is not a valid selection
+    '''
+    if not re.fullmatch(r'[A-Za-z0-9_\-]+', name):
+        raise ValueError(f"Selection {name}: names may only contain letters, digits, '_' and '-'")
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as error:
+        raise ValueError(f"Selection {name}: invalid expression ({error.msg})") from None
+
+    known = set(EVENT_VARIABLES) | set(MOMENTUM_VARIABLES) | set(FLAG_VARIABLES) | set(CONFIGURATION_VARIABLES)
+    functions = [node.func for node in ast.walk(tree) if isinstance(node, ast.Call)]
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in SELECTION_FUNCTIONS or node.keywords or len(node.args) != 1:
+                raise ValueError(f"Selection {name}: only {', '.join(SELECTION_FUNCTIONS)} of one argument can be called")
+        elif isinstance(node, ast.Name):
+            if any(node is function for function in functions):
+                continue
+            if node.id not in known:
+                raise ValueError(f"Selection {name}: unknown variable {node.id}")
+            names.add(node.id)
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float, bool):
+                raise ValueError(f"Selection {name}: only numbers and True/False are allowed as constants")
+        elif not isinstance(node, (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Compare, ast.BinOp, ast.Load,
+                                   *BINARY_OPERATORS, *COMPARE_OPERATORS, *UNARY_OPERATORS)):
+            raise ValueError(f"Selection {name}: {type(node).__name__} is not allowed")
+
+    return {'name': name, 'expression': expression.strip(), 'tree': tree, 'names': names, 'momenta': bool(names & set(MOMENTUM_VARIABLES))}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def read_selections(config):
+    '''
+        Parameters:
+            config (ConfigParser):      plot configuration file
+
+        Returns:
+            selections (list):          compiled selections of the [Selections] section (empty if there is none);
+                                        configparser lowercases the names
+    '''
+    if not config.has_section('Selections'):
+        return []
+    return [compile_selection(name, expression) for name, expression in config.items('Selections', raw=True)]
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def selection_options(options, selection):
+    '''
+        Parameters:
+            options (dict):             settings of the configuration file (see read_analysis_config)
+            selection (dict):           compiled selection (see compile_selection)
+
+        Returns:
+            options (dict):             settings of the named selection: same grid and plots, outputs in
+                                        plots/<DATA_SUBDIRECTORY>/selections/<name>/ and the name as plot label
+    '''
+    options = dict(options)
+    options['SELECTION'] = selection
+    options['DATA_FOLDER'] = selection_data_folder(options['DATA_FOLDER'], selection['name'])
+    options['refl_trans_string'] = selection['name']
+    options['transmit'] = ""
+    return options
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def selection_data_folder(data_folder, name):
+    '''
+        Parameters:
+            data_folder (string):       DATA_SUBDIRECTORY of the configuration file
+            name (string):              name of the selection
+
+        Returns:
+            data_folder (string):       subdirectory of plots/ with the outputs of the selection
+    '''
+    return f"{data_folder}/{SELECTIONS_FOLDER}/{name}"
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def selection_variables(ntuples, names, momentum, theta_incident):
+    '''
+        Parameters:
+            ntuples (dict):             event arrays of the configuration (see load_events)
+            names (set):                variables referenced by the selection
+            momentum (float):           incident momentum (in MeV/c)
+            theta_incident (float):     incident angle (in deg)
+
+        Returns:
+            variables (dict):           arrays (one entry per outgoing particle) or scalars of the referenced variables
+    '''
+    variables = {'momentum': momentum, 'theta_incident': theta_incident}
+    for name in names & set(EVENT_VARIABLES):
+        variables[name] = ntuples["f" + name.capitalize()]
+    for name in names & set(MOMENTUM_VARIABLES):
+        if "fP_y" not in ntuples:
+            raise ValueError(f"Variable {name} needs the momentum columns")
+        variables[name] = ntuples["fP" + name[1:]] if name != 'p' else np.sqrt(np.square(ntuples["fP_x"]) + np.square(ntuples["fP_y"]) + np.square(ntuples["fP_z"]))
+    for name in names & set(FLAG_VARIABLES):
+        variables[name] = np.isin(ntuples["fEvent"], ntuples["all_fEvent"][event_flag(ntuples, FLAG_VARIABLES[name])])
+    return variables
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _evaluate(node, variables):
+    '''
+        Parameters:
+            node (ast node):            node of a compiled selection
+            variables (dict):           values of the variables (see selection_variables)
+
+        Returns:
+            value (array or scalar):    value of the node
+    '''
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, variables)
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        return variables[node.id]
+    if isinstance(node, ast.BoolOp):
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return combine.reduce([np.asarray(_evaluate(value, variables), dtype=bool) for value in node.values])
+    if isinstance(node, ast.UnaryOp):
+        return UNARY_OPERATORS[type(node.op)](_evaluate(node.operand, variables))
+    if isinstance(node, ast.BinOp):
+        return BINARY_OPERATORS[type(node.op)](_evaluate(node.left, variables), _evaluate(node.right, variables))
+    if isinstance(node, ast.Compare):
+        left, result = _evaluate(node.left, variables), True
+        for operator, comparator in zip(node.ops, node.comparators):
+            right = _evaluate(comparator, variables)
+            result = np.logical_and(result, COMPARE_OPERATORS[type(operator)](left, right))
+            left = right
+        return result
+    return SELECTION_FUNCTIONS[node.func.id](_evaluate(node.args[0], variables))
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def selection_mask(selection, ntuples, momentum, theta_incident):
+    '''
+        Parameters:
+            selection (dict):           compiled selection (see compile_selection)
+            ntuples (dict):             event arrays of the configuration (see load_events)
+            momentum (float):           incident momentum (in MeV/c)
+            theta_incident (float):     incident angle (in deg)
+
+        Returns:
+            mask (bool array):          selected outgoing particles of the PrimaryEvents ntuple
+    '''
+    variables = selection_variables(ntuples, selection['names'], momentum, theta_incident)
+    mask = _evaluate(selection['tree'], variables)
+    return np.broadcast_to(np.asarray(mask, dtype=bool), ntuples["fTheta"].shape)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def select_named_events(ntuples, selection, momentum, theta_incident):
+    '''
+        Parameters:
+            ntuples (dict):             event arrays of the configuration (see load_events)
+            selection (dict):           compiled selection (see compile_selection)
+            momentum (float):           incident momentum (in MeV/c)
+            theta_incident (float):     incident angle (in deg)
+
+        Returns:
+            selection (dict):           selected events of the configuration, with the same entries as select_events
+                                        (the momenta are only computed if the momentum columns were read)
+    '''
+    mask = selection_mask(selection, ntuples, momentum, theta_incident)
+    thetas = ntuples["fTheta"][mask]
+    momenta = np.empty(0, dtype=thetas.dtype)
+    if "fP_y" in ntuples:
+        momenta = np.sqrt(np.square(ntuples["fP_x"][mask]) + np.square(ntuples["fP_y"][mask]) + np.square(ntuples["fP_z"][mask]))
+
+    counts = event_counts(ntuples)
+    counts['selected'] = len(thetas)
+    return {
+        'thetas': np.where(thetas > 90, 180 - thetas, thetas),
+        'phis': ntuples["fPhi"][mask],
+        'momenta': momenta,
+        'alphas': selected_alphas(momentum, momenta, theta_incident),
+        'counts': counts,
+        'decay_products': decay_product_counts(ntuples),
+    }
@@ -0,0 +1,308 @@
+# File: analysis_session.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import matplotlib.pyplot as plt
+from collections import OrderedDict
+
+from analysis_helpers import *
+from analysis_binning import *
+from analysis_plotters import *
+from analysis_io import *
+from analysis_results import *
+from analysis_core import *
+from analysis_shared import map_shared
+
+
+# Constants
+#=====================================================
+CACHE_MEMORY_MB = 1024                          # default memory cap of the event cache (in MB)
+HISTOGRAM_RANGES = {'theta': (0, 90), 'phi': (0, 360)}      # ranges of the histograms (momentum: 0 to P_incident, alpha: data range)
+STATISTIC_NAMES = tuple(f'{variable}_{field}' for variable in STATISTIC_VARIABLES for field in STATISTIC_FIELDS)   # statistic fields of the summary
+
+
+# In-memory analysis session
+# Info: interactive (e.g. notebook) access to the configurations of a plot configuration file. Configurations are only
+#       read on first use; their selected events are kept in a least recently used cache, and the least recently used
+#       configurations are dropped once the cached arrays exceed the memory cap. A momentum and angle are matched to
+#       the MOMENTA and ANGLES of the configuration file, so e.g. 80 reads the data file of 80.0 deg, as analysis.py does.
+#
+#       Example:
+#           session = AnalysisSession('plot_config/example.ini', memory_mb=2048)
+#           session.statistics('mu-', 0, 50, 80.0)['theta']['mean']
+#           fig, ax = session.plot_histogram('theta', 'mu-', 0, 50, 80.0)
+#=====================================================
+class AnalysisSession:
+    def __init__(self, config_file, memory_mb=None):
+        '''
+            Parameters:
+                config_file (string):       path to a plot configuration file (see plot_config/example.ini)
+                memory_mb (float):          memory cap of the event cache in MB (default: CACHE_MEMORY_MB in the optional
+                                            [Session] section, or CACHE_MEMORY_MB)
+        '''
+        self.options = read_analysis_config(config_file)
+        config = self.options['config']
+        if memory_mb is None:
+            memory_mb = config.getfloat('Session', 'CACHE_MEMORY_MB', fallback=CACHE_MEMORY_MB)
+        self.memory_limit = int(memory_mb*1024**2)
+        self._cache = OrderedDict()
+        self._cache_nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def selection(self, particle, material, momentum, theta_incident):
+        '''
+            Parameters:
+                particle (string):          particle (e.g. 'mu-')
+                material (int):             material id
+                momentum (float):           incident momentum (in MeV/c)
+                theta_incident (float):     incident angle (in deg)
+
+            Returns:
+                selection (dict):           selected events of the configuration (see select_configuration_events);
+                                            the arrays are shared with the cache and must not be modified
+
+            Info:
+                Raises ValueError if the momentum or angle is not in the grid of the configuration file
+        '''
+        momentum, theta_incident = self._grid_value('MOMENTA', momentum), self._grid_value('ANGLES', theta_incident)
+        key = (particle, int(material), float(momentum), float(theta_incident))
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        self.misses += 1
+        options = self.options
+        path = find_data_file(options['DATA'], material, particle, momentum, theta_incident, options['THICKNESS'])
+        if path is None:
+            candidates = data_file_candidates(options['DATA'], material, particle, momentum, theta_incident, options['THICKNESS'])
+            raise FileNotFoundError(f"No data file found, tried: {', '.join(candidates)}")
+        selection = select_configuration_events(path, momentum, theta_incident, options['TRANSMITTED_PARTICLES'], True, compact=options['COMPACT_DTYPES'])
+        for array in ('thetas', 'phis', 'momenta', 'alphas'):
+            selection[array].flags.writeable = False
+        for array in selection['decay_products']:
+            array.flags.writeable = False
+
+        # Cache the configuration, dropping the least recently used ones above the memory cap
+        nbytes = selection_nbytes(selection)
+        if nbytes <= self.memory_limit:
+            self._cache[key] = selection
+            self._cache_nbytes += nbytes
+            while self._cache_nbytes > self.memory_limit:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_nbytes -= selection_nbytes(evicted)
+        return selection
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def _grid_value(self, name, value):
+        '''
+            Parameters:
+                name (string):              'MOMENTA' or 'ANGLES'
+                value (float):              incident momentum or angle
+
+            Returns:
+                grid_value (float):         value of the grid of the configuration file matching value (as used in the
+                                            data file names)
+        '''
+        grid = self.options[name]
+        matches = np.flatnonzero(np.isclose(grid, value))
+        if len(matches) == 0:
+            raise ValueError(f"{value} is not in the {name} of the configuration file ({', '.join(f'{grid_value:g}' for grid_value in grid)})")
+        return grid[matches[0]]
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def counts(self, particle, material, momentum, theta_incident):
+        '''
+            Parameters:
+                particle, material, momentum, theta_incident:   configuration (see selection)
+
+            Returns:
+                counts (dict):              COUNT_FIELDS tallies of the configuration
+        '''
+        return dict(self.selection(particle, material, momentum, theta_incident)['counts'])
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def statistics(self, particle, material, momentum, theta_incident, streaming=None):
+        '''
+            Parameters:
+                particle, material, momentum, theta_incident:   configuration (see selection)
+                streaming (bool):           use the mergeable accumulators and sketches (default: STREAMING_STATISTICS)
+
+            Returns:
+                statistics (dict):          {variable: {field: value}} for STATISTIC_VARIABLES and STATISTIC_FIELDS
+                                            (NaN if not defined, e.g. mode_error of theta)
+        '''
+        streaming = self.options['STREAMING_STATISTICS'] if streaming is None else streaming
+        results = make_summary(1)
+        selection = self.selection(particle, material, momentum, theta_incident)
+        if selection['counts']['selected'] > 0:
+            record_configuration_statistics(results, 0, momentum, selection, streaming=streaming)
+        return {variable: {field: float(results[f'{variable}_{field}'][0]) for field in STATISTIC_FIELDS} for variable in STATISTIC_VARIABLES}
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def summary(self, particles=None, materials=None, momenta=None, angles=None, streaming=None, n_workers=None):
+        '''
+            Parameters:
+                particles, materials, momenta, angles (arrays):  sub-grid to summarize (default: the grid of the configuration file)
+                streaming (bool):           use the mergeable accumulators and sketches (default: STREAMING_STATISTICS)
+                n_workers (int):            compute the statistics on this many worker processes, which get the selected
+                                            events through shared memory (default: in this process)
+
+            Returns:
+                summary (structured array): counts and statistics indexed by (particle, material, momentum, angle), valid
+                                            where there are at least EVENTS_CUT selected events (as analysis.py)
+        '''
+        options = self.options
+        particles = options['PARTICLES'] if particles is None else particles
+        materials = options['MATERIALS'] if materials is None else materials
+        momenta = options['MOMENTA'] if momenta is None else momenta
+        angles = options['ANGLES'] if angles is None else angles
+        streaming = options['STREAMING_STATISTICS'] if streaming is None else streaming
+
+        summary = make_summary((len(particles), len(materials), len(momenta), len(angles)))
+        valid = []
+        for index in np.ndindex(summary.shape):
+            particle, material, momentum, theta_incident = particles[index[0]], materials[index[1]], momenta[index[2]], angles[index[3]]
+            selection = self.selection(particle, material, momentum, theta_incident)
+            record_counts(summary, index, **selection['counts'])
+            if selection['counts']['selected'] >= options['CUT']:
+                summary['valid'][index] = True
+                if n_workers is None:
+                    record_configuration_statistics(summary, index, momentum, selection, streaming=streaming)
+                else:
+                    valid.append((index, momentum))
+
+        # Statistics on worker processes (the selections are read, and kept in the cache, by this process)
+        if valid:
+            items = ((index, self._shared_arrays(particles[index[0]], materials[index[1]], momentum, angles[index[3]]), (momentum, streaming)) for index, momentum in valid)
+            for index, statistics in map_shared(configuration_statistics, items, n_workers=n_workers):
+                for name in STATISTIC_NAMES:
+                    summary[name][index] = statistics[name]
+        return summary
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def _shared_arrays(self, particle, material, momentum, theta_incident):
+        '''
+            Parameters:
+                particle, material, momentum, theta_incident:   configuration (see selection)
+
+            Returns:
+                arrays (dict):              'thetas', 'phis', 'momenta' and 'alphas' of the selection (for map_shared)
+        '''
+        selection = self.selection(particle, material, momentum, theta_incident)
+        return {array: selection[array] for array in ('thetas', 'phis', 'momenta', 'alphas')}
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def plot_histogram(self, variable, particle, material, momentum, theta_incident, ax=None):
+        '''
+            Parameters:
+                variable (string):          'theta', 'phi', 'momentum' or 'alpha'
+                particle, material, momentum, theta_incident:   configuration (see selection)
+                ax (matplotlib axis):       axis to draw on (default: a new figure)
+
+            Returns:
+                fig (matplotlib figure):    figure of the histogram
+                ax (matplotlib axis):       axis of the histogram
+        '''
+        options = self.options
+        selection = self.selection(particle, material, momentum, theta_incident)
+        statistics = self.statistics(particle, material, momentum, theta_incident)[variable]
+        data = selection['momenta'] if variable == 'momentum' else selection[variable + 's']
+        counts, edges = auto_histogram(data, range=(0, momentum) if variable == 'momentum' else HISTOGRAM_RANGES.get(variable))
+        fig, ax = plt.subplots() if ax is None else (ax.figure, ax)
+
+        material_name = return_surface_name(material)
+        arguments = (counts, edges, statistics['mode'], statistics['mean'], statistics['std_dev'], particle, material_name, momentum, theta_incident, options['EVENTS'])
+        if variable == 'alpha':
+            make_alpha_histogram_counts(fig, ax, *arguments, len(data), options['THICKNESS'])
+        else:
+            make_histogram_counts = {'theta': make_theta_histogram_counts, 'phi': make_phi_histogram_counts, 'momentum': make_momentum_histogram_counts}[variable]
+            make_histogram_counts(fig, ax, *arguments, len(selection['thetas']), options['refl_trans_string'], options['THICKNESS'])
+        return fig, ax
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def plot_correlation(self, variable, particle, material, momentum, theta_incident, ax=None):
+        '''
+            Parameters:
+                variable (string):          'momentum' (theta vs momentum) or 'phi' (theta vs phi)
+                particle, material, momentum, theta_incident:   configuration (see selection)
+                ax (matplotlib axis):       axis to draw on (default: a new figure)
+
+            Returns:
+                fig (matplotlib figure):    figure of the 2D histogram
+                ax (matplotlib axis):       axis of the 2D histogram
+        '''
+        options = self.options
+        selection = self.selection(particle, material, momentum, theta_incident)
+        thetas = selection['thetas']
+        data = selection['momenta'] if variable == 'momentum' else selection['phis']
+        theta_edges = auto_bin_edges(thetas, range=HISTOGRAM_RANGES['theta'])
+        data_edges = auto_bin_edges(data, range=(0, momentum) if variable == 'momentum' else HISTOGRAM_RANGES['phi'])
+        counts, _, _ = np.histogram2d(thetas, data, bins=[theta_edges, data_edges])
+        correlation = np.corrcoef(thetas, data)[0][1]
+        fig, ax = plt.subplots() if ax is None else (ax.figure, ax)
+
+        make_correlation_histogram_counts = {'momentum': make_correlation_theta_momentum_histogram_counts, 'phi': make_correlation_theta_phi_histogram_counts}[variable]
+        make_correlation_histogram_counts(fig, ax, counts, theta_edges, data_edges, correlation, particle, return_surface_name(material), momentum, theta_incident,
+                                          options['EVENTS'], len(thetas), options['refl_trans_string'], options['THICKNESS'])
+        return fig, ax
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def cache_info(self):
+        '''
+            Returns:
+                info (dict):                'hits', 'misses', 'entries', 'nbytes' and 'limit' (in bytes) of the event cache
+        '''
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache), 'nbytes': self._cache_nbytes, 'limit': self.memory_limit}
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def clear_cache(self):
+        '''
+            Drops every cached configuration
+        '''
+        self._cache.clear()
+        self._cache_nbytes = 0
+
+
+# Functions
+#=====================================================
+def configuration_statistics(arrays, momentum, streaming):
+    '''
+        Parameters:
+            arrays (dict):          'thetas', 'phis', 'momenta' and 'alphas' of a selection (e.g. mapped from shared memory)
+            momentum (float):       incident momentum of the configuration
+            streaming (bool):       use the mergeable accumulators and sketches
+
+        Returns:
+            statistics (dict):      STATISTIC_NAMES fields of the configuration (see record_configuration_statistics)
+    '''
+    results = make_summary(1)
+    record_configuration_statistics(results, 0, momentum, arrays, streaming=streaming)
+    return {name: float(results[name][0]) for name in STATISTIC_NAMES}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def selection_nbytes(selection):
+    '''
+        Parameters:
+            selection (dict):       selected events (see select_configuration_events)
+
+        Returns:
+            nbytes (int):           memory held by the arrays of the selection (in bytes)
+    '''
+    return sum(value.nbytes for value in selection.values() if isinstance(value, np.ndarray)) + sum(array.nbytes for array in selection['decay_products'])
@@ -0,0 +1,176 @@
+# File: analysis_shared.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import os
+import weakref
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+
+# Shared-memory transport of event arrays
+# Info: submitting a selection to a worker process pickles its arrays (millions of thetas, phis and momenta) into the
+#       worker, which can cost more than the work itself. SharedArrays copies the arrays once into shared memory
+#       segments and only their handles (segment name, shape, dtype) are sent to the workers, which map the same memory
+#       with attached_arrays. The process that created the segments owns them: they are released (closed and unlinked)
+#       by release(), at the end of a with block, or when the SharedArrays is garbage collected. map_shared runs a
+#       function over many configurations on a process pool and releases the segments of each configuration as soon
+#       as its result is back, keeping at most max_pending configurations in shared memory.
+#
+#       Example:
+#           with SharedArrays({'thetas': thetas, 'phis': phis}) as shared:
+#               future = executor.submit(function, shared.handles)
+#=====================================================
+def _release_segments(segments):
+    '''
+        Parameters:
+            segments (list):            shared memory segments owned by this process (emptied in place)
+
+        Returns:
+    '''
+    while segments:
+        segment = segments.pop()
+        segment.close()
+        segment.unlink()
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+class SharedArrays:
+    def __init__(self, arrays):
+        '''
+            Parameters:
+                arrays (dict):              numpy arrays to share, keyed by name (copied into one segment each)
+        '''
+        self._segments = []
+        self._finalizer = weakref.finalize(self, _release_segments, self._segments)
+        self.handles = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._segments.append(segment)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+            self.handles[name] = (segment.name, array.shape, array.dtype.str)
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    @property
+    def nbytes(self):
+        '''
+            Returns:
+                nbytes (int):               size of the shared memory segments (in bytes)
+        '''
+        return sum(segment.size for segment in self._segments)
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def release(self):
+        '''
+            Closes and unlinks the segments (the handles are no longer valid afterwards; calling it again does nothing)
+        '''
+        self._finalizer()
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.release()
+
+
+# Functions
+#=====================================================
+@contextmanager
+def attached_arrays(handles):
+    '''
+        Parameters:
+            handles (dict):             handles of the arrays (see SharedArrays.handles)
+
+        Returns:
+            arrays (dict):              read-only arrays mapped onto the shared memory segments, valid inside the with
+                                        block only (copy anything that has to outlive it)
+    '''
+    segments = []
+    arrays = {}
+    try:
+        for name, (segment_name, shape, dtype) in handles.items():
+            segment = shared_memory.SharedMemory(name=segment_name)
+            segments.append(segment)
+            array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+            array.flags.writeable = False
+            arrays[name] = array
+        yield arrays
+    finally:
+        arrays.clear()
+        for segment in segments:
+            segment.close()
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _run_attached(function, handles, arguments):
+    '''
+        Parameters:
+            function (callable):        function(arrays, *arguments), run in a worker process
+            handles (dict):             handles of the shared arrays (see SharedArrays.handles)
+            arguments (tuple):          other (small) arguments of the function
+
+        Returns:
+            result:                     result of the function (must not hold views of the shared arrays)
+    '''
+    with attached_arrays(handles) as arrays:
+        return function(arrays, *arguments)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _collect_done(pending):
+    '''
+        Parameters:
+            pending (dict):             future -> (key, SharedArrays) of the submitted configurations (updated in place)
+
+        Returns:
+            results (generator):        (key, result) of the configurations completed next, whose segments are released
+    '''
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        key, shared = pending.pop(future)
+        shared.release()
+        yield key, future.result()
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def map_shared(function, items, n_workers=None, max_pending=None):
+    '''
+        Parameters:
+            function (callable):        module-level function(arrays, *arguments) returning a small result
+            items (iterable):           (key, arrays dict, arguments tuple) of each configuration (consumed lazily)
+            n_workers (int):            number of worker processes (default: number of CPUs)
+            max_pending (int):          maximum number of configurations in shared memory at once (default: 2*n_workers)
+
+        Returns:
+            results (generator):        (key, result) of each configuration, in order of completion
+
+        Info:
+            The segments of a configuration are released as soon as its result is back (or if the pool fails)
+    '''
+    n_workers = n_workers or os.cpu_count()
+    max_pending = max_pending or 2*n_workers
+    pending = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        try:
+            for key, arrays, arguments in items:
+                while len(pending) >= max_pending:
+                    yield from _collect_done(pending)
+                shared = SharedArrays(arrays)
+                pending[executor.submit(_run_attached, function, shared.handles, arguments)] = (key, shared)
+            while pending:
+                yield from _collect_done(pending)
+        finally:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            for _, shared in pending.values():
+                shared.release()
@@ -0,0 +1,389 @@
+# File: analysis_sketches.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import math
+
+from analysis_binning import finite_data, uniform_histogram, auto_width_rule
+from analysis_helpers import histogram_mode_hwhm
+
+
+# Mergeable sketches for the mode, HWHM and quantiles
+# Info: a sketch summarizes a data set in a fixed amount of memory, can be updated chunk by chunk, and two
+#       sketches of the same kind (same binning/accuracy) merge exactly into the sketch of the union of the data,
+#       whatever the order of the chunks, shards or worker processes.
+#
+#       Accuracy:
+#           quantile sketch:    every quantile is within a relative error of relative_accuracy of the exact order
+#                               statistic of rank floor(q*(n-1)) (values with |x| < min_value are reported as 0)
+#           histogram sketch:   exact counts on the fine bins, so the mode/HWHM have the resolution of the fine bins.
+#                               With rebin='auto' the fine bins are grouped to the width that mode_helper (numpy 'auto'
+#                               binning) would choose, using the IQR of the quantile sketch and the exact min/max; the
+#                               coarse edges are snapped to the fine grid, so they are off by less than one fine bin.
+#=====================================================
+
+# Constants
+#=====================================================
+RELATIVE_ACCURACY = 0.005                       # default relative accuracy of the quantile sketch
+MIN_VALUE = 1e-9                                # |x| below this is counted as 0 by the quantile sketch
+FINE_BINS = 1000                                # default number of fine bins of the histogram sketch
+
+
+# Functions for the quantile sketch (logarithmic buckets with bounded relative error)
+#=====================================================
+def make_quantile_sketch(relative_accuracy=RELATIVE_ACCURACY, min_value=MIN_VALUE):
+    '''
+        Parameters:
+            relative_accuracy (float):  bound on the relative error of the quantiles (e.g. 0.005 for 0.5%)
+            min_value (float):          smallest |x| resolved (smaller values are counted as 0)
+
+        Returns:
+            sketch (dict):              empty quantile sketch
+
+        Info:
+            Values are counted in buckets (gamma^(k-1), gamma^k] with gamma = (1+a)/(1-a), separately for positive
+            and negative values. The number of buckets grows with log(max/min_value)/a, not with the number of entries.
+    '''
+    gamma = (1 + relative_accuracy)/(1 - relative_accuracy)
+    sketch = {
+        'relative_accuracy': float(relative_accuracy),
+        'gamma': gamma,
+        'min_value': float(min_value),
+        'positive_offset': 0,                       # key of positive_counts[0]
+        'positive_counts': np.zeros(0, dtype=np.int64),
+        'negative_offset': 0,                       # key of negative_counts[0] (keys of |x| for x < 0)
+        'negative_counts': np.zeros(0, dtype=np.int64),
+        'zero_count': 0,
+        'count': 0,                                 # number of finite entries
+        'nan_count': 0,                             # number of NaN/inf entries (ignored)
+        'min': np.inf,
+        'max': -np.inf,
+    }
+    return sketch
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _add_to_buckets(offset, counts, keys, key_counts):
+    '''
+        Parameters:
+            offset (int):               key of counts[0]
+            counts (int array):         bucket counts
+            keys (int array):           keys to add (sorted, unique)
+            key_counts (int array):     count of each key
+
+        Returns:
+            offset (int):               key of the new counts[0]
+            counts (int array):         bucket counts, extended if needed
+    '''
+    if len(keys) == 0:
+        return offset, counts
+    if len(counts) == 0:
+        offset = int(keys[0])
+    new_offset = min(offset, int(keys[0]))
+    new_length = max(offset + len(counts), int(keys[-1]) + 1) - new_offset
+    if new_offset != offset or new_length != len(counts):
+        extended = np.zeros(new_length, dtype=np.int64)
+        extended[offset - new_offset:offset - new_offset + len(counts)] = counts
+        counts = extended
+        offset = new_offset
+    counts[keys - offset] += key_counts
+    return offset, counts
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _bucket_keys(sketch, magnitudes):
+    '''
+        Parameters:
+            sketch (dict):              quantile sketch
+            magnitudes (float array):   |x| of the entries (>= min_value)
+
+        Returns:
+            keys (int array):           sorted unique bucket keys
+            key_counts (int array):     number of entries of each key
+    '''
+    keys = np.ceil(np.log(magnitudes.astype(np.float64))/math.log(sketch['gamma'])).astype(np.int64)
+    if len(keys) == 0:
+        return keys, keys
+    key_min = keys.min()
+    key_counts = np.bincount(keys - key_min)
+    present = np.flatnonzero(key_counts)
+    return present + key_min, key_counts[present]
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def update_quantile_sketch(sketch, data):
+    '''
+        Parameters:
+            sketch (dict):              quantile sketch (updated in place)
+            data (float array):         chunk of data (NaN/inf entries are counted in nan_count and ignored)
+
+        Returns:
+            sketch (dict):              the updated sketch
+    '''
+    data = np.asarray(data).ravel()
+    finite = finite_data(data)
+    sketch['nan_count'] += len(data) - len(finite)
+    if len(finite) == 0:
+        return sketch
+
+    sketch['count'] += len(finite)
+    sketch['min'] = min(sketch['min'], float(finite.min()))
+    sketch['max'] = max(sketch['max'], float(finite.max()))
+
+    magnitudes = np.abs(finite)
+    resolved = magnitudes >= sketch['min_value']
+    sketch['zero_count'] += int(len(finite) - np.count_nonzero(resolved))
+
+    positive = resolved & (finite > 0)
+    keys, key_counts = _bucket_keys(sketch, magnitudes[positive])
+    sketch['positive_offset'], sketch['positive_counts'] = _add_to_buckets(sketch['positive_offset'], sketch['positive_counts'], keys, key_counts)
+
+    negative = resolved & (finite < 0)
+    keys, key_counts = _bucket_keys(sketch, magnitudes[negative])
+    sketch['negative_offset'], sketch['negative_counts'] = _add_to_buckets(sketch['negative_offset'], sketch['negative_counts'], keys, key_counts)
+    return sketch
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_quantile_sketches(sketch, other):
+    '''
+        Parameters:
+            sketch (dict):              quantile sketch (updated in place)
+            other (dict):               quantile sketch with the same relative_accuracy and min_value
+
+        Returns:
+            sketch (dict):              the merged sketch (exactly the sketch of the union of both data sets)
+    '''
+    if sketch['gamma'] != other['gamma'] or sketch['min_value'] != other['min_value']:
+        raise ValueError("Quantile sketches with different accuracies cannot be merged")
+    for sign in ('positive', 'negative'):
+        counts = other[f'{sign}_counts']
+        keys = np.flatnonzero(counts)
+        sketch[f'{sign}_offset'], sketch[f'{sign}_counts'] = _add_to_buckets(sketch[f'{sign}_offset'], sketch[f'{sign}_counts'], keys + other[f'{sign}_offset'], counts[keys])
+    for key in ('zero_count', 'count', 'nan_count'):
+        sketch[key] += other[key]
+    sketch['min'] = min(sketch['min'], other['min'])
+    sketch['max'] = max(sketch['max'], other['max'])
+    return sketch
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def sketch_quantiles(sketch, quantiles):
+    '''
+        Parameters:
+            sketch (dict):              quantile sketch
+            quantiles (float array):    quantiles to estimate (between 0 and 1)
+
+        Returns:
+            values (float array):       estimated quantiles (NaN if the sketch is empty)
+    '''
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    if sketch['count'] == 0:
+        return np.full(quantiles.shape, np.nan)
+
+    # Representative value of each bucket, in increasing order (negatives, zero, positives)
+    gamma = sketch['gamma']
+    negative_keys = sketch['negative_offset'] + np.arange(len(sketch['negative_counts']))
+    positive_keys = sketch['positive_offset'] + np.arange(len(sketch['positive_counts']))
+    values = np.concatenate([
+        -2*np.power(gamma, negative_keys[::-1].astype(np.float64))/(gamma + 1),
+        [0.0],
+        2*np.power(gamma, positive_keys.astype(np.float64))/(gamma + 1),
+    ])
+    counts = np.concatenate([sketch['negative_counts'][::-1], [sketch['zero_count']], sketch['positive_counts']])
+
+    # Bucket holding the entry of rank floor(q*(n-1))
+    ranks = np.floor(quantiles*(sketch['count'] - 1))
+    indices = np.searchsorted(np.cumsum(counts), ranks, side='right')
+    return np.clip(values[indices], sketch['min'], sketch['max'])
+
+
+# Functions for the fine fixed-bin histogram sketch
+#=====================================================
+def make_histogram_sketch(low, high, bins=FINE_BINS):
+    '''
+        Parameters:
+            low (float):                lower edge of the fine bins
+            high (float):               upper edge of the fine bins
+            bins (int):                 number of fine bins
+
+        Returns:
+            sketch (dict):              empty histogram sketch (counts outside [low, high] go to underflow/overflow)
+    '''
+    sketch = {
+        'edges': np.linspace(low, high, bins + 1),
+        'counts': np.zeros(bins, dtype=np.int64),
+        'underflow': 0,
+        'overflow': 0,
+        'nan_count': 0,
+    }
+    return sketch
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def update_histogram_sketch(sketch, data):
+    '''
+        Parameters:
+            sketch (dict):              histogram sketch (updated in place)
+            data (float array):         chunk of data (NaN/inf entries are counted in nan_count and ignored)
+
+        Returns:
+            sketch (dict):              the updated sketch
+    '''
+    data = np.asarray(data).ravel()
+    finite = finite_data(data)
+    sketch['nan_count'] += len(data) - len(finite)
+    sketch['underflow'] += int(np.count_nonzero(finite < sketch['edges'][0]))
+    sketch['overflow'] += int(np.count_nonzero(finite > sketch['edges'][-1]))
+    sketch['counts'] += uniform_histogram(finite, sketch['edges'])
+    return sketch
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_histogram_sketches(sketch, other):
+    '''
+        Parameters:
+            sketch (dict):              histogram sketch (updated in place)
+            other (dict):               histogram sketch with the same edges
+
+        Returns:
+            sketch (dict):              the merged sketch (exactly the sketch of the union of both data sets)
+    '''
+    if not np.array_equal(sketch['edges'], other['edges']):
+        raise ValueError("Histogram sketches with different binnings cannot be merged")
+    sketch['counts'] += other['counts']
+    for key in ('underflow', 'overflow', 'nan_count'):
+        sketch[key] += other[key]
+    return sketch
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def rebin_histogram_sketch(sketch, width, start=None):
+    '''
+        Parameters:
+            sketch (dict):              histogram sketch
+            width (float):              target bin width (snapped to a whole number of fine bins)
+            start (float):              value where the first coarse bin starts (snapped to the fine grid), None for low
+
+        Returns:
+            counts (int array):         coarse bin counts
+            edges (float array):        coarse bin edges (a subset of the fine edges)
+    '''
+    edges = sketch['edges']
+    fine_width = edges[1] - edges[0]
+    group = max(1, int(round(width/fine_width)))
+    first = 0 if start is None else int(np.clip(np.floor((start - edges[0])/fine_width), 0, len(sketch['counts']) - 1))
+    counts = sketch['counts'][first:]
+    n_coarse = -(-len(counts)//group)
+    padded = np.zeros(n_coarse*group, dtype=counts.dtype)
+    padded[:len(counts)] = counts
+    coarse_edges = edges[first + group*np.arange(n_coarse + 1)] if first + group*n_coarse < len(edges) else \
+        np.append(edges[first + group*np.arange(n_coarse)], edges[first] + group*n_coarse*fine_width)
+    return padded.reshape(n_coarse, group).sum(axis=1), coarse_edges
+
+
+# Functions for the combined statistics sketch (histogram + quantiles of one variable)
+#=====================================================
+def make_statistics_sketch(low, high, bins=FINE_BINS, relative_accuracy=RELATIVE_ACCURACY):
+    '''
+        Parameters:
+            low (float):                lower edge of the fine bins (e.g. 0 for theta)
+            high (float):               upper edge of the fine bins (e.g. 90 for theta)
+            bins (int):                 number of fine bins
+            relative_accuracy (float):  bound on the relative error of the quantiles
+
+        Returns:
+            sketch (dict):              {'histogram': histogram sketch, 'quantiles': quantile sketch}
+    '''
+    return {'histogram': make_histogram_sketch(low, high, bins), 'quantiles': make_quantile_sketch(relative_accuracy)}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def update_statistics_sketch(sketch, data):
+    '''
+        Parameters:
+            sketch (dict):              statistics sketch (updated in place)
+            data (float array):         chunk of data
+
+        Returns:
+            sketch (dict):              the updated sketch
+    '''
+    update_histogram_sketch(sketch['histogram'], data)
+    update_quantile_sketch(sketch['quantiles'], data)
+    return sketch
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_statistics_sketches(sketch, other):
+    '''
+        Parameters:
+            sketch (dict):              statistics sketch (updated in place)
+            other (dict):               statistics sketch with the same binning and accuracy
+
+        Returns:
+            sketch (dict):              the merged sketch
+    '''
+    merge_histogram_sketches(sketch['histogram'], other['histogram'])
+    merge_quantile_sketches(sketch['quantiles'], other['quantiles'])
+    return sketch
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def sketch_mode(sketch, rebin='auto'):
+    '''
+        Parameters:
+            sketch (dict):              statistics sketch
+            rebin (string or float):    'auto' to group the fine bins to the width mode_helper would use,
+                                        a bin width, or None to use the fine bins
+
+        Returns:
+            mode (float):               center of the maximum bin (NaN if the sketch is empty)
+            left_hwhm (float):          left HWHM (as mode_helper)
+            right_hwhm (float):         right HWHM (as mode_helper)
+    '''
+    quantiles = sketch['quantiles']
+    if quantiles['count'] == 0:
+        return np.nan, np.nan, np.nan
+
+    histogram = sketch['histogram']
+    if rebin is None:
+        return histogram_mode_hwhm(histogram['counts'], histogram['edges'])
+
+    start = None
+    width = rebin
+    if rebin == 'auto':
+        data_range = quantiles['max'] - quantiles['min']
+        q75, q25 = sketch_quantiles(quantiles, (0.75, 0.25))
+        width = auto_width_rule(quantiles['count'], data_range, q75 - q25)
+        if width > 0:
+            width = data_range/math.ceil(data_range/width)      # numpy splits the data range into whole bins
+        start = quantiles['min']
+    counts, edges = rebin_histogram_sketch(histogram, width, start)
+    return histogram_mode_hwhm(counts, edges)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def sketch_statistics(sketch, quantiles=(0.25, 0.5, 0.75), rebin='auto'):
+    '''
+        Parameters:
+            sketch (dict):              statistics sketch
+            quantiles (float array):    quantiles to estimate
+            rebin (string or float):    binning of the mode/HWHM estimate (see sketch_mode)
+
+        Returns:
+            statistics (dict):          'count', 'min', 'max', 'mode', 'mode_hwhm_left', 'mode_hwhm_right' and 'quantiles'
+    '''
+    mode, left_hwhm, right_hwhm = sketch_mode(sketch, rebin)
+    statistics = {
+        'count': sketch['quantiles']['count'],
+        'min': sketch['quantiles']['min'],
+        'max': sketch['quantiles']['max'],
+        'mode': mode,
+        'mode_hwhm_left': left_hwhm,
+        'mode_hwhm_right': right_hwhm,
+        'quantiles': sketch_quantiles(sketch['quantiles'], quantiles),
+    }
+    return statistics
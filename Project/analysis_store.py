@@ -0,0 +1,352 @@
+# File: analysis_store.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+
+
+# Constants
+#=====================================================
+HISTOGRAMS_1D = ('theta', 'phi', 'momentum', 'alpha')           # 1D histograms kept for every configuration
+HISTOGRAMS_2D = ('theta_momentum', 'theta_phi')                 # 2D (correlation) histograms kept for every configuration
+MOMENT_VARIABLES = ('theta', 'phi', 'momentum', 'alpha')        # order of the variables in store['moments']
+CROSS_MOMENTS = ('theta_momentum', 'theta_phi')                 # order of the products in store['cross_moments']
+MOMENTUM_ANGLE_BINS = 60                                        # momentum bins of the 2D histogram of momenta vs incident angle
+
+
+# Functions to build, fill, save and read the fixed-binning histogram store
+#=====================================================
+def make_histogram_binning(theta_bins=90, phi_bins=72, momentum_bins=100, alpha_bins=100, alpha_range=(0, 2), correlation_theta_bins=45, correlation_momentum_bins=50, correlation_phi_bins=36):
+    '''
+        Parameters:
+            theta_bins (int):                   number of outgoing theta bins on (0, 90) deg
+            phi_bins (int):                     number of outgoing phi bins on (0, 360) deg
+            momentum_bins (int):                number of bins of the outgoing momentum fraction P/P_incident on (0, 1)
+            alpha_bins (int):                   number of alpha bins on alpha_range
+            alpha_range (float, float):         range of the alpha histogram
+            correlation_theta_bins (int):       number of theta bins of the 2D histograms
+            correlation_momentum_bins (int):    number of momentum fraction bins of the 2D theta vs momentum histogram
+            correlation_phi_bins (int):         number of phi bins of the 2D theta vs phi histogram
+
+        Returns:
+            binning (dict):                     bin edges of every histogram in the store
+
+        Info:
+            The same edges are used for every configuration, so the stored distributions can be compared across the grid.
+            Momentum is binned as a fraction of the incident momentum, and scaled back to MeV/c when read from the store.
+    '''
+    binning = {
+        'theta_edges': np.linspace(0, 90, theta_bins + 1),
+        'phi_edges': np.linspace(0, 360, phi_bins + 1),
+        'momentum_edges': np.linspace(0, 1, momentum_bins + 1),
+        'alpha_edges': np.linspace(alpha_range[0], alpha_range[1], alpha_bins + 1),
+        'correlation_theta_edges': np.linspace(0, 90, correlation_theta_bins + 1),
+        'correlation_momentum_edges': np.linspace(0, 1, correlation_momentum_bins + 1),
+        'correlation_phi_edges': np.linspace(0, 360, correlation_phi_bins + 1),
+    }
+    return binning
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def read_histogram_binning(config):
+    '''
+        Parameters:
+            config (ConfigParser):      plot configuration (the optional [HistogramStore] section is read)
+
+        Returns:
+            binning (dict):             bin edges of every histogram in the store (see make_histogram_binning)
+    '''
+    section = 'HistogramStore'
+    alpha_range = config.get(section, 'ALPHA_RANGE', fallback='0, 2')
+    binning = make_histogram_binning(
+        theta_bins=config.getint(section, 'THETA_BINS', fallback=90),
+        phi_bins=config.getint(section, 'PHI_BINS', fallback=72),
+        momentum_bins=config.getint(section, 'MOMENTUM_BINS', fallback=100),
+        alpha_bins=config.getint(section, 'ALPHA_BINS', fallback=100),
+        alpha_range=tuple(map(float, alpha_range.split(','))),
+        correlation_theta_bins=config.getint(section, 'CORRELATION_THETA_BINS', fallback=45),
+        correlation_momentum_bins=config.getint(section, 'CORRELATION_MOMENTUM_BINS', fallback=50),
+        correlation_phi_bins=config.getint(section, 'CORRELATION_PHI_BINS', fallback=36),
+    )
+    return binning
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def init_histogram_store(binning, particles, materials, momenta, angles, thickness, events, refl_trans_string):
+    '''
+        Parameters:
+            binning (dict):                 bin edges (see make_histogram_binning)
+            particles (string array):       particles of the grid
+            materials (int array):          materials of the grid
+            momenta (float array):          incident momenta of the grid
+            angles (float array):           incident angles of the grid
+            thickness (float):              thickness of the plate (in mm)
+            events (int):                   number of events per configuration
+            refl_trans_string (string):     "Reflected" or "Transmitted"
+
+        Returns:
+            store (dict):                   empty histogram store
+
+        Info:
+            Histograms are kept as uint32 counts in tensors indexed by (particle, material, momentum, angle, bins...).
+            store['moments'] holds [n, sum, sum of squares] of theta, phi, momentum and alpha for each configuration, and
+            store['cross_moments'] the sums of theta*momentum and theta*phi, so that means, standard deviations and correlations
+            are exact and do not depend on the binning.
+    '''
+    grid = (len(particles), len(materials), len(momenta), len(angles))
+    store = dict(binning)
+    store['particles'] = np.asarray(particles, dtype=str)
+    store['materials'] = np.asarray(materials, dtype=int)
+    store['momenta'] = np.asarray(momenta, dtype=float)
+    store['angles'] = np.asarray(angles, dtype=float)
+    store['thickness'] = np.asarray(thickness, dtype=float)
+    store['events'] = np.asarray(events, dtype=int)
+    store['refl_trans_string'] = np.asarray(refl_trans_string, dtype=str)
+    store['filled'] = np.zeros(grid, dtype=bool)
+
+    store['theta'] = np.zeros(grid + (len(binning['theta_edges']) - 1,), dtype=np.uint32)
+    store['phi'] = np.zeros(grid + (len(binning['phi_edges']) - 1,), dtype=np.uint32)
+    store['momentum'] = np.zeros(grid + (len(binning['momentum_edges']) - 1,), dtype=np.uint32)
+    store['alpha'] = np.zeros(grid + (len(binning['alpha_edges']) - 1,), dtype=np.uint32)
+    store['theta_momentum'] = np.zeros(grid + (len(binning['correlation_theta_edges']) - 1, len(binning['correlation_momentum_edges']) - 1), dtype=np.uint32)
+    store['theta_phi'] = np.zeros(grid + (len(binning['correlation_theta_edges']) - 1, len(binning['correlation_phi_edges']) - 1), dtype=np.uint32)
+
+    store['moments'] = np.zeros(grid + (len(MOMENT_VARIABLES), 3), dtype=float)
+    store['cross_moments'] = np.zeros(grid + (len(CROSS_MOMENTS),), dtype=float)
+    return store
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def _moments(data):
+    '''
+        Parameters:
+            data (float array):     data set (NaNs are ignored)
+
+        Returns:
+            moments (float array):  [n, sum, sum of squares] of the finite values of data
+    '''
+    data = np.asarray(data, dtype=float)
+    data = data[np.isfinite(data)]
+    return np.array([len(data), np.sum(data), np.sum(np.square(data))])
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def fill_histogram_store(store, index, momentum, thetas, phis, momenta=None, alphas=None):
+    '''
+        Parameters:
+            store (dict):                   histogram store (see init_histogram_store)
+            index (int, int, int, int):     (particle, material, momentum, angle) index of the configuration
+            momentum (float):               incident momentum of the configuration
+            thetas (float array):           thetas of reflected/transmitted particles (already folded onto 0-90 deg)
+            phis (float array):             phis of reflected/transmitted particles
+            momenta (float array):          momenta of reflected/transmitted particles (None if not read)
+            alphas (float array):           alphas of reflected particles (None if not computed)
+
+        Returns:
+
+        Info:
+            Adds the events of one configuration to the store. Can be called several times for the same index (e.g. one
+            call per file or per chunk of events).
+    '''
+    thetas = np.asarray(thetas)
+    phis = np.asarray(phis)
+    store['theta'][index] += np.histogram(thetas, bins=store['theta_edges'])[0].astype(np.uint32)
+    store['phi'][index] += np.histogram(phis, bins=store['phi_edges'])[0].astype(np.uint32)
+    store['theta_phi'][index] += np.histogram2d(thetas, phis, bins=[store['correlation_theta_edges'], store['correlation_phi_edges']])[0].astype(np.uint32)
+    store['moments'][index][0] += _moments(thetas)
+    store['moments'][index][1] += _moments(phis)
+    store['cross_moments'][index][1] += np.sum(thetas*phis, dtype=float)
+
+    if momenta is not None:
+        momenta = np.asarray(momenta)
+        fractions = momenta/momentum
+        store['momentum'][index] += np.histogram(fractions, bins=store['momentum_edges'])[0].astype(np.uint32)
+        store['theta_momentum'][index] += np.histogram2d(thetas, fractions, bins=[store['correlation_theta_edges'], store['correlation_momentum_edges']])[0].astype(np.uint32)
+        store['moments'][index][2] += _moments(momenta)
+        store['cross_moments'][index][0] += np.sum(thetas*momenta, dtype=float)
+
+    if alphas is not None:
+        alphas = np.asarray(alphas)
+        store['alpha'][index] += np.histogram(alphas[np.isfinite(alphas)], bins=store['alpha_edges'])[0].astype(np.uint32)
+        store['moments'][index][3] += _moments(alphas)
+
+    store['filled'][index] = True
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def merge_histogram_stores(store, other):
+    '''
+        Parameters:
+            store (dict):       histogram store (updated in place)
+            other (dict):       histogram store of the same grid and binning (e.g. filled by another map task)
+
+        Returns:
+            store (dict):       the merged store
+
+        Info:
+            Counts and moments are summed, so stores filled from disjoint (or overlapping) sets of events merge exactly
+    '''
+    for key in ('theta_edges', 'phi_edges', 'momentum_edges', 'alpha_edges', 'correlation_theta_edges', 'correlation_momentum_edges', 'correlation_phi_edges', 'momenta', 'angles'):
+        if not np.array_equal(store[key], other[key]):
+            raise ValueError(f"Histogram stores with different {key} cannot be merged")
+    for key in HISTOGRAMS_1D + HISTOGRAMS_2D + ('moments', 'cross_moments'):
+        store[key] += other[key]
+    store['filled'] |= other['filled']
+    return store
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_histogram_store(store, path):
+    '''
+        Parameters:
+            store (dict):       histogram store
+            path (string):      path of the output .npz file
+
+        Returns:
+
+        Info:
+            Saves the store as a compressed numpy archive (one array per key)
+    '''
+    np.savez_compressed(path, **store)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_histogram_store(path):
+    '''
+        Parameters:
+            path (string):      path of a .npz file written by save_histogram_store
+
+        Returns:
+            store (dict):       histogram store
+    '''
+    with np.load(path) as archive:
+        store = {key: archive[key] for key in archive.files}
+    return store
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def store_index(store, particle, material, momentum, theta_incident):
+    '''
+        Parameters:
+            store (dict):               histogram store
+            particle (string):          name of particle
+            material (int):             material of plate
+            momentum (float):           incident momentum
+            theta_incident (float):     incident theta
+
+        Returns:
+            index (int, int, int, int): (particle, material, momentum, angle) index of the configuration in the store
+    '''
+    particle_index = np.flatnonzero(store['particles'] == particle)
+    material_index = np.flatnonzero(store['materials'] == material)
+    momentum_index = np.flatnonzero(np.isclose(store['momenta'], momentum))
+    angle_index = np.flatnonzero(np.isclose(store['angles'], theta_incident))
+    if min(len(particle_index), len(material_index), len(momentum_index), len(angle_index)) == 0:
+        raise KeyError(f"configuration ({particle}, {material}, {momentum}, {theta_incident}) not in histogram store")
+    return (particle_index[0], material_index[0], momentum_index[0], angle_index[0])
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def store_histogram(store, name, index):
+    '''
+        Parameters:
+            store (dict):                   histogram store
+            name (string):                  one of HISTOGRAMS_1D or HISTOGRAMS_2D
+            index (int, int, int, int):     (particle, material, momentum, angle) index of the configuration
+
+        Returns:
+            histogram (tuple):              (counts, edges) for 1D histograms, (counts, x_edges, y_edges) for 2D histograms
+
+        Info:
+            Momentum edges are returned in MeV/c (the momentum fraction edges scaled by the incident momentum)
+    '''
+    momentum = store['momenta'][index[2]]
+    counts = store[name][index]
+    if name == 'theta_momentum':
+        return counts, store['correlation_theta_edges'], momentum*store['correlation_momentum_edges']
+    if name == 'theta_phi':
+        return counts, store['correlation_theta_edges'], store['correlation_phi_edges']
+    if name == 'momentum':
+        return counts, momentum*store['momentum_edges']
+    return counts, store[f'{name}_edges']
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def store_statistics(store, name, index):
+    '''
+        Parameters:
+            store (dict):                   histogram store
+            name (string):                  one of MOMENT_VARIABLES
+            index (int, int, int, int):     (particle, material, momentum, angle) index of the configuration
+
+        Returns:
+            n (int):                        number of entries
+            mean (float):                   mean (exact, from the stored moments)
+            std_dev (float):                standard deviation (exact, from the stored moments)
+            mode (float):                   center of the maximum bin of the stored histogram
+    '''
+    n, total, total_squares = store['moments'][index][MOMENT_VARIABLES.index(name)]
+    mean = total/n if n > 0 else np.nan
+    std_dev = np.sqrt(max(total_squares/n - mean**2, 0)) if n > 0 else np.nan
+    counts, edges = store_histogram(store, name, index)
+    max_bin_index = np.argmax(counts)
+    mode = (edges[max_bin_index] + edges[max_bin_index + 1])/2
+    return int(n), mean, std_dev, mode
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def store_correlation(store, name, index):
+    '''
+        Parameters:
+            store (dict):                   histogram store
+            name (string):                  one of CROSS_MOMENTS
+            index (int, int, int, int):     (particle, material, momentum, angle) index of the configuration
+
+        Returns:
+            correlation (float):            Pearson correlation coefficient (exact, from the stored moments)
+    '''
+    other = 'momentum' if name == 'theta_momentum' else 'phi'
+    n, sum_x, sum_xx = store['moments'][index][MOMENT_VARIABLES.index('theta')]
+    _, sum_y, sum_yy = store['moments'][index][MOMENT_VARIABLES.index(other)]
+    sum_xy = store['cross_moments'][index][CROSS_MOMENTS.index(name)]
+    covariance = sum_xy/n - (sum_x/n)*(sum_y/n)
+    variance_x = sum_xx/n - (sum_x/n)**2
+    variance_y = sum_yy/n - (sum_y/n)**2
+    correlation = covariance/np.sqrt(variance_x*variance_y)
+    return correlation
+
+
+# Functions to accumulate the 2D histogram of outgoing momenta vs incident angle
+#=====================================================
+def init_momentum_angle_histogram(n_angles, bins=MOMENTUM_ANGLE_BINS):
+    '''
+        Parameters:
+            n_angles (int):             number of incident angles
+            bins (int):                 number of momentum bins
+
+        Returns:
+            hist2d (float array):       empty (angle x momentum bins) histogram of outgoing momenta vs incident angle
+    '''
+    return np.zeros((n_angles, bins))
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def fill_momentum_angle_histogram(hist2d, theta_index, momenta, momentum):
+    '''
+        Parameters:
+            hist2d (float array):       (angle x momentum bins) histogram (see init_momentum_angle_histogram)
+            theta_index (int):          index of the incident angle
+            momenta (float array):      momenta of reflected/transmitted particles for this incident angle
+            momentum (float):           incident momentum
+
+        Returns:
+
+        Info:
+            Bins the momenta of one incident angle into its row of hist2d (normalized to unit area on (0, momentum)),
+            so that only the binned row has to be kept, not the raw momenta of every incident angle
+    '''
+    if len(momenta) == 0:
+        return
+    hist2d[theta_index] = np.histogram(momenta, bins=hist2d.shape[1], range=(0, momentum), density=True)[0]
@@ -0,0 +1,221 @@
+# File: analysis_surrogate.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import os
+import sys
+
+from analysis_helpers import *
+from analysis_results import *
+
+
+# Constants
+#=====================================================
+SURROGATE_QUANTITIES = ('fraction', 'theta_mean', 'momentum_mean')     # reflected (or transmitted) fraction, mean outgoing theta (deg) and momentum (MeV/c)
+
+
+# Interpolated surrogate of a sweep
+# Info: the summaries of one or several sweeps (e.g. one per plate thickness, all reflected or all transmitted) are
+#       gathered into a table over (particle, material, momentum, incident angle, thickness), holding for every
+#       configuration the fraction of selected (reflected or transmitted) events with its binomial error, and the mean
+#       outgoing theta and momentum with the errors on the means (NaN where the configuration is missing or below the cutoff).
+#       For a particle and material, a query (momentum, angle, thickness) is answered by multilinear interpolation
+#       between the 2^3 neighbouring grid points (axes with a single value are constant), vectorized over any number
+#       of queries. The error of an interpolated value is the statistical error of the weighted sum of the grid points
+#       sqrt(sum w_i^2 err_i^2); the interpolation error itself is not included. Queries outside the grid, or next to
+#       a missing configuration, give NaN. The surrogate is saved to a small .npz file.
+#
+#       Usage:
+#           python3 analysis_surrogate.py build <surrogate.npz> <summary.npz> [<summary.npz> ...]
+#           python3 analysis_surrogate.py query <surrogate.npz> <particle> <material> <momentum> <angle> [thickness]
+#=====================================================
+def summary_quantities(summary):
+    '''
+        Parameters:
+            summary (structured array): summary of a grid
+
+        Returns:
+            values (float array):       (..., len(SURROGATE_QUANTITIES)) values of the surrogate quantities
+            errors (float array):       (..., len(SURROGATE_QUANTITIES)) errors of the values (binomial error of the
+                                        fraction, errors on the means as statistic_errors)
+    '''
+    events = summary['events'].astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(events > 0, summary['selected']/events, np.nan)
+        fraction_error = np.sqrt(fraction*(1 - fraction)/events)
+    valid = summary['valid']
+    values = np.stack([fraction, np.where(valid, summary['theta_mean'], np.nan), np.where(valid, summary['momentum_mean'], np.nan)], axis=-1)
+    errors = np.stack([fraction_error, np.where(valid, statistic_errors(summary, 'theta'), np.nan), np.where(valid, statistic_errors(summary, 'momentum'), np.nan)], axis=-1)
+    return values, errors
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def build_surrogate(summaries):
+    '''
+        Parameters:
+            summaries (list):           loaded summaries (see load_summary), of the same analysis (reflected or transmitted)
+
+        Returns:
+            surrogate (dict):           'particles', 'materials', 'momenta', 'angles' and 'thicknesses' axes (sorted
+                                        unions of those of the summaries), 'values' and 'errors' tables of shape
+                                        (particles, materials, momenta, angles, thicknesses, quantities), 'quantities'
+                                        and 'refl_trans_string'
+
+        Info:
+            Raises ValueError if the summaries mix reflected and transmitted analyses, give the same configuration twice,
+            or miss the mean theta or momentum of valid configurations
+    '''
+    if not summaries:
+        raise ValueError("No summary to build the surrogate from")
+    refl_trans_strings = {str(summary['refl_trans_string']) for summary in summaries}
+    if len(refl_trans_strings) > 1:
+        raise ValueError(f"Summaries of different analyses ({', '.join(sorted(refl_trans_strings))}) cannot be combined")
+
+    axes = {
+        'particles': np.unique(np.concatenate([summary['particles'] for summary in summaries])),
+        'materials': np.unique(np.concatenate([summary['materials'] for summary in summaries])),
+        'momenta': np.unique(np.concatenate([summary['momenta'] for summary in summaries])),
+        'angles': np.unique(np.concatenate([summary['angles'] for summary in summaries])),
+        'thicknesses': np.unique([float(summary['thickness']) for summary in summaries]),
+    }
+    shape = tuple(len(axis) for axis in axes.values()) + (len(SURROGATE_QUANTITIES),)
+    values = np.full(shape, np.nan)
+    errors = np.full(shape, np.nan)
+    filled = np.zeros(shape[:-1], dtype=bool)
+
+    for summary in summaries:
+        indices = np.ix_(np.searchsorted(axes['particles'], summary['particles']), np.searchsorted(axes['materials'], summary['materials']),
+                         np.searchsorted(axes['momenta'], summary['momenta']), np.searchsorted(axes['angles'], summary['angles']),
+                         [np.searchsorted(axes['thicknesses'], float(summary['thickness']))])
+        if filled[indices].any():
+            raise ValueError(f"Configurations of thickness {float(summary['thickness'])} are given by several summaries")
+        for field in ('theta_mean', 'momentum_mean'):
+            missing = summary['summary']['valid'] & np.isnan(summary['summary'][field])
+            if missing.any():
+                raise ValueError(f"The summary of thickness {float(summary['thickness'])} has no {field} for {np.count_nonzero(missing)} valid configurations (made without the momenta or the statistics?)")
+        summary_values, summary_errors = summary_quantities(summary['summary'])
+        values[indices] = summary_values[..., None, :]
+        errors[indices] = summary_errors[..., None, :]
+        filled[indices] = True
+
+    return dict(axes, values=values, errors=errors, quantities=np.asarray(SURROGATE_QUANTITIES, dtype=str),
+                refl_trans_string=np.asarray(refl_trans_strings.pop(), dtype=str))
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def save_surrogate(path, surrogate):
+    '''
+        Parameters:
+            path (string):              path of the output .npz file
+            surrogate (dict):           surrogate (see build_surrogate)
+
+        Returns:
+    '''
+    np.savez_compressed(path, **surrogate)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def load_surrogate(path):
+    '''
+        Parameters:
+            path (string):              path of a surrogate written by save_surrogate
+
+        Returns:
+            surrogate (dict):           surrogate (see build_surrogate)
+    '''
+    with np.load(path) as archive:
+        return {key: archive[key] for key in archive.files}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def axis_weights(axis, points):
+    '''
+        Parameters:
+            axis (float array):         sorted grid values along one axis
+            points (float array):       query values
+
+        Returns:
+            lower (int array):          index of the grid point below each query
+            upper_weight (float array): weight of the grid point above (lower + 1); NaN outside the axis
+
+        Info:
+            An axis with a single value only accepts queries at that value (weight 0 on the single point)
+    '''
+    points = np.asarray(points, dtype=np.float64)
+    if len(axis) == 1:
+        return np.zeros(points.shape, dtype=np.intp), np.where(points == axis[0], 0.0, np.nan)
+    lower = np.clip(np.searchsorted(axis, points, side='right') - 1, 0, len(axis) - 2)
+    upper_weight = (points - axis[lower])/(axis[lower + 1] - axis[lower])
+    upper_weight = np.where((points >= axis[0]) & (points <= axis[-1]), upper_weight, np.nan)
+    return lower, upper_weight
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def query_surrogate(surrogate, particle, material, momentum, angle, thickness=None):
+    '''
+        Parameters:
+            surrogate (dict):           surrogate (see build_surrogate)
+            particle (string):          particle (e.g. 'mu-')
+            material (int):             material (see Material Identification)
+            momentum (float array):     incident momenta (in MeV/c)
+            angle (float array):        incident angles (in deg)
+            thickness (float array):    plate thicknesses (in mm, default: the only thickness of the surrogate)
+
+        Returns:
+            quantities (dict):          (values, errors) arrays of each of SURROGATE_QUANTITIES, with the broadcast
+                                        shape of the queries (NaN outside the grid or next to a missing configuration)
+    '''
+    particle_index = np.flatnonzero(surrogate['particles'] == particle)
+    material_index = np.flatnonzero(surrogate['materials'] == int(material))
+    if particle_index.size == 0 or material_index.size == 0:
+        raise ValueError(f"No {particle} on material {material} in the surrogate")
+    if thickness is None:
+        if len(surrogate['thicknesses']) != 1:
+            raise ValueError("The surrogate has several thicknesses, a thickness must be given")
+        thickness = surrogate['thicknesses'][0]
+    momentum, angle, thickness = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in (momentum, angle, thickness)))
+    values = surrogate['values'][particle_index[0], material_index[0]]
+    errors = surrogate['errors'][particle_index[0], material_index[0]]
+    n_quantities = values.shape[-1]
+    strides = (values.shape[1]*values.shape[2], values.shape[2], 1)
+    missing = np.isnan(values) | np.isnan(errors)
+    table = np.concatenate([np.nan_to_num(values), np.nan_to_num(np.square(errors)), missing], axis=-1).reshape(-1, 3*n_quantities)
+
+    # Multilinear interpolation: one gather of (value, variance, missing) per corner of the cell of each query
+    cells = [axis_weights(surrogate[axis], points.ravel()) for axis, points in (('momenta', momentum), ('angles', angle), ('thicknesses', thickness))]
+    sums = np.zeros((momentum.size, 3*n_quantities))
+    for corner in np.ndindex(*(1 if size == 1 else 2 for size in values.shape[:3])):
+        weight = np.ones(momentum.size)
+        flat = np.zeros(momentum.size, dtype=np.intp)
+        for (lower, upper_weight), side, stride in zip(cells, corner, strides):
+            weight *= upper_weight if side else 1 - upper_weight
+            flat += (lower + side)*stride
+        factors = np.repeat(np.stack([weight, np.square(weight), weight != 0], axis=-1), n_quantities, axis=-1)   # corners of zero weight do not propagate missing configurations
+        sums += factors*table[flat]
+    value, variance = sums[:, :n_quantities], sums[:, n_quantities:2*n_quantities]
+    value[sums[:, 2*n_quantities:] > 0] = np.nan
+    variance[np.isnan(value)] = np.nan
+    value = value.reshape(momentum.shape + (n_quantities,))
+    variance = variance.reshape(value.shape)
+    return {quantity: (value[..., q], np.sqrt(variance[..., q])) for q, quantity in enumerate(SURROGATE_QUANTITIES)}
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    if len(sys.argv) >= 4 and sys.argv[1] == 'build':
+        surrogate = build_surrogate([load_summary(path) for path in sys.argv[3:]])
+        save_surrogate(sys.argv[2], surrogate)
+        print(f"{sys.argv[2]}: {surrogate['values'][..., 0].size} configurations, {os.path.getsize(sys.argv[2])/1024:.1f} kB")
+    elif len(sys.argv) in (7, 8) and sys.argv[1] == 'query':
+        surrogate = load_surrogate(sys.argv[2])
+        thickness = float(sys.argv[7]) if len(sys.argv) == 8 else None
+        quantities = query_surrogate(surrogate, sys.argv[3], int(sys.argv[4]), float(sys.argv[5]), float(sys.argv[6]), thickness)
+        for quantity, (value, error) in quantities.items():
+            print(f"{quantity}: {float(value):.6g} +- {float(error):.2g}")
+    else:
+        print("Usage: python3 analysis_surrogate.py build <surrogate.npz> <summary.npz> [<summary.npz> ...] | query <surrogate.npz> <particle> <material> <momentum> <angle> [thickness]")
+        sys.exit(1)
@@ -0,0 +1,196 @@
+# File: analysis_watch.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import numpy as np
+import os
+import sys
+import time
+import uproot
+
+from analysis_io import *
+from analysis_core import *
+from analysis_distributed import *
+
+
+# Constants
+#=====================================================
+POLL_INTERVAL = 60                              # time between two scans of the data directory (in s)
+TIMEOUT_HOURS = 0                               # stop if no new configuration appears for this long (in hours, 0: never)
+LINE_FIGURES = ('REFLECTED_TRANSMITTED_DECAYED_SCATTER_PLOT', 'HISTOGRAM_MOMENTA_INCIDENT_ANGLE', 'DECAY_PRODUCTS_PLOT')     # figures of one momentum line
+PAIR_FIGURES = ('THETAS_SCATTER_PLOT', 'CUTOFF_THETA_SCATTER_PLOT')    # figures of all the momenta of one (particle, material)
+READ_ERRORS = (OSError, ValueError, uproot.KeyInFileError, uproot.deserialization.DeserializationError)    # data files that cannot be read or are not valid (see counts_error)
+
+
+# Watch mode (analyse the data files of a sweep as the batch jobs write them)
+# Info: the data directory is scanned every POLL_INTERVAL seconds ([Watch] section of the plot configuration file). A data
+#       file is complete once its size and modification time are unchanged between two scans; it is then read and
+#       added to the partial of the grid (as a map task of analysis_distributed.py does), and the running summary
+#       (summary.npz, with valid = False for the configurations still missing) is saved. The figures of a momentum line
+#       are made as soon as all of its incident angles are in, and those of a (particle, material) once all of its
+#       momenta are. When the grid is complete, the outputs of the reduce step of analysis_distributed.py are written.
+#       Polling (rather than file system notifications) also works on EOS and other network file systems.
+#
+#       Usage:
+#           python3 analysis_watch.py <config>
+#=====================================================
+def scan_data_directory(data):
+    '''
+        Parameters:
+            data (string):              path to the directory of the data files
+
+        Returns:
+            files (dict):               (size, modification time) of each .root file, keyed by path (empty if the
+                                        directory does not exist yet)
+    '''
+    if not os.path.isdir(data):
+        return {}
+    with os.scandir(data) as entries:
+        return {os.path.join(data, entry.name): (entry.stat().st_size, entry.stat().st_mtime) for entry in entries
+                if entry.name.endswith('.root') and entry.is_file()}
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def complete_configurations(options, pending, files, previous_files, failed=None):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+            pending (set):              (particle, material, momentum, angle) indices not analysed yet
+            files (dict):               current scan of the data directory (see scan_data_directory)
+            previous_files (dict):      previous scan of the data directory
+            failed (dict):              (size, modification time) and error of the data files that could not be read,
+                                        keyed by index (default: none)
+
+        Returns:
+            ready (list):               (index, path) of the pending configurations whose data file is complete (and
+                                        was rewritten since it could not be read, for the failed ones)
+    '''
+    failed = failed or {}
+    ready = []
+    for index in sorted(pending):
+        particle, material = options['PARTICLES'][index[0]], options['MATERIALS'][index[1]]
+        momentum, theta_incident = options['MOMENTA'][index[2]], options['ANGLES'][index[3]]
+        for path in data_file_candidates(options['DATA'], material, particle, momentum, theta_incident, options['THICKNESS']):
+            if path in files:
+                if files[path][0] > 0 and files[path] == previous_files.get(path) and (index not in failed or files[path] != failed[index][0]):
+                    ready.append((index, path))
+                break
+    return ready
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def render_completed_figures(options, partial, lines, pairs, plot_output):
+    '''
+        Parameters:
+            options (dict):             settings (see read_analysis_config)
+            partial (dict):             partial of the grid
+            lines (int array):          (particle, material, momentum) indices of the momentum lines that were just completed
+            pairs (int array):          (particle, material) indices whose momentum lines were all just completed
+            plot_output (dict):         plot output the figures are saved to (see open_plot_output)
+
+        Returns:
+
+        Info:
+            Makes the figures of each line, and those of each (particle, material) once all of its momentum lines are
+            complete (each figure is made once)
+    '''
+    for p, m, k in lines:
+        line_options = dict(options, PARTICLES=options['PARTICLES'][p:p+1], MATERIALS=options['MATERIALS'][m:m+1], MOMENTA=options['MOMENTA'][k:k+1],
+                            **{flag: False for flag in PAIR_FIGURES})
+        decays = {'codes': partial['decays']['codes'], 'counts': partial['decays']['counts'][p:p+1, m:m+1, k:k+1]}
+        render_summary_figures(line_options, partial['summary'][p:p+1, m:m+1, k:k+1], partial['momentum_angle'][p:p+1, m:m+1, k:k+1], plot_output, decays)
+
+    for p, m in pairs:
+        pair_options = dict(options, PARTICLES=options['PARTICLES'][p:p+1], MATERIALS=options['MATERIALS'][m:m+1], **{flag: False for flag in LINE_FIGURES})
+        render_summary_figures(pair_options, partial['summary'][p:p+1, m:m+1], partial['momentum_angle'][p:p+1, m:m+1], plot_output)
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def watch_sweep(config_file, poll_interval=None, timeout_hours=None):
+    '''
+        Parameters:
+            config_file (string):       path to the plot configuration file
+            poll_interval (float):      time between two scans (in s, default: POLL_INTERVAL of the [Watch] section)
+            timeout_hours (float):      stop if no new configuration appears for this long (in hours, default:
+                                        TIMEOUT_HOURS of the [Watch] section, 0: never)
+
+        Returns:
+            summary (structured array): summary of the grid (running summary if the watch timed out)
+
+        Info:
+            A data file that cannot be read or is not valid (READ_ERRORS, see counts_error) does not stop the watch
+            (other errors do): its configuration stays pending and is read again if a later scan finds the file with
+            another size or modification time (e.g. rewritten by a resubmitted job). Once only such configurations are
+            missing, the watch waits for their files to be rewritten until the timeout (not at all if there is none),
+            then their files are reported as skipped and left out of the summary (valid = False) and of the outputs
+    '''
+    options = read_analysis_config(config_file)
+    config = options['config']
+    poll_interval = config.getfloat('Watch', 'POLL_INTERVAL', fallback=POLL_INTERVAL) if poll_interval is None else poll_interval
+    timeout_hours = config.getfloat('Watch', 'TIMEOUT_HOURS', fallback=TIMEOUT_HOURS) if timeout_hours is None else timeout_hours
+    read_momenta = needs_momenta(options)
+    DATA_FOLDER, transmit = options['DATA_FOLDER'], options['transmit']
+    os.makedirs(f"plots/{DATA_FOLDER}", exist_ok=True)
+
+    partial = make_partial(options)
+    plot_output = open_summary_output(options)
+    pending = set(np.ndindex(partial['summary'].shape))
+    failed = {}
+    previous_files = {}
+    last_new = time.time()
+
+    while pending:
+        files = scan_data_directory(options['DATA'])
+        ready = complete_configurations(options, pending, files, previous_files, failed)
+        previous_files = files
+
+        for index, path in ready:
+            try:
+                selection = select_configuration_events(path, options['MOMENTA'][index[2]], options['ANGLES'][index[3]], options['TRANSMITTED_PARTICLES'], read_momenta, compact=options['COMPACT_DTYPES'])
+                fill_partial(partial, options, index, selection, path)
+            except READ_ERRORS as error:
+                failed[index] = (files[path], f"{path}: {error}")
+                continue
+            pending.discard(index)
+            if failed.pop(index, None) is not None:
+                partial['covered'][index[:3]] = False     # make the figures of the line again with the rewritten file
+
+        if ready:
+            last_new = time.time()
+            done = np.ones(partial['summary'].shape, dtype=bool)
+            for index in pending.difference(failed):
+                done[index] = False
+            completed_lines = np.argwhere(done.all(axis=3) & ~partial['covered'])
+            covered_pairs = partial['covered'].all(axis=2)
+            partial['covered'] |= done.all(axis=3)
+            completed_pairs = np.argwhere(partial['covered'].all(axis=2) & ~covered_pairs)
+            render_completed_figures(options, partial, completed_lines, completed_pairs, plot_output)
+            save_summary(f"plots/{DATA_FOLDER}/summary{transmit}.npz", partial['summary'], options['PARTICLES'], options['MATERIALS'], options['MOMENTA'], options['ANGLES'], options['THICKNESS'], options['EVENTS'], options['refl_trans_string'])
+            print(f"{partial['summary'].size - len(pending)} of {partial['summary'].size} configurations analysed")
+
+        timed_out = timeout_hours > 0 and time.time() - last_new > 3600*timeout_hours
+        if len(pending) == len(failed) and (timed_out or timeout_hours <= 0):
+            break
+        if timed_out:
+            print(f"No new data file for {timeout_hours} hours, {len(pending) - len(failed)} configurations missing")
+            close_plot_output(plot_output)
+            for _, error in failed.values():
+                print(f" ********** SKIPPED ********** {error}")
+            return partial['summary']
+        time.sleep(poll_interval)
+
+    summary = finish_partial(options, partial, config_file, plot_output)
+    for _, error in failed.values():
+        print(f" ********** SKIPPED ********** {error}")
+    return summary
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Please include a configuration file")
+        sys.exit(1)
+    watch_sweep(sys.argv[1])
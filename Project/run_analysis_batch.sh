@@ -0,0 +1,28 @@
+#!/bin/bash
+
+# File: run_analysis_batch.sh
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+
+# Source a python environment with numpy, scipy, matplotlib, uproot and tqdm
+# ===========================================
+echo "start source"
+source /cvmfs/sft.cern.ch/lcg/views/LCG_104/x86_64-el9-gcc12-opt/setup.sh
+echo "end source"
+
+
+# Define the project directory, plot configuration file, task and number of tasks
+# ===========================================
+project_dir=$1
+config=$2
+task=$3
+n_tasks=$4
+
+
+# Run one map task (the partial is written to plots/<DATA_SUBDIRECTORY>/partials/ in the project directory)
+# ===========================================
+echo "Running map task ${task} of ${n_tasks}"
+cd ${project_dir}
+python3 analysis_distributed.py map ${config} ${task} ${n_tasks}
+echo "Finished map task ${task} of ${n_tasks}"
@@ -0,0 +1,223 @@
+# File: run_sweep.py
+# Author: Dean Ciarniello
+# Date: 2026-10-19
+
+# Packages
+#=====================================================
+import os
+import sys
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+
+# Constants
+#=====================================================
+EXECUTABLE = 'build/simulation'                 # simulation binary (see CMakeLists.txt)
+MAC = 'mac/run.mac'                             # default .mac run file (100 000 events)
+SCRATCH = 'sweep_scratch'                       # local directory where the simulations write their outputs
+RETRIES = 2                                     # number of times a failed configuration is run again
+STAGING_WORKERS = 2                             # number of outputs copied to the destination at the same time
+
+
+# Local simulation sweep (run_batch.sh on a workstation)
+# Info: runs every line of a batch configuration file (see make_config.py) with the simulation binary, with at most
+#       n_workers simulations at the same time. Each simulation writes its output to the scratch directory, with the same
+#       name as run_batch.sh (output_<material>_<particle>_<momentum>_<angle>[_<thickness>].root); finished outputs are
+#       copied to <destination>/<output directory>/ in the background while the next simulations run, as run_batch.sh
+#       stages them to EOS. A configuration whose simulation fails (non-zero exit code or no output file) is run again
+#       up to RETRIES times, and configurations whose output is already at the destination are skipped, so an
+#       interrupted sweep can be resumed. Any executable with the arguments of the simulation (see simulation.cc) can be
+#       used, e.g. a stub script that only writes the output file to test a sweep.
+#
+#       Usage:
+#           python3 run_sweep.py <config> <destination> [--workers N] [--mac mac/run.mac] [--executable build/simulation]
+#=====================================================
+def parse_sweep_config(path):
+    '''
+        Parameters:
+            path (string):              batch configuration file (one "output, angle, momentum, particle, material[, thickness]" per line)
+
+        Returns:
+            jobs (list):                one dict per configuration with the 'output', 'angle', 'momentum', 'particle',
+                                        'material' and 'thickness' (None if not given) strings of its line
+
+        Info:
+            Raises ValueError if a line does not have 5 or 6 fields
+    '''
+    jobs = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            fields = [field.strip() for field in line.split(',')]
+            if len(fields) not in (5, 6) or not all(fields):
+                raise ValueError(f"{path}:{line_number}: expected 'output, angle, momentum, particle, material[, thickness]'")
+            jobs.append(dict(zip(('output', 'angle', 'momentum', 'particle', 'material'), fields), thickness=fields[5] if len(fields) == 6 else None))
+    return jobs
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def output_file_name(job):
+    '''
+        Parameters:
+            job (dict):                 configuration (see parse_sweep_config)
+
+        Returns:
+            name (string):              name of the output file, as written by run_batch.sh
+    '''
+    thickness = f"_{job['thickness']}" if job['thickness'] is not None else ""
+    return f"output_{job['material']}_{job['particle']}_{job['momentum']}_{job['angle']}{thickness}.root"
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def simulation_command(job, executable, mac, output_dir):
+    '''
+        Parameters:
+            job (dict):                 configuration (see parse_sweep_config)
+            executable (string):        simulation binary
+            mac (string):               .mac run file
+            output_dir (string):        directory where the simulation writes its output
+
+        Returns:
+            command (string list):      command line of the simulation (no visualization)
+    '''
+    command = [executable, mac, job['material'], job['angle'], job['momentum'], job['particle'], output_file_name(job), os.path.join(output_dir, ''), '0']
+    return command + ([job['thickness']] if job['thickness'] is not None else [])
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def run_simulation(job, executable, mac, scratch, retries=RETRIES, timeout=None):
+    '''
+        Parameters:
+            job (dict):                 configuration (see parse_sweep_config)
+            executable (string):        simulation binary
+            mac (string):               .mac run file
+            scratch (string):           scratch directory (the output is written to <scratch>/<output directory>/)
+            retries (int):              number of times the simulation is run again if it fails
+            timeout (float):            maximum run time of one attempt (in s, default: no limit)
+
+        Returns:
+            path (string):              path of the output file in the scratch directory
+            attempts (int):             number of attempts
+
+        Info:
+            The output of every attempt is appended to <scratch>/logs/<output file name>.log. Raises RuntimeError if
+            all the attempts fail.
+    '''
+    output_dir = os.path.join(scratch, job['output'])
+    log_dir = os.path.join(scratch, 'logs')
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
+    name = output_file_name(job)
+    path = os.path.join(output_dir, name)
+    command = simulation_command(job, os.path.abspath(executable), os.path.abspath(mac), output_dir)
+
+    for attempt in range(1, retries + 2):
+        if os.path.exists(path):
+            os.remove(path)                                     # partial output of a failed attempt
+        with open(os.path.join(log_dir, name + '.log'), 'a') as log:
+            log.write(f"# attempt {attempt}: {' '.join(command)}\n")
+            log.flush()
+            try:
+                returncode = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, timeout=timeout).returncode
+            except subprocess.TimeoutExpired:
+                returncode = 'timeout'
+            log.write(f"# exit code: {returncode}\n")
+        if returncode == 0 and os.path.exists(path) and os.path.getsize(path) > 0:
+            return path, attempt
+    raise RuntimeError(f"{name}: simulation failed {retries + 1} times (see {log_dir})")
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def stage_output(path, destination):
+    '''
+        Parameters:
+            path (string):              output file in the scratch directory (removed once copied)
+            destination (string):       directory to copy it to (created if needed)
+
+        Returns:
+            staged_path (string):       path of the copy
+
+        Info:
+            The file is copied under a temporary name and renamed, so an interrupted copy is never taken for an output
+    '''
+    os.makedirs(destination, exist_ok=True)
+    staged_path = os.path.join(destination, os.path.basename(path))
+    temporary_path = staged_path + '.part'
+    shutil.copyfile(path, temporary_path)
+    os.replace(temporary_path, staged_path)
+    os.remove(path)
+    return staged_path
+
+# - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+def run_sweep(config_path, destination, executable=EXECUTABLE, mac=MAC, scratch=SCRATCH, n_workers=None, retries=RETRIES, timeout=None, overwrite=False):
+    '''
+        Parameters:
+            config_path (string):       batch configuration file (see make_config.py)
+            destination (string):       directory the outputs are staged to (as OUTPUT_DIR in run_batch.sh)
+            executable (string):        simulation binary
+            mac (string):               .mac run file
+            scratch (string):           local directory where the simulations write their outputs
+            n_workers (int):            maximum number of simulations at the same time (default: number of CPUs)
+            retries (int):              number of times a failed simulation is run again
+            timeout (float):            maximum run time of one attempt (in s, default: no limit)
+            overwrite (bool):           run configurations whose output already exists at the destination
+
+        Returns:
+            report (dict):              'staged' output paths, 'skipped' output paths and 'failed' error messages
+    '''
+    jobs = parse_sweep_config(config_path)
+    report = {'staged': [], 'skipped': [], 'failed': []}
+    pending = []
+    for job in jobs:
+        staged_path = os.path.join(destination, job['output'], output_file_name(job))
+        if os.path.exists(staged_path) and not overwrite:
+            report['skipped'].append(staged_path)
+        else:
+            pending.append(job)
+
+    # Simulations on a bounded pool; each finished output is staged by a second pool while the next simulations run
+    n_workers = n_workers or os.cpu_count()
+    with ThreadPoolExecutor(max_workers=n_workers) as simulations, ThreadPoolExecutor(max_workers=STAGING_WORKERS) as staging:
+        futures = {simulations.submit(run_simulation, job, executable, mac, scratch, retries, timeout): job for job in pending}
+        stagings = []
+        for future in tqdm(as_completed(futures), total=len(futures), leave=False, desc='SIMULATIONS', dynamic_ncols=True):
+            try:
+                path, _ = future.result()
+            except Exception as error:
+                report['failed'].append(str(error))
+                continue
+            stagings.append(staging.submit(stage_output, path, os.path.join(destination, futures[future]['output'])))
+        for future in stagings:
+            try:
+                report['staged'].append(future.result())
+            except OSError as error:
+                report['failed'].append(f"staging: {error}")
+    return report
+
+
+# Main Code
+#=====================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the simulations of a batch configuration file on this machine")
+    parser.add_argument('config', help="batch configuration file (see make_config.py)")
+    parser.add_argument('destination', help="directory the outputs are copied to (e.g. the DATA_DIRECTORY of the analysis)")
+    parser.add_argument('--workers', type=int, default=None, help="maximum number of simulations at the same time (default: number of CPUs)")
+    parser.add_argument('--mac', default=MAC, help=f"mac run file (default: {MAC})")
+    parser.add_argument('--executable', default=EXECUTABLE, help=f"simulation binary (default: {EXECUTABLE})")
+    parser.add_argument('--scratch', default=SCRATCH, help=f"local output directory of the simulations (default: {SCRATCH})")
+    parser.add_argument('--retries', type=int, default=RETRIES, help=f"number of times a failed simulation is run again (default: {RETRIES})")
+    parser.add_argument('--timeout', type=float, default=None, help="maximum run time of one simulation in s (default: no limit)")
+    parser.add_argument('--overwrite', action='store_true', help="run configurations whose output already exists at the destination")
+    arguments = parser.parse_args()
+
+    report = run_sweep(arguments.config, arguments.destination, arguments.executable, arguments.mac, arguments.scratch,
+                       arguments.workers, arguments.retries, arguments.timeout, arguments.overwrite)
+    print(f"{len(report['staged'])} staged, {len(report['skipped'])} skipped, {len(report['failed'])} failed")
+    for error in report['failed']:
+        print(error)
+    sys.exit(1 if report['failed'] else 0)